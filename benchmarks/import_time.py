@@ -0,0 +1,138 @@
+"""
+Start-up Time Benchmark
+
+Measures how long each pipeline entry point takes before it can do any
+work: the time to import the module, and the wall time of `--help`.
+Every measurement runs in a fresh interpreter, so nothing is shared
+between runs, and the median of several runs is reported.
+
+Heavy libraries (statsmodels, matplotlib, scipy, joblib) are imported
+inside the functions that need them; the "heavy" column lists any that
+an import still pulls in, which should stay empty for the entry points
+that are meant to start quickly.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 5 --cached-forecast
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Entry points with an argparse CLI
+ENTRY_POINTS = [
+    "data_cleaning",
+    "train_sarima",
+    "model_evaluation",
+    "forecast",
+    "forecast_service",
+    "hyperparameter_tuning",
+    "train_hierarchy",
+    "reconciliation",
+    "baselines",
+]
+
+HEAVY_MODULES = ("statsmodels", "matplotlib", "scipy", "sklearn", "joblib")
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+def measure_import(module: str) -> dict:
+    """
+    Import one module in a fresh interpreter.
+
+    Returns:
+        Dictionary with the import time in seconds and the heavy
+        libraries the import loaded
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def measure_command(args) -> float:
+    """Wall time in seconds of one command run in a fresh interpreter."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=SRC_DIR, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+def _median_ms(samples) -> float:
+    return statistics.median(samples) * 1000
+
+def run_benchmark(modules=ENTRY_POINTS, repeat: int = 3, cached_forecast: bool = False):
+    """
+    Benchmark the start-up of each entry point.
+
+    Args:
+        modules: Module names in src/ to measure
+        repeat: Runs per measurement (the median is reported)
+        cached_forecast: Also time `forecast.py` when its cache is warm
+            (requires cleaned data and a saved model)
+
+    Returns:
+        List of result rows
+    """
+    rows = []
+    baseline = _median_ms([measure_command(["-c", "pass"]) for _ in range(repeat)])
+    rows.append({"entry": "python (empty)", "import_ms": None, "help_ms": baseline, "heavy": []})
+
+    for module in modules:
+        probes = [measure_import(module) for _ in range(repeat)]
+        help_runs = [measure_command([f"{module}.py", "--help"]) for _ in range(repeat)]
+        rows.append({
+            "entry": module,
+            "import_ms": _median_ms([probe["seconds"] for probe in probes]),
+            "help_ms": _median_ms(help_runs),
+            "heavy": probes[-1]["heavy"]
+        })
+
+    if cached_forecast:
+        # The first run fills the cache and publishes the outputs
+        measure_command(["forecast.py"])
+        runs = [measure_command(["forecast.py"]) for _ in range(repeat)]
+        rows.append({"entry": "forecast (cached)", "import_ms": None,
+                     "help_ms": _median_ms(runs), "heavy": []})
+    return rows
+
+def print_report(rows) -> None:
+    """Print the results as a table."""
+    print(f"{'entry point':<24}{'import (ms)':>12}{'run (ms)':>10}  heavy imports")
+    print("-" * 64)
+    for row in rows:
+        import_ms = f"{row['import_ms']:.0f}" if row["import_ms"] is not None else "-"
+        heavy = ", ".join(row["heavy"]) or "-"
+        print(f"{row['entry']:<24}{import_ms:>12}{row['help_ms']:>10.0f}  {heavy}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure entry point start-up time")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument(
+        "--module", action="append", dest="modules",
+        help="Measure only this module (repeatable)"
+    )
+    parser.add_argument(
+        "--cached-forecast", action="store_true",
+        help="Also time forecast.py with a warm forecast cache"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    rows = run_benchmark(args.modules or ENTRY_POINTS, args.repeat, args.cached_forecast)
+    print_report(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Pipeline Stage Benchmarks
+
+Measures how the pipeline stages scale with the size of the raw extract.
+For each requested size a synthetic Superstore-shaped file is generated
+(see synthetic_data.py) and the stages are run on it in order:
+
+    clean               data_cleaning: load, parse, validate, filter, save
+    aggregate           aggregates.load_monthly_sales on the cleaned file
+    train_sarima        train_sarima.train_sarima on the monthly series
+    grid_search_sarima  hyperparameter_tuning.grid_search_sarima (small grid)
+    forecast_next       forecast.forecast_next on the saved compact model
+
+Every stage runs in a fresh process, so its peak memory is not hidden by
+an earlier stage. For each stage the report has the wall time, the peak
+resident memory of the process and how much of it the stage added, and
+the throughput (rows/s for the data stages, fits/s and forecasts/s for
+the model stages, which depend on the number of months, not rows).
+
+With --baseline, the run is compared with an earlier --output file and
+the script exits with status 1 when a stage got slower than the
+tolerance allows, so it can gate changes in CI.
+
+Usage:
+    python benchmarks/stage_benchmarks.py
+    python benchmarks/stage_benchmarks.py --rows 1e5 1e6 1e7 --markets 20 --output bench.json
+    python benchmarks/stage_benchmarks.py --rows 1e6 --stream --stages clean aggregate
+    python benchmarks/stage_benchmarks.py --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent / "src"))
+
+from synthetic_data import MARKETS, CATEGORIES, write_superstore_csv
+from logger import peak_rss_mb, flush_logs
+
+STAGES = ["clean", "aggregate", "train_sarima", "grid_search_sarima", "forecast_next"]
+
+# (p, d, q) x (P, D, Q) ranges of the benchmark grid: 16 candidates
+GRID = dict(p_range=(0, 1), d_range=(1, 1), q_range=(0, 1),
+            P_range=(0, 1), D_range=(1, 1), Q_range=(0, 1))
+FORECAST_REPEATS = 50
+
+def _read_monthly(workdir: Path):
+    import pandas as pd
+    series = pd.read_csv(workdir / "monthly.csv", index_col=0, parse_dates=True)["sales"]
+    return series.asfreq("M")
+
+def run_stage(stage: str, workdir: Path, stream: bool = False) -> dict:
+    """
+    Run one stage on the files in workdir and measure it.
+
+    Inputs are read, and statsmodels imported, before the clock starts,
+    except for the data stages, whose cost is reading and writing files.
+
+    Returns:
+        Dictionary with seconds, units processed, unit name and memory
+    """
+    workdir = Path(workdir)
+    raw_file, cleaned_file = workdir / "raw.csv", workdir / "cleaned.csv"
+
+    if stage == "clean":
+        from data_cleaning import (load_data, standardize_columns, parse_dates,
+                                   convert_numeric_columns, validate_data,
+                                   clean_invalid_records, clean_in_chunks)
+        from sales_store import save_cleaned_data
+
+        def work():
+            if stream:
+                return clean_in_chunks(raw_file, cleaned_file)["rows_read"]
+            df = convert_numeric_columns(parse_dates(standardize_columns(load_data(raw_file))))
+            rows = len(df)
+            report = validate_data(df)
+            save_cleaned_data(clean_invalid_records(df, report), cleaned_file)
+            return rows
+        unit = "rows"
+
+    elif stage == "aggregate":
+        from aggregates import load_monthly_sales
+        with open(cleaned_file) as f:
+            n_rows = sum(1 for _ in f) - 1
+
+        def work():
+            series = load_monthly_sales(path=cleaned_file, cache_dir=workdir / "aggregates")
+            series.to_csv(workdir / "monthly.csv")
+            return n_rows
+        unit = "rows"
+
+    elif stage == "train_sarima":
+        from train_sarima import train_sarima
+        from model_utils import save_compact_model
+        import statsmodels.tsa.statespace.sarimax  # noqa: F401
+        series = _read_monthly(workdir)
+
+        def work():
+            save_compact_model(train_sarima(series), workdir / "model.npz")
+            return 1
+        unit = "fits"
+
+    elif stage == "grid_search_sarima":
+        from hyperparameter_tuning import grid_search_sarima
+        import statsmodels.tsa.statespace.sarimax  # noqa: F401
+        series = _read_monthly(workdir)
+
+        def work():
+            return len(grid_search_sarima(series, n_jobs=1, **GRID))
+        unit = "fits"
+
+    elif stage == "forecast_next":
+        from forecast import forecast_next
+        from model_utils import load_compact_model
+        model = load_compact_model(workdir / "model.npz")
+
+        def work():
+            for _ in range(FORECAST_REPEATS):
+                forecast_next(model)
+            return FORECAST_REPEATS
+        unit = "forecasts"
+
+    else:
+        raise ValueError(f"Unknown stage: {stage} (expected one of {', '.join(STAGES)})")
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    units = work()
+    seconds = time.perf_counter() - start
+    rss_after = peak_rss_mb()
+    return {
+        "seconds": seconds,
+        "units": units,
+        "unit": unit,
+        "peak_rss_mb": rss_after,
+        "rss_increase_mb": rss_after - rss_before if rss_after is not None else None
+    }
+
+def run_in_subprocess(stage: str, workdir: Path, stream: bool = False) -> dict:
+    """Run one stage in a fresh interpreter and return its measurements."""
+    command = [sys.executable, str(Path(__file__).resolve()), "--worker", stage, "--workdir", str(workdir)]
+    if stream:
+        command.append("--stream")
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Stage {stage} failed:\n{result.stdout[-2000:]}{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run_benchmarks(rows_list, n_markets: int = len(MARKETS), n_categories: int = len(CATEGORIES),
+                   stages=STAGES, stream: bool = False, data_dir: Path = None) -> list:
+    """
+    Generate data at each size and benchmark the stages on it.
+
+    Args:
+        rows_list: Raw file sizes in rows
+        n_markets: Distinct markets in the synthetic data
+        n_categories: Distinct categories in the synthetic data
+        stages: Stages to run, in pipeline order (a stage needs the
+            outputs of the ones before it)
+        stream: Clean with data_cleaning.clean_in_chunks
+        data_dir: Keep generated files here and reuse them (default: a
+            temporary directory removed afterwards)
+
+    Returns:
+        One result dictionary per size and stage
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = Path(data_dir) if data_dir else Path(tmp)
+        for rows in rows_list:
+            workdir = base_dir / f"superstore_{rows}_{n_markets}m_{n_categories}c"
+            workdir.mkdir(parents=True, exist_ok=True)
+            if not (workdir / "raw.csv").exists():
+                print(f"Generating {rows:,} rows...", flush=True)
+                write_superstore_csv(workdir / "raw.csv", rows, n_markets, n_categories)
+
+            for stage in stages:
+                print(f"  {stage} ({rows:,} rows)...", flush=True)
+                measured = run_in_subprocess(stage, workdir, stream)
+                measured.update({
+                    "stage": stage,
+                    "rows": rows,
+                    "markets": n_markets,
+                    "categories": n_categories,
+                    "throughput": measured["units"] / measured["seconds"] if measured["seconds"] else None
+                })
+                results.append(measured)
+    return results
+
+def compare_with_baseline(results: list, baseline: list, tolerance: float) -> list:
+    """
+    Find stages that got slower than the baseline allows.
+
+    Returns:
+        List of (stage, rows, baseline seconds, seconds) for regressions
+    """
+    previous = {(entry["stage"], entry["rows"], entry["markets"], entry["categories"]): entry
+                for entry in baseline}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["stage"], entry["rows"], entry["markets"], entry["categories"]))
+        if old and entry["seconds"] > old["seconds"] * (1 + tolerance):
+            regressions.append((entry["stage"], entry["rows"], old["seconds"], entry["seconds"]))
+    return regressions
+
+def print_report(results: list) -> None:
+    """Print the results as a table."""
+    print(f"\n{'stage':<20}{'rows':>12}{'time (s)':>10}{'peak MB':>10}{'added MB':>10}  throughput")
+    print("-" * 86)
+    for entry in results:
+        peak = f"{entry['peak_rss_mb']:.0f}" if entry["peak_rss_mb"] is not None else "-"
+        added = f"{entry['rss_increase_mb']:.0f}" if entry["rss_increase_mb"] is not None else "-"
+        throughput = f"{entry['throughput']:,.1f} {entry['unit']}/s" if entry["throughput"] else "-"
+        print(f"{entry['stage']:<20}{entry['rows']:>12,}{entry['seconds']:>10.2f}{peak:>10}{added:>10}  {throughput}")
+
+def _row_count(value: str) -> int:
+    """Parse row counts such as 100000, 1e6 or 2.5e7."""
+    count = int(float(value))
+    if count < 1:
+        raise argparse.ArgumentTypeError("row count must be positive")
+    return count
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic data")
+    parser.add_argument("--rows", type=_row_count, nargs="+", default=[100_000, 1_000_000],
+                        help="Raw file sizes to benchmark (e.g. 1e5 1e6 1e7)")
+    parser.add_argument("--markets", type=int, default=len(MARKETS), help="Distinct markets")
+    parser.add_argument("--categories", type=int, default=len(CATEGORIES), help="Distinct categories")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to run")
+    parser.add_argument("--stream", action="store_true", help="Clean in chunks (needed for very large files)")
+    parser.add_argument("--data-dir", type=Path, help="Keep and reuse generated files in this directory")
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="Earlier --output file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument("--worker", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", type=Path, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        # Measurements go on the last line, after whatever the stage logged
+        result = run_stage(args.worker, args.workdir, args.stream)
+        flush_logs()
+        print(json.dumps(result))
+        return
+
+    stages = [stage for stage in STAGES if stage in args.stages]
+    results = run_benchmarks(args.rows, args.markets, args.categories, stages, args.stream, args.data_dir)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        for stage, rows, before, after in regressions:
+            print(f"REGRESSION {stage} at {rows:,} rows: {before:.2f}s -> {after:.2f}s")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo stage slower than the baseline by more than {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
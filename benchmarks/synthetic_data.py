@@ -0,0 +1,210 @@
+"""
+Synthetic Superstore Data
+
+Generates transaction files with the same columns and formats as
+data/raw/superstore_sales.csv (day-first dates, one row per order line)
+at any size and with any number of markets and categories, so the
+pipeline can be benchmarked well beyond the size of the sample extract.
+
+Sales follow a trend plus yearly seasonality per market and category, so
+the monthly series behave like the real one when models are fitted. A
+small share of rows is deliberately invalid (zero sales, missing order
+dates, repeated order lines) so the cleaning rules have work to do.
+
+Rows are generated and written in chunks, so memory use is bounded by
+the chunk size and files of 10^8 rows can be written.
+
+Usage:
+    python benchmarks/synthetic_data.py --rows 1e6 --output /tmp/sales_1m.csv
+    python benchmarks/synthetic_data.py --rows 1e7 --markets 20 --categories 6 --output big.csv
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "order_id", "order_date", "ship_date", "ship_mode", "customer_name", "segment",
+    "state", "country", "market", "region", "product_id", "category", "sub_category",
+    "product_name", "sales", "quantity", "discount", "profit", "shipping_cost",
+    "order_priority", "year"
+]
+
+MARKETS = ["Africa", "APAC", "Canada", "EMEA", "EU", "LATAM", "US"]
+CATEGORIES = ["Furniture", "Office Supplies", "Technology"]
+SHIP_MODES = ["Standard Class", "Second Class", "First Class", "Same Day"]
+SEGMENTS = ["Consumer", "Corporate", "Home Office"]
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+
+REGIONS_PER_MARKET = 2
+COUNTRIES_PER_REGION = 3
+SUB_CATEGORIES_PER_CATEGORY = 4
+PRODUCTS_PER_SUB_CATEGORY = 50
+CUSTOMERS = 5000
+
+# Share of rows made invalid for the cleaning stage
+INVALID_SHARE = 0.002
+DUPLICATE_SHARE = 0.002
+
+def _names(base, prefix, n):
+    """The first n names of `base`, continued with numbered names."""
+    return [base[i] if i < len(base) else f"{prefix} {i + 1:02d}" for i in range(n)]
+
+def _labels(prefix, n):
+    """Lookup table of n numbered labels; rows index it instead of formatting each value."""
+    return np.array([f"{prefix}{i}" for i in range(n)], dtype=object)
+
+def _formatted_dates(dates: np.ndarray, first: np.datetime64) -> np.ndarray:
+    """Format datetime64[D] values like the raw extract (day-first, no padding)."""
+    offsets = (dates - first).astype(int)
+    calendar = pd.date_range(first, periods=offsets.max() + 1, freq="D")
+    table = np.array([f"{d.day}/{d.month}/{d.year}" for d in calendar], dtype=object)
+    return table[offsets]
+
+def generate_transactions(n_rows: int, n_markets: int = len(MARKETS),
+                          n_categories: int = len(CATEGORIES), months: int = 48,
+                          start: str = "2011-01-01", seed: int = 0,
+                          first_order: int = 0) -> pd.DataFrame:
+    """
+    Generate one block of raw transactions.
+
+    Args:
+        n_rows: Rows to generate
+        n_markets: Distinct markets (regions, countries and states scale with it)
+        n_categories: Distinct categories (sub-categories and products scale with it)
+        months: Length of the order date range in months
+        start: First order date
+        seed: Random seed
+        first_order: Number of the first order id, so blocks do not collide
+
+    Returns:
+        DataFrame with the raw Superstore columns, dates as day-first strings
+    """
+    rng = np.random.default_rng(seed)
+    markets = np.array(_names(MARKETS, "Market", n_markets), dtype=object)
+    categories = np.array(_names(CATEGORIES, "Category", n_categories), dtype=object)
+
+    market = rng.integers(0, n_markets, n_rows)
+    region = market * REGIONS_PER_MARKET + rng.integers(0, REGIONS_PER_MARKET, n_rows)
+    country = region * COUNTRIES_PER_REGION + rng.integers(0, COUNTRIES_PER_REGION, n_rows)
+    category = rng.integers(0, n_categories, n_rows)
+    sub_category = category * SUB_CATEGORIES_PER_CATEGORY + rng.integers(0, SUB_CATEGORIES_PER_CATEGORY, n_rows)
+    product = sub_category * PRODUCTS_PER_SUB_CATEGORY + rng.integers(0, PRODUCTS_PER_SUB_CATEGORY, n_rows)
+
+    # Later months get more orders (trend); the day within the month is uniform
+    month = np.minimum((months * np.sqrt(rng.random(n_rows))).astype(int), months - 1)
+    order_month = (np.datetime64(start, "M") + month).astype("datetime64[D]")
+    order_date = order_month + rng.integers(0, 28, n_rows).astype("timedelta64[D]")
+    ship_date = order_date + rng.integers(0, 7, n_rows).astype("timedelta64[D]")
+
+    # Yearly seasonality peaking in November, scaled per market and category
+    calendar_month = month % 12
+    season = 1.0 + 0.35 * np.cos(2 * np.pi * (calendar_month - 10) / 12)
+    level = 0.6 + 0.8 * ((market * 7 + category * 3) % 5) / 4
+    quantity = rng.integers(1, 10, n_rows)
+    discount = rng.choice([0.0, 0.0, 0.1, 0.2, 0.5], n_rows)
+    sales = np.round(rng.lognormal(4.5, 1.0, n_rows) * season * level * quantity / 3, 2)
+    profit = np.round(sales * rng.normal(0.12, 0.15, n_rows) - discount * sales * 0.5, 3)
+
+    regions = np.array([f"{name} Region {i + 1}" for name in markets
+                        for i in range(REGIONS_PER_MARKET)], dtype=object)
+    sub_categories = np.array([f"{name} {i + 1}" for name in categories
+                               for i in range(SUB_CATEGORIES_PER_CATEGORY)], dtype=object)
+    n_countries = n_markets * REGIONS_PER_MARKET * COUNTRIES_PER_REGION
+    n_products = n_categories * SUB_CATEGORIES_PER_CATEGORY * PRODUCTS_PER_SUB_CATEGORY
+    first_day = np.datetime64(start, "M").astype("datetime64[D]")
+
+    orders = first_order + np.arange(n_rows) // 2  # about two lines per order
+    frame = pd.DataFrame({
+        "order_id": "ORD-" + pd.Series(orders).astype(str),
+        "order_date": _formatted_dates(order_date, first_day),
+        "ship_date": _formatted_dates(ship_date, first_day),
+        "ship_mode": np.array(SHIP_MODES, dtype=object)[rng.integers(0, len(SHIP_MODES), n_rows)],
+        "customer_name": _labels("Customer ", CUSTOMERS)[rng.integers(0, CUSTOMERS, n_rows)],
+        "segment": np.array(SEGMENTS, dtype=object)[rng.integers(0, len(SEGMENTS), n_rows)],
+        "state": _labels("State ", n_countries * 4)[country * 4 + rng.integers(0, 4, n_rows)],
+        "country": _labels("Country ", n_countries)[country],
+        "market": markets[market],
+        "region": regions[region],
+        "product_id": _labels("PRD-", n_products)[product],
+        "category": categories[category],
+        "sub_category": sub_categories[sub_category],
+        "product_name": _labels("Product ", n_products)[product],
+        "sales": sales,
+        "quantity": quantity,
+        "discount": discount,
+        "profit": profit,
+        "shipping_cost": np.round(sales * rng.uniform(0.02, 0.12, n_rows), 2),
+        "order_priority": np.array(PRIORITIES, dtype=object)[rng.integers(0, len(PRIORITIES), n_rows)],
+        "year": pd.DatetimeIndex(order_date).year
+    }, columns=COLUMNS)
+
+    # Invalid rows: zero sales or a missing order date
+    invalid = rng.random(n_rows) < INVALID_SHARE
+    zero_sales = invalid & (rng.random(n_rows) < 0.5)
+    frame.loc[zero_sales, "sales"] = 0.0
+    frame.loc[invalid & ~zero_sales, "order_date"] = ""
+
+    # Repeated order lines: a copy of the previous row
+    rows = np.arange(n_rows)
+    repeated = np.flatnonzero(rng.random(n_rows) < DUPLICATE_SHARE)
+    repeated = repeated[repeated > 0]
+    rows[repeated] = repeated - 1
+    return frame.take(rows).reset_index(drop=True)
+
+def write_superstore_csv(path: Path, n_rows: int, n_markets: int = len(MARKETS),
+                         n_categories: int = len(CATEGORIES), months: int = 48,
+                         seed: int = 0, chunk_rows: int = 1_000_000) -> Path:
+    """
+    Write a synthetic raw sales file in chunks.
+
+    Args:
+        path: Output CSV file
+        n_rows: Total rows
+        n_markets: Distinct markets
+        n_categories: Distinct categories
+        months: Length of the order date range in months
+        seed: Random seed (each chunk uses seed + chunk number)
+        chunk_rows: Rows generated and written at a time
+
+    Returns:
+        Path of the written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with open(path, "w", newline="") as f:
+        while written < n_rows:
+            rows = min(chunk_rows, n_rows - written)
+            chunk = generate_transactions(rows, n_markets, n_categories, months,
+                                          seed=seed + written // chunk_rows,
+                                          first_order=written)
+            chunk.to_csv(f, index=False, header=written == 0)
+            written += rows
+    return path
+
+def _row_count(value: str) -> int:
+    """Parse row counts such as 100000, 1e6 or 2.5e7."""
+    count = int(float(value))
+    if count < 1:
+        raise argparse.ArgumentTypeError("row count must be positive")
+    return count
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Superstore-shaped sales file")
+    parser.add_argument("--rows", type=_row_count, default=100_000, help="Rows to write (e.g. 1e6)")
+    parser.add_argument("--markets", type=int, default=len(MARKETS), help="Distinct markets")
+    parser.add_argument("--categories", type=int, default=len(CATEGORIES), help="Distinct categories")
+    parser.add_argument("--months", type=int, default=48, help="Months of order history")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", type=Path, required=True, help="CSV file to write")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    write_superstore_csv(args.output, args.rows, args.markets, args.categories, args.months, args.seed)
+    print(f"Wrote {args.rows:,} rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
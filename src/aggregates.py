@@ -0,0 +1,129 @@
+"""
+Monthly Sales Aggregates
+
+Single place where the cleaned transaction table is rolled up to monthly
+totals. The monthly series is computed once per version of the cleaned
+data and persisted under data/processed/aggregates/, keyed by a content
+hash of the cleaned file, so every stage loads it in milliseconds instead
+of re-reading and re-aggregating all transactions.
+
+Usage:
+    from aggregates import load_monthly_sales
+    sales = load_monthly_sales()
+"""
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from config import CLEANED_SALES_FILE, AGGREGATES_DIR, DIGEST_CACHE_FILE
+from fingerprint import file_digest
+from sales_store import load_cleaned_sales, parquet_path_for
+
+# In-process memo: (data digest, value column) -> monthly series
+_MEMO = {}
+
+def aggregate_monthly(df: pd.DataFrame, value: str = "sales",
+                      date_column: str = "order_date") -> pd.Series:
+    """
+    Aggregate transactions to monthly totals.
+    
+    Args:
+        df: DataFrame with a datetime column and a numeric value column
+        value: Column to sum
+        date_column: Datetime column to group by month
+    
+    Returns:
+        Series of monthly totals indexed by month-end date
+    """
+    return (
+        df.set_index(date_column)
+          .resample("M")[value]
+          .sum()
+    )
+
+def cleaned_data_digest(path: Path = CLEANED_SALES_FILE,
+                        cache_dir: Path = AGGREGATES_DIR) -> str:
+    """
+    Return the content hash of the cleaned data.
+    
+    Args:
+        path: Path to the cleaned CSV file
+        cache_dir: Directory holding the digest index
+    
+    Returns:
+        Hex digest of the CSV, or of the Parquet copy if only that exists
+    
+    Raises:
+        FileNotFoundError: If no cleaned data exists
+    """
+    path = Path(path)
+    if not path.exists():
+        parquet_path = parquet_path_for(path)
+        if not parquet_path.exists():
+            raise FileNotFoundError(
+                f"Cleaned data not found: {path}\n"
+                f"Please run data_cleaning.py first"
+            )
+        path = parquet_path
+    return file_digest(path, cache_dir / DIGEST_CACHE_FILE.name)
+
+def _aggregate_file(cache_dir: Path, value: str, digest: str) -> Path:
+    """Return the path of a persisted monthly aggregate."""
+    return cache_dir / f"monthly_{value}_{digest[:16]}.csv"
+
+def _read_aggregate(path: Path, value: str) -> pd.Series:
+    """Read a persisted monthly aggregate back into a series."""
+    series = pd.read_csv(path, index_col=0, parse_dates=True)[value]
+    return series.asfreq("M")
+
+def _write_aggregate(series: pd.Series, path: Path, value: str) -> None:
+    """
+    Persist a monthly aggregate, removing older versions.
+
+    Stages run concurrently by pipeline.py may write the same aggregate,
+    so the file is written under a temporary name and renamed into place.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for stale in path.parent.glob(f"monthly_{value}_*.csv"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    series.to_csv(tmp_path)
+    tmp_path.replace(path)
+
+def load_monthly_sales(value: str = "sales", path: Path = CLEANED_SALES_FILE,
+                       cache_dir: Path = AGGREGATES_DIR) -> pd.Series:
+    """
+    Load the monthly aggregate of a value column from the cleaned data.
+    
+    Looks in the in-process memo first, then in the persisted aggregate
+    for the current data hash, and only aggregates the transaction table
+    when neither exists.
+    
+    Args:
+        value: Column to sum per month
+        path: Path to the cleaned CSV file
+        cache_dir: Directory holding persisted aggregates
+    
+    Returns:
+        Series of monthly totals indexed by month-end date
+    
+    Raises:
+        FileNotFoundError: If no cleaned data exists
+    """
+    digest = cleaned_data_digest(path, cache_dir)
+    memo_key = (digest, value, str(cache_dir))
+    if memo_key in _MEMO:
+        return _MEMO[memo_key].copy()
+
+    aggregate_path = _aggregate_file(cache_dir, value, digest)
+    if aggregate_path.exists():
+        series = _read_aggregate(aggregate_path, value)
+    else:
+        df = load_cleaned_sales(columns=["order_date", value], path=path)
+        series = aggregate_monthly(df, value)
+        _write_aggregate(series, aggregate_path, value)
+
+    _MEMO[memo_key] = series
+    return series.copy()
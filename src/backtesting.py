@@ -0,0 +1,286 @@
+"""
+Rolling-Origin Backtesting
+
+Evaluates a SARIMA specification on several forecast origins instead of a
+single train/test split. Each fold trains on the data up to its origin
+(an expanding window from the start, or a sliding window of fixed
+length) and forecasts the next `horizon` months.
+
+By default the model is fitted once, at the first origin, and later
+origins reuse its parameters: with an expanding window the state-space
+filter is extended by the months added since the previous origin, with a
+sliding window the parameters are applied to the new window. Neither
+re-estimates anything, so a fold costs a few milliseconds. With
+refit=True every fold is fitted from scratch and folds run in parallel.
+
+Usage:
+    from backtesting import backtest, fold_metrics, aggregate_metrics
+    forecasts = backtest(series, (1, 1, 1), (1, 1, 1, 12))
+    folds = fold_metrics(forecasts)
+"""
+import warnings
+from concurrent.futures import as_completed
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    SARIMA_ORDER,
+    SARIMA_SEASONAL_ORDER,
+    ENFORCE_STATIONARITY,
+    ENFORCE_INVERTIBILITY,
+    TEST_SIZE,
+    BACKTEST_FOLDS,
+    BACKTEST_STEP,
+    BACKTEST_WINDOW,
+    BACKTEST_WINDOW_SIZE,
+    BACKTEST_REFIT
+)
+from parallel import resolve_n_jobs, process_pool
+
+METRIC_COLUMNS = ["mae", "rmse", "mape"]
+
+def rolling_origins(n_obs: int, horizon: int = TEST_SIZE, n_folds: int = BACKTEST_FOLDS,
+                    step: int = BACKTEST_STEP, window: str = BACKTEST_WINDOW,
+                    window_size: int = BACKTEST_WINDOW_SIZE,
+                    min_train: int = 24) -> List[Tuple[int, int, int]]:
+    """
+    Compute the training and test ranges of every fold.
+
+    The last fold's test period ends with the data; earlier origins are
+    `step` months apart.
+
+    Args:
+        n_obs: Length of the series
+        horizon: Months forecast from each origin
+        n_folds: Number of origins
+        step: Months between consecutive origins
+        window: 'expanding' or 'sliding'
+        window_size: Training months per fold for sliding windows
+        min_train: Minimum training months of the first fold
+
+    Returns:
+        List of (train_start, train_end, test_end) positions
+
+    Raises:
+        ValueError: If the series is too short for the requested folds
+    """
+    if window not in ("expanding", "sliding"):
+        raise ValueError(f"Unknown window type: {window}")
+
+    first_end = n_obs - horizon - (n_folds - 1) * step
+    if window == "sliding":
+        first_start = first_end - window_size
+        if first_start < 0:
+            raise ValueError(
+                f"Need {window_size + horizon + (n_folds - 1) * step} months for "
+                f"{n_folds} sliding folds, got {n_obs}"
+            )
+    if first_end < min_train:
+        raise ValueError(
+            f"First fold would train on {first_end} months (need {min_train}); "
+            f"use fewer folds or a shorter horizon"
+        )
+
+    origins = []
+    for k in range(n_folds):
+        train_end = first_end + k * step
+        train_start = train_end - window_size if window == "sliding" else 0
+        origins.append((train_start, train_end, train_end + horizon))
+    return origins
+
+def _fit(series: pd.Series, order, seasonal_order, fit_options: Dict = None):
+    """Fit one SARIMA model quietly."""
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    fit_options = dict(fit_options or {})
+    model = SARIMAX(
+        series,
+        order=order,
+        seasonal_order=seasonal_order,
+        enforce_stationarity=fit_options.pop('enforce_stationarity', ENFORCE_STATIONARITY),
+        enforce_invertibility=fit_options.pop('enforce_invertibility', ENFORCE_INVERTIBILITY)
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return model.fit(disp=False, **fit_options)
+
+def _fold_frame(fold: int, series: pd.Series, train_end: int, test_end: int,
+                predicted: np.ndarray) -> pd.DataFrame:
+    """Forecast rows of one fold."""
+    test = series.iloc[train_end:test_end]
+    return pd.DataFrame({
+        'fold': fold,
+        'origin': series.index[train_end - 1],
+        'date': test.index,
+        'step': np.arange(1, len(test) + 1),
+        'actual': test.to_numpy(),
+        'predicted': np.asarray(predicted)[:len(test)]
+    })
+
+def _refit_fold(series, fold, origin, order, seasonal_order, fit_options):
+    """Fit a fold from scratch and forecast its test period."""
+    train_start, train_end, test_end = origin
+    results = _fit(series.iloc[train_start:train_end], order, seasonal_order, fit_options)
+    predicted = results.get_forecast(test_end - train_end).predicted_mean
+    return _fold_frame(fold, series, train_end, test_end, predicted)
+
+def backtest(series: pd.Series, order=SARIMA_ORDER, seasonal_order=SARIMA_SEASONAL_ORDER,
+             horizon: int = TEST_SIZE, n_folds: int = BACKTEST_FOLDS, step: int = BACKTEST_STEP,
+             window: str = BACKTEST_WINDOW, window_size: int = BACKTEST_WINDOW_SIZE,
+             refit: bool = BACKTEST_REFIT, n_jobs: int = 1,
+             fit_options: Dict = None) -> pd.DataFrame:
+    """
+    Forecast the series from every rolling origin.
+
+    Args:
+        series: Monthly series with a DatetimeIndex
+        order: (p, d, q)
+        seasonal_order: (P, D, Q, m)
+        horizon: Months forecast from each origin
+        n_folds: Number of origins
+        step: Months between consecutive origins
+        window: 'expanding' or 'sliding'
+        window_size: Training months per fold for sliding windows
+        refit: Re-estimate the model at every origin
+        n_jobs: Worker processes for refitted folds (1 = sequential)
+        fit_options: Extra SARIMAX/fit keyword arguments
+
+    Returns:
+        Long DataFrame with fold, origin, date, step, actual and predicted
+    """
+    origins = rolling_origins(len(series), horizon, n_folds, step, window, window_size)
+
+    if refit:
+        n_jobs = min(resolve_n_jobs(n_jobs), len(origins))
+        if n_jobs == 1:
+            frames = [
+                _refit_fold(series, fold, origin, order, seasonal_order, fit_options)
+                for fold, origin in enumerate(origins)
+            ]
+        else:
+            with process_pool(n_jobs) as executor:
+                futures = [
+                    executor.submit(_refit_fold, series, fold, origin, order, seasonal_order, fit_options)
+                    for fold, origin in enumerate(origins)
+                ]
+                frames = [future.result() for future in futures]
+        return pd.concat(frames, ignore_index=True)
+
+    train_start, train_end, _ = origins[0]
+    results = _fit(series.iloc[train_start:train_end], order, seasonal_order, fit_options)
+    previous_end = train_end
+
+    frames = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for fold, (train_start, train_end, test_end) in enumerate(origins):
+            if fold > 0:
+                if window == "expanding":
+                    results = results.extend(series.iloc[previous_end:train_end])
+                else:
+                    results = results.apply(series.iloc[train_start:train_end])
+                previous_end = train_end
+            predicted = results.get_forecast(test_end - train_end).predicted_mean
+            frames.append(_fold_frame(fold, series, train_end, test_end, predicted))
+    return pd.concat(frames, ignore_index=True)
+
+def forecast_metrics(actual, predicted) -> Dict[str, float]:
+    """
+    Compute MAE, RMSE and MAPE of a forecast.
+
+    MAPE skips periods where the actual value is zero.
+
+    Args:
+        actual: Observed values
+        predicted: Forecast values
+
+    Returns:
+        Dictionary with 'mae', 'rmse' and 'mape' (in percent)
+    """
+    actual = np.asarray(actual, dtype=float)
+    error = actual - np.asarray(predicted, dtype=float)
+    nonzero = actual != 0
+    return {
+        'mae': float(np.mean(np.abs(error))),
+        'rmse': float(np.sqrt(np.mean(error ** 2))),
+        'mape': float(np.mean(np.abs(error[nonzero] / actual[nonzero])) * 100) if nonzero.any() else np.nan
+    }
+
+def fold_metrics(forecasts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute MAE, RMSE and MAPE for every fold.
+
+    Args:
+        forecasts: Output of backtest()
+
+    Returns:
+        DataFrame indexed by fold with origin, n_test and the metrics
+    """
+    error = forecasts['actual'] - forecasts['predicted']
+    actual = forecasts['actual'].where(forecasts['actual'] != 0)
+    grouped = forecasts.assign(
+        abs_error=error.abs(),
+        sq_error=error ** 2,
+        pct_error=(error / actual).abs() * 100
+    ).groupby('fold')
+    return pd.DataFrame({
+        'origin': grouped['origin'].first(),
+        'n_test': grouped.size(),
+        'mae': grouped['abs_error'].mean(),
+        'rmse': np.sqrt(grouped['sq_error'].mean()),
+        'mape': grouped['pct_error'].mean()
+    })
+
+def aggregate_metrics(folds: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarize fold metrics across folds.
+
+    Args:
+        folds: Output of fold_metrics()
+
+    Returns:
+        DataFrame with mean, std, min and max of each metric
+    """
+    return folds[METRIC_COLUMNS].agg(['mean', 'std', 'min', 'max'])
+
+def _backtest_candidate(series, order, seasonal_order, options):
+    """Backtest one candidate and return its mean fold metrics."""
+    record = {'order': order, 'seasonal_order': seasonal_order, 'status': 'ok', 'error': None}
+    try:
+        folds = fold_metrics(backtest(series, order, seasonal_order, n_jobs=1, **options))
+        record.update(folds[METRIC_COLUMNS].mean().to_dict())
+    except Exception as e:
+        record.update({metric: np.nan for metric in METRIC_COLUMNS})
+        record.update(status='failed', error=f"{type(e).__name__}: {e}")
+    return record
+
+def backtest_candidates(series: pd.Series, candidates: Sequence[Tuple], n_jobs: int = 1,
+                        **options) -> pd.DataFrame:
+    """
+    Backtest many (order, seasonal_order) candidates across a process pool.
+
+    Args:
+        series: Monthly series
+        candidates: List of (order, seasonal_order) pairs
+        n_jobs: Worker processes (1 = sequential, -1 = all cores)
+        **options: Keyword arguments for backtest()
+
+    Returns:
+        DataFrame with one row per candidate, in input order, holding the
+        mean fold MAE, RMSE and MAPE and a status/error column
+    """
+    n_jobs = min(resolve_n_jobs(n_jobs), max(len(candidates), 1))
+    if n_jobs == 1:
+        records = [_backtest_candidate(series, *candidate, options) for candidate in candidates]
+    else:
+        with process_pool(n_jobs) as executor:
+            futures = {
+                executor.submit(_backtest_candidate, series, *candidate, options): i
+                for i, candidate in enumerate(candidates)
+            }
+            records = [None] * len(candidates)
+            for future in as_completed(futures):
+                records[futures[future]] = future.result()
+    return pd.DataFrame(records)
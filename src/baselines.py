@@ -0,0 +1,283 @@
+"""
+Vectorized Baseline Forecasts
+
+Simple forecasting methods applied to many monthly series at once. Each
+method takes a 2-D array of shape (n_series, n_months) and returns
+forecasts of shape (n_series, horizon); the recursions of the smoothing
+methods run over months only, with all series (and all candidate
+smoothing parameters) updated together in NumPy.
+
+Methods: naive, seasonal_naive, drift, moving_average, ses (simple
+exponential smoothing) and holt_winters (additive trend and season).
+Smoothing parameters are picked per series from SMOOTHING_GRID by
+in-sample one-step squared error.
+
+The stage forecasts every hierarchy node and scores each method on the
+last TEST_SIZE months, so SARIMA can be reserved for the series where
+the baselines fall short.
+
+Usage:
+    python src/baselines.py
+    python src/baselines.py --bottom
+"""
+import argparse
+import sys
+from itertools import product
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    FORECAST_HORIZON,
+    TEST_SIZE,
+    HIERARCHY_LEVELS,
+    BASELINE_METHODS,
+    MOVING_AVERAGE_WINDOW,
+    SMOOTHING_GRID,
+    BASELINE_FORECAST_FILE,
+    BASELINE_SCORES_FILE,
+    ensure_directories
+)
+from logger import setup_logger, log_section, log_success, log_error, span, profile_run
+from hierarchy import load_hierarchy_series, bottom_level_series, level_columns, node_id
+from sales_store import load_cleaned_sales
+
+logger = setup_logger(__name__)
+
+def naive(Y: np.ndarray, steps: int) -> np.ndarray:
+    """Repeat the last observation."""
+    return np.repeat(Y[:, -1:], steps, axis=1)
+
+def seasonal_naive(Y: np.ndarray, steps: int, m: int = 12) -> np.ndarray:
+    """Repeat the last observed season."""
+    last_season = Y[:, -m:]
+    return np.tile(last_season, int(np.ceil(steps / m)))[:, :steps]
+
+def drift(Y: np.ndarray, steps: int) -> np.ndarray:
+    """Extend the line through the first and last observation."""
+    slope = (Y[:, -1] - Y[:, 0]) / max(Y.shape[1] - 1, 1)
+    return Y[:, -1:] + slope[:, None] * np.arange(1, steps + 1)
+
+def moving_average(Y: np.ndarray, steps: int, window: int = MOVING_AVERAGE_WINDOW) -> np.ndarray:
+    """Repeat the mean of the last `window` observations."""
+    return np.repeat(Y[:, -window:].mean(axis=1, keepdims=True), steps, axis=1)
+
+def _pick(values: np.ndarray, sse: np.ndarray) -> np.ndarray:
+    """Select, per series, the entry of a (n_params, n_series, ...) array with the lowest SSE."""
+    best = sse.argmin(axis=0)
+    return values[best, np.arange(values.shape[1])]
+
+def ses(Y: np.ndarray, steps: int, grid: Sequence[float] = SMOOTHING_GRID) -> np.ndarray:
+    """
+    Simple exponential smoothing with alpha chosen per series.
+
+    Args:
+        Y: Array of shape (n_series, n_months)
+        steps: Forecast horizon
+        grid: Candidate values of alpha
+
+    Returns:
+        Flat forecasts of shape (n_series, steps)
+    """
+    alpha = np.asarray(grid, dtype=float)[:, None]
+    level = np.repeat(Y[None, :, 0], len(alpha), axis=0)
+    sse = np.zeros_like(level)
+    for t in range(1, Y.shape[1]):
+        error = Y[:, t] - level
+        sse += error ** 2
+        level = level + alpha * error
+    return np.repeat(_pick(level, sse)[:, None], steps, axis=1)
+
+def holt_winters(Y: np.ndarray, steps: int, m: int = 12,
+                 grid: Sequence[float] = SMOOTHING_GRID) -> np.ndarray:
+    """
+    Additive Holt-Winters with (alpha, beta, gamma) chosen per series.
+
+    States start from the first two seasons: the trend is the average
+    change between the two season means, and the level and seasonal terms
+    are placed so that the first season is its mean plus the trend line
+    plus the seasonal deviations.
+
+    Args:
+        Y: Array of shape (n_series, n_months), at least 2 * m months
+        steps: Forecast horizon
+        m: Season length
+        grid: Candidate values for each smoothing parameter
+
+    Returns:
+        Forecasts of shape (n_series, steps)
+
+    Raises:
+        ValueError: If fewer than two seasons are available
+    """
+    n_series, n_months = Y.shape
+    if n_months < 2 * m:
+        raise ValueError(f"Holt-Winters needs at least {2 * m} months, got {n_months}")
+
+    params = np.array(list(product(grid, grid, grid)))
+    alpha, beta, gamma = (params[:, i][:, None] for i in range(3))
+    k = len(params)
+
+    first = Y[:, :m].mean(axis=1)
+    slope = (Y[:, m:2 * m].mean(axis=1) - first) / m
+    trend_line = first[:, None] + slope[:, None] * (np.arange(m) - (m - 1) / 2)
+    level = np.repeat((first - slope * (m + 1) / 2)[None], k, axis=0)
+    trend = np.repeat(slope[None], k, axis=0)
+    # Season-major layout keeps each month's (k, n_series) slice contiguous
+    season = np.repeat((Y[:, :m] - trend_line).T[:, None], k, axis=1)
+    sse = np.zeros((k, n_series))
+
+    # Error-correction form of the usual update equations
+    for t in range(n_months):
+        s = season[t % m]
+        deseasonalized = Y[:, t] - s
+        expected = level + trend
+        error = deseasonalized - expected
+        sse += error * error
+        new_level = expected + alpha * error
+        trend += beta * (new_level - expected)
+        s += gamma * (deseasonalized - new_level)
+        level = new_level
+
+    best = (sse.argmin(axis=0), np.arange(n_series))
+    level, trend, season = level[best], trend[best], season[:, best[0], best[1]]
+    h = np.arange(1, steps + 1)
+    return level[:, None] + trend[:, None] * h + season[(n_months + h - 1) % m].T
+
+def batch_forecast(Y: np.ndarray, steps: int = FORECAST_HORIZON,
+                   methods: Sequence[str] = BASELINE_METHODS, m: int = 12) -> Dict[str, np.ndarray]:
+    """
+    Forecast every series with every requested baseline.
+
+    Args:
+        Y: Array of shape (n_series, n_months)
+        steps: Forecast horizon
+        methods: Names from BASELINE_METHODS
+        m: Season length
+
+    Returns:
+        Dictionary of method -> forecasts of shape (n_series, steps);
+        holt_winters is all NaN when there are fewer than two seasons
+
+    Raises:
+        ValueError: For an unknown method
+    """
+    Y = np.asarray(Y, dtype=float)
+    unavailable = np.full((Y.shape[0], steps), np.nan)
+    functions = {
+        'naive': lambda: naive(Y, steps),
+        'seasonal_naive': lambda: seasonal_naive(Y, steps, m),
+        'drift': lambda: drift(Y, steps),
+        'moving_average': lambda: moving_average(Y, steps),
+        'ses': lambda: ses(Y, steps),
+        'holt_winters': lambda: holt_winters(Y, steps, m) if Y.shape[1] >= 2 * m else unavailable
+    }
+    unknown = set(methods) - set(functions)
+    if unknown:
+        raise ValueError(f"Unknown baseline method(s): {sorted(unknown)}")
+    return {method: functions[method]() for method in methods}
+
+def evaluate_baselines(Y: np.ndarray, holdout: int = TEST_SIZE,
+                       methods: Sequence[str] = BASELINE_METHODS, m: int = 12) -> Dict[str, np.ndarray]:
+    """
+    Score each baseline on the last `holdout` months of every series.
+
+    Args:
+        Y: Array of shape (n_series, n_months)
+        holdout: Months held out for scoring
+        methods: Names from BASELINE_METHODS
+        m: Season length
+
+    Returns:
+        Dictionary of method -> MAE per series
+    """
+    Y = np.asarray(Y, dtype=float)
+    train, test = Y[:, :-holdout], Y[:, -holdout:]
+    forecasts = batch_forecast(train, holdout, methods, m)
+    return {method: np.abs(test - forecast).mean(axis=1) for method, forecast in forecasts.items()}
+
+def forecasts_to_frame(forecasts: Dict[str, np.ndarray], series_ids: Sequence[str],
+                       dates: pd.DatetimeIndex) -> pd.DataFrame:
+    """Reshape method -> (n_series, steps) arrays into a long table."""
+    frames = [
+        pd.DataFrame({
+            'series': np.repeat(series_ids, len(dates)),
+            'method': method,
+            'date': np.tile(dates, len(series_ids)),
+            'forecast': values.ravel()
+        })
+        for method, values in forecasts.items()
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+def scores_to_frame(scores: Dict[str, np.ndarray], series_ids: Sequence[str]) -> pd.DataFrame:
+    """Tabulate holdout MAE per series and method with the best method per series."""
+    table = pd.DataFrame(scores, index=pd.Index(series_ids, name='series'))
+    table['best_method'] = table.idxmin(axis=1)
+    table['best_mae'] = table.min(axis=1, numeric_only=True)
+    return table
+
+def load_series(include_bottom: bool = False) -> pd.DataFrame:
+    """
+    Load the monthly series to forecast, one column per series.
+
+    Args:
+        include_bottom: Also include every bottom-level combination
+
+    Returns:
+        Frame of months x series
+    """
+    wide = load_hierarchy_series()
+    if include_bottom:
+        columns = ["order_date", "sales"] + level_columns(HIERARCHY_LEVELS)
+        bottom = bottom_level_series(load_cleaned_sales(columns=columns), HIERARCHY_LEVELS)
+        all_columns = tuple(level_columns(HIERARCHY_LEVELS))
+        bottom.columns = [node_id(all_columns, key) for key in bottom.columns]
+        wide = pd.concat([wide, bottom.loc[:, ~bottom.columns.isin(wide.columns)]], axis=1)
+    return wide
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Vectorized baseline forecasts for many series")
+    parser.add_argument(
+        "--bottom", action="store_true",
+        help="Also forecast every bottom-level combination of the hierarchy columns"
+    )
+    return parser.parse_args(argv)
+
+@profile_run("baselines")
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        log_section(logger, "BASELINE FORECASTS")
+        ensure_directories()
+
+        with span("load series"):
+            wide = load_series(include_bottom=args.bottom)
+        Y = wide.to_numpy(dtype=float).T
+        log_success(logger, f"Loaded {Y.shape[0]} series of {Y.shape[1]} months")
+
+        with span("forecast"):
+            forecasts = batch_forecast(Y, FORECAST_HORIZON)
+        dates = pd.date_range(wide.index[-1], periods=FORECAST_HORIZON + 1, freq="M")[1:]
+        forecasts_to_frame(forecasts, list(wide.columns), dates).to_csv(BASELINE_FORECAST_FILE, index=False)
+        log_success(logger, f"Baseline forecasts saved to {BASELINE_FORECAST_FILE}")
+
+        with span("evaluate"):
+            scores = scores_to_frame(evaluate_baselines(Y, TEST_SIZE), list(wide.columns))
+        scores.to_csv(BASELINE_SCORES_FILE)
+        log_success(logger, f"Holdout scores saved to {BASELINE_SCORES_FILE}")
+
+        logger.info("\nBest baseline by number of series:")
+        for method, count in scores['best_method'].value_counts().items():
+            logger.info(f"  {method:<15} {count}")
+
+        log_section(logger, "BASELINES COMPLETED SUCCESSFULLY")
+
+    except Exception as e:
+        log_error(logger, f"Baseline forecasting failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -14,28 +14,32 @@ PROCESSED_DATA_DIR = DATA_DIR / "processed"
 RESULTS_DIR = PROJECT_ROOT / "results"
 MODELS_DIR = PROJECT_ROOT / "models"
 
-# Ensure directories exist
-PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
-RESULTS_DIR.mkdir(parents=True, exist_ok=True)
-MODELS_DIR.mkdir(parents=True, exist_ok=True)
-
 # ============================================
 # DATA FILES
 # ============================================
 RAW_SALES_FILE = RAW_DATA_DIR / "superstore_sales.csv"
 CLEANED_SALES_FILE = PROCESSED_DATA_DIR / "superstore_sales_cleaned.csv"
+CLEANED_SALES_PARQUET = PROCESSED_DATA_DIR / "superstore_sales_cleaned.parquet"
 FORECAST_OUTPUT_FILE = PROCESSED_DATA_DIR / "sales_forecast_12_months.csv"
+AGGREGATES_DIR = PROCESSED_DATA_DIR / "aggregates"  # monthly series keyed by data hash
+DIGEST_CACHE_FILE = AGGREGATES_DIR / "file_digests.json"
 
 # ============================================
 # MODEL FILES
 # ============================================
 SARIMA_MODEL_FILE = MODELS_DIR / "sarima_model.pkl"
+SARIMA_COMPACT_MODEL_FILE = MODELS_DIR / "sarima_model.npz"
 MODEL_METADATA_FILE = MODELS_DIR / "model_metadata.json"
+MODEL_FORMAT = "compact"  # "compact" (parameters + final state) or "pickle" (full results)
+COMPACT_MODEL_TAIL = 12  # observations kept in a compact artifact
 
 # ============================================
 # FORECASTING PARAMETERS
 # ============================================
 FORECAST_HORIZON = 12  # months
+FORECAST_ALPHA = 0.05  # significance level of the forecast intervals (0.05 = 95%)
+FORECAST_CACHE_DIR = PROCESSED_DATA_DIR / "forecast_cache"  # forecasts keyed by model/data hash
+FORECAST_CACHE_SIZE = 32  # cached forecasts kept (least recently used are evicted)
 TEST_SIZE = 12  # months for validation
 
 # ============================================
@@ -46,12 +50,113 @@ SARIMA_SEASONAL_ORDER = (1, 1, 1, 12)  # (P, D, Q, m)
 ENFORCE_STATIONARITY = False
 ENFORCE_INVERTIBILITY = False
 
+# ============================================
+# BACKTESTING
+# ============================================
+BACKTEST_FOLDS = 6  # rolling forecast origins, the last one ending with the data
+BACKTEST_STEP = 1  # months between consecutive origins
+BACKTEST_WINDOW = "expanding"  # "expanding" or "sliding" training window
+BACKTEST_WINDOW_SIZE = 36  # training months per fold for sliding windows
+BACKTEST_REFIT = False  # refit at every origin instead of reusing the first fit
+BACKTEST_N_JOBS = -1  # worker processes (-1 = all cores, 1 = sequential)
+BACKTEST_RESULTS_FILE = RESULTS_DIR / "backtest_folds.csv"
+
+# ============================================
+# HIERARCHICAL FORECASTING
+# ============================================
+# Each level is a tuple of grouping columns; () is the grand total
+HIERARCHY_LEVELS = [
+    (),
+    ("market",),
+    ("market", "region"),
+    ("category",),
+    ("category", "sub_category"),
+    ("segment",),
+]
+HIERARCHY_MODELS_DIR = MODELS_DIR / "hierarchy"  # one compact model per node
+HIERARCHY_MANIFEST_FILE = HIERARCHY_MODELS_DIR / "manifest.json"
+HIERARCHY_MIN_MONTHS = 24  # nodes with a shorter history are not fitted
+HIERARCHY_N_JOBS = -1  # worker processes (-1 = all cores, 1 = sequential)
+HIERARCHY_BATCH_SIZE = 16  # series sent to a worker per task
+# "bottom_up", "top_down", "ols", "wls_struct" or "wls_var" (MinT with diagonal covariance)
+RECONCILIATION_METHOD = "wls_var"
+RECONCILED_FORECAST_FILE = PROCESSED_DATA_DIR / "hierarchy_forecast_reconciled.csv"
+
+# ============================================
+# BASELINE MODELS
+# ============================================
+BASELINE_METHODS = ["naive", "seasonal_naive", "drift", "moving_average", "ses", "holt_winters"]
+MOVING_AVERAGE_WINDOW = 3  # months averaged by the moving-average baseline
+SMOOTHING_GRID = (0.05, 0.2, 0.4, 0.6, 0.8)  # candidate smoothing parameters, chosen per series
+BASELINE_FORECAST_FILE = PROCESSED_DATA_DIR / "baseline_forecasts.csv"
+BASELINE_SCORES_FILE = RESULTS_DIR / "baseline_scores.csv"
+
+# ============================================
+# PIPELINE RUNNER
+# ============================================
+PIPELINE_STATE_FILE = PROCESSED_DATA_DIR / "pipeline_state.json"  # stage keys and output digests of the last successful runs
+PIPELINE_N_JOBS = 2  # stages run at the same time once their inputs are ready
+
+# ============================================
+# FORECAST SERVICE
+# ============================================
+SERVICE_HOST = "127.0.0.1"  # local only; put a reverse proxy in front to expose it
+SERVICE_PORT = 8765
+SERVICE_WORKERS = 4  # threads running model computations
+SERVICE_MAX_HORIZON = 60  # months
+SERVICE_LOAD_HIERARCHY = True  # also serve the per-node models of train_hierarchy.py
+SERVICE_LATENCY_WINDOW = 1000  # recent requests per endpoint kept for latency percentiles
+SERVICE_DEFAULT_SERIES = "sales"  # key of the main model (models/sarima_model.*)
+SERVICE_BATCH_WINDOW_MS = 5  # requests arriving within this window are computed in one batch
+SERVICE_MAX_BATCH = 64  # requests that trigger a batch before the window ends
+
+# ============================================
+# HYPERPARAMETER TUNING
+# ============================================
+TUNING_N_JOBS = -1  # worker processes for grid search (-1 = all cores, 1 = sequential)
+TUNING_METHOD = "grid"  # "grid" (exhaustive) or "stepwise" (Hyndman-Khandakar)
+STEPWISE_MAX_ORDER = (5, 5, 2, 2)  # upper bounds for (p, q, P, Q) in stepwise search
+STEPWISE_MAX_STEPS = 50  # maximum number of improvement steps
+TUNING_AUTO_DIFF = True  # choose d and D with unit-root/seasonality tests before searching
+TUNING_MAXITER = 50  # optimizer iterations per candidate fit
+TUNING_WARM_START = False  # seed each fit with the parameters of the closest fitted nested model (faster, but can settle in a worse local optimum)
+TUNING_WARM_START_BASELINE = 5  # warm-started candidates refitted cold to measure the iterations saved (0 = only reuse cold fits already checkpointed)
+TUNING_FIT_TIMEOUT = 60  # seconds per candidate fit (None = no limit)
+TUNING_TIME_BUDGET = None  # seconds for the whole search (None = no limit)
+TUNING_BACKTEST_TOP = 0  # backtest the N best candidates on rolling origins (0 = off)
+TUNING_RESULTS_FILE = RESULTS_DIR / "hyperparameter_tuning_results.csv"
+TUNING_CHECKPOINT_FILE = RESULTS_DIR / "tuning_checkpoint.jsonl"  # append-only store of finished fits
+TUNING_RESUME = True  # reuse checkpointed fits from earlier runs
+
+# ============================================
+# DIFFERENCING ORDER SELECTION
+# ============================================
+UNIT_ROOT_ALPHA = 0.05  # significance level for KPSS/ADF tests
+UNIT_ROOT_TEST = "kpss"  # "kpss", "adf" or "both"
+SEASONAL_STRENGTH_THRESHOLD = 0.64  # seasonal differencing if STL strength exceeds this
+MAX_D = 2
+MAX_SEASONAL_D = 1
+
 # ============================================
 # DATA CLEANING PARAMETERS
 # ============================================
 NUMERIC_COLUMNS = ["sales", "profit", "shipping_cost"]
 DATE_COLUMNS = ["order_date", "ship_date"]
+# Explicit date formats, tried in order. The raw extract is day-first and
+# mixes "6/1/2011" and "13-01-2011"; ISO8601 covers already-cleaned files.
+DATE_FORMATS = ["%d/%m/%Y", "%d-%m-%Y", "ISO8601"]
 DUPLICATE_SUBSET = ["order_id", "product_id"]
+CLEANING_CHUNK_SIZE = 250_000  # rows per chunk in streaming mode (--stream)
+
+# ============================================
+# COLUMNAR STORAGE
+# ============================================
+# Low-cardinality text columns stored as dictionary-encoded categoricals
+CATEGORICAL_COLUMNS = [
+    "ship_mode", "segment", "state", "country", "market", "region",
+    "category", "sub_category", "order_priority"
+]
+PARQUET_COMPRESSION = "zstd"
 
 # ============================================
 # VISUALIZATION SETTINGS
@@ -64,7 +169,27 @@ PLOT_STYLE = "seaborn-v0_8-darkgrid"  # matplotlib style
 # LOGGING CONFIGURATION
 # ============================================
 LOG_DIR = PROJECT_ROOT / "logs"
-LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "sales_forecasting.log"
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_QUEUE = True  # write log records on a background thread instead of in the caller
+
+# ============================================
+# PROFILING
+# ============================================
+RUN_REPORT_DIR = RESULTS_DIR / "run_reports"  # JSON timing/memory report of each stage's last run
+PROFILE_TRACEMALLOC = False  # trace Python allocations per span (slows allocation-heavy code)
+PROFILE_TOP_ALLOCATIONS = 5  # allocation sites listed in the report when tracing
+
+# ============================================
+# OUTPUT DIRECTORIES
+# ============================================
+def ensure_directories():
+    """
+    Create the output directories the pipeline stages write to.
+
+    Called by each stage's main rather than at import time, so that
+    importing config (e.g. for --help) has no side effects on disk.
+    """
+    for directory in (PROCESSED_DATA_DIR, RESULTS_DIR, MODELS_DIR, LOG_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
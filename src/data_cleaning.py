@@ -10,18 +10,27 @@ This module handles the complete data cleaning workflow:
 
 Usage:
     python src/data_cleaning.py
+    python src/data_cleaning.py --stream --chunksize 500000
 """
+import argparse
+import numpy as np
 import pandas as pd
+from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple, Optional
 import sys
 from config import (
     RAW_SALES_FILE,
     CLEANED_SALES_FILE,
     NUMERIC_COLUMNS,
     DATE_COLUMNS,
-    DUPLICATE_SUBSET
+    DATE_FORMATS,
+    DUPLICATE_SUBSET,
+    CLEANING_CHUNK_SIZE,
+    ensure_directories
 )
-from logger import setup_logger, log_section, log_success, log_error, log_warning
+from logger import setup_logger, log_section, log_success, log_error, log_warning, span, profile_run
+from sales_store import save_cleaned_data, ChunkedSalesWriter
 
 logger = setup_logger(__name__)
 
@@ -80,6 +89,41 @@ def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
     )
     return df
 
+def parse_date_column(values: pd.Series, formats=None) -> pd.Series:
+    """
+    Parse a column of date strings using explicit formats.
+    
+    Each distinct string is parsed only once and the result is mapped
+    back to the rows, so the cost depends on the number of distinct dates
+    rather than the number of rows. Formats are tried in order; a value
+    matching none of them becomes NaT.
+    
+    Args:
+        values: Series of date strings
+        formats: Formats to try (defaults to config.DATE_FORMATS)
+    
+    Returns:
+        Series of datetime64 values aligned with the input
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if formats is None:
+        formats = DATE_FORMATS
+
+    codes, uniques = pd.factorize(values)
+    candidates = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=candidates.index, dtype="datetime64[ns]")
+
+    for fmt in formats:
+        pending = parsed.isna()
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(candidates[pending], format=fmt, errors="coerce")
+
+    # Code -1 (missing input) picks the trailing NaT
+    lookup = np.append(parsed.to_numpy(), np.datetime64("NaT", "ns"))
+    return pd.Series(lookup.take(codes), index=values.index, name=values.name)
+
 def parse_dates(df: pd.DataFrame) -> pd.DataFrame:
     """
     Convert date columns to datetime format.
@@ -90,8 +134,8 @@ def parse_dates(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with parsed datetime columns
     """
-    df["order_date"] = pd.to_datetime(df["order_date"], errors="coerce")
-    df["ship_date"] = pd.to_datetime(df["ship_date"], errors="coerce")
+    for col in DATE_COLUMNS:
+        df[col] = parse_date_column(df[col])
     return df
 
 def convert_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -117,7 +161,7 @@ def convert_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
-def clean_invalid_records(df: pd.DataFrame) -> pd.DataFrame:
+def clean_invalid_records(df: pd.DataFrame, report: "ValidationReport" = None) -> pd.DataFrame:
     """
     Remove invalid rows based on business rules.
     
@@ -128,22 +172,26 @@ def clean_invalid_records(df: pd.DataFrame) -> pd.DataFrame:
     
     Args:
         df: DataFrame with potentially invalid records
+        report: Result of validate_data/validation_report for this frame;
+            its keep mask is reused instead of scanning the frame again
     
     Returns:
         DataFrame with only valid records
+    
+    Raises:
+        ValueError: If the report was computed for a different frame
     """
+    if report is None:
+        report = validation_report(df)
+    elif len(report.keep_mask) != len(df):
+        raise ValueError(
+            f"Validation report covers {len(report.keep_mask)} rows, frame has {len(df)}"
+        )
+    elif not report.index.equals(df.index):
+        raise ValueError("Validation report was computed for a frame with a different index")
 
     initial_rows = len(df)
-
-    # Remove zero or negative sales
-    df = df[df["sales"] > 0]
-
-    # Remove missing order dates
-    df = df.dropna(subset=["order_date"])
-
-    # Remove true duplicates (same order + same product)
-    df = df.drop_duplicates(subset=DUPLICATE_SUBSET)
-
+    df = df[report.keep_mask]
     final_rows = len(df)
 
     logger.info("\n--- Cleaning Summary ---")
@@ -153,7 +201,118 @@ def clean_invalid_records(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
-def validate_data(df: pd.DataFrame) -> None:
+def _factorize(values: pd.Series):
+    """Integer codes and number of distinct values; NaN gets a code of its own, as in duplicated()."""
+    codes, uniques = pd.factorize(values)
+    codes = codes.astype(np.int64)
+    n_values = len(uniques)
+    missing = codes == -1
+    if missing.any():
+        codes[missing] = n_values
+        n_values += 1
+    return codes, n_values
+
+def _duplicate_key(df: pd.DataFrame, columns, codes: dict) -> np.ndarray:
+    """
+    One int64 code per distinct combination of the key columns.
+
+    Columns are factorized once (reusing codes already computed) and
+    combined pairwise. The running key is re-factorized before another
+    column is folded in, so it stays small however many columns there are.
+    """
+    key, n_keys = None, 0
+    for column in columns:
+        if column not in codes:
+            codes[column] = _factorize(df[column])
+        column_codes, n_values = codes[column]
+        if key is None:
+            key, n_keys = column_codes, n_values
+        else:
+            if n_keys * n_values > np.iinfo(np.int64).max:
+                key, n_keys = _factorize(key)
+            key, n_keys = key * n_values + column_codes, n_keys * n_values
+    return key
+
+class ValidationReport(NamedTuple):
+    """Validation counters and cleaning mask computed by validation_report."""
+    rows: int
+    negative_quantities: int
+    non_positive_sales: int
+    missing_order_dates: int
+    duplicate_order_ids: int
+    future_dates: int
+    min_date: Optional[pd.Timestamp]  # None without any order date
+    max_date: Optional[pd.Timestamp]
+    sales_mean: float
+    sales_std: float
+    outliers: int  # sales more than 3 std from the mean
+    duplicate_records: int  # valid rows repeating DUPLICATE_SUBSET
+    keep_mask: np.ndarray  # rows clean_invalid_records keeps
+    index: pd.Index  # index of the validated frame
+
+def validation_report(df: pd.DataFrame) -> ValidationReport:
+    """
+    Compute every validation check and the cleaning mask in one pass.
+
+    Each column is converted to a NumPy array once and all checks work on
+    those arrays, so the frame is not rescanned per check. order_id is
+    factorized once for both the duplicate order count and the duplicate
+    record key.
+
+    Args:
+        df: Standardized frame (parsed dates, numeric sales)
+
+    Returns:
+        ValidationReport whose keep_mask keeps rows with positive sales
+        and an order date, first occurrence of DUPLICATE_SUBSET among
+        those; the frame's index is kept to check the report against
+        the frame it is applied to
+    """
+    n_rows = len(df)
+    sales = df["sales"].to_numpy(dtype=np.float64, na_value=np.nan)
+    quantity = df["quantity"].to_numpy()
+    order_dates = df["order_date"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+    missing_dates = order_dates == np.iinfo(np.int64).min  # NaT
+    positive_sales = sales > 0
+    valid = positive_sales & ~missing_dates
+    today = np.datetime64(datetime.now(), "ns").astype(np.int64)
+
+    # Mean and std as pandas computes them (NaN skipped, ddof=1)
+    present = ~np.isnan(sales)
+    n_sales = int(present.sum())
+    sales_mean = float(np.nansum(sales) / n_sales) if n_sales else np.nan
+    deviation = sales - sales_mean
+    sales_std = (float(np.sqrt(np.nansum(deviation ** 2) / (n_sales - 1)))
+                 if n_sales > 1 else np.nan)
+
+    codes = {"order_id": _factorize(df["order_id"])}
+    n_orders = codes["order_id"][1]
+
+    # drop_duplicates runs after the other filters, so only valid rows count
+    key = _duplicate_key(df, DUPLICATE_SUBSET, codes)
+    duplicate_records = np.zeros(n_rows, dtype=bool)
+    duplicate_records[valid] = pd.Series(key[valid]).duplicated().to_numpy()
+
+    dated = order_dates[~missing_dates]
+    return ValidationReport(
+        rows=n_rows,
+        negative_quantities=int((quantity < 0).sum()),
+        non_positive_sales=int(n_sales - positive_sales.sum()),
+        missing_order_dates=int(missing_dates.sum()),
+        duplicate_order_ids=n_rows - n_orders,
+        future_dates=int((order_dates > today).sum()),
+        min_date=pd.Timestamp(dated.min()) if len(dated) else None,
+        max_date=pd.Timestamp(dated.max()) if len(dated) else None,
+        sales_mean=sales_mean,
+        sales_std=sales_std,
+        outliers=int((np.abs(deviation) > 3 * sales_std).sum()),
+        duplicate_records=int(duplicate_records.sum()),
+        keep_mask=valid & ~duplicate_records,
+        index=df.index
+    )
+
+def validate_data(df: pd.DataFrame) -> ValidationReport:
     """
     Run comprehensive data validation checks and log results.
     
@@ -167,92 +326,244 @@ def validate_data(df: pd.DataFrame) -> None:
     
     Args:
         df: DataFrame to validate
+    
+    Returns:
+        The validation report (see validation_report); pass it to
+        clean_invalid_records to filter without another scan
     """
+    report = validation_report(df)
     logger.info("\n--- Validation Report ---")
 
     # Basic validations
-    logger.info("\nNegative quantities:")
-    neg_qty = (df["quantity"] < 0).sum()
-    logger.info(neg_qty)
-    if neg_qty > 0:
-        log_warning(logger, f"Found {neg_qty} records with negative quantities")
-
-    logger.info("\nZero or negative sales:")
-    zero_sales = (df["sales"] <= 0).sum()
-    logger.info(zero_sales)
-    if zero_sales > 0:
-        log_warning(logger, f"Found {zero_sales} records with zero/negative sales")
-
-    logger.info("\nMissing order dates:")
-    missing_dates = df["order_date"].isna().sum()
-    logger.info(missing_dates)
-    if missing_dates > 0:
-        log_warning(logger, f"Found {missing_dates} records with missing dates")
-
-    logger.info("\nDuplicate order IDs:")
-    duplicates = df["order_id"].duplicated().sum()
-    logger.info(duplicates)
-    if duplicates > 0:
-        log_warning(logger, f"Found {duplicates} duplicate order IDs")
+    checks = [
+        ("Negative quantities", "negative_quantities", "records with negative quantities"),
+        ("Zero or negative sales", "non_positive_sales", "records with zero/negative sales"),
+        ("Missing order dates", "missing_order_dates", "records with missing dates"),
+        ("Duplicate order IDs", "duplicate_order_ids", "duplicate order IDs"),
+    ]
+    for title, field, description in checks:
+        logger.info(f"\n{title}:")
+        count = getattr(report, field)
+        logger.info(count)
+        if count > 0:
+            log_warning(logger, f"Found {count} {description}")
     
     # Enhanced validations
     logger.info("\n--- Enhanced Validations ---")
     
     # Check for future dates
-    from datetime import datetime
-    today = datetime.now()
-    future_dates = (df["order_date"] > today).sum()
-    logger.info(f"\nFuture dates: {future_dates}")
-    if future_dates > 0:
-        log_warning(logger, f"Found {future_dates} records with future dates")
+    logger.info(f"\nFuture dates: {report.future_dates}")
+    if report.future_dates > 0:
+        log_warning(logger, f"Found {report.future_dates} records with future dates")
     
     # Check date range
-    if not df["order_date"].isna().all():
-        min_date = df["order_date"].min()
-        max_date = df["order_date"].max()
-        logger.info(f"\nDate range: {min_date} to {max_date}")
+    if report.min_date is not None:
+        min_date = report.min_date
+        logger.info(f"\nDate range: {min_date} to {report.max_date}")
         
         # Check if date range is reasonable (e.g., not before 2000)
         if min_date.year < 2000:
             log_warning(logger, f"Minimum date ({min_date}) seems unusually old")
     
     # Check for extreme values in sales
-    if "sales" in df.columns:
-        sales_mean = df["sales"].mean()
-        sales_std = df["sales"].std()
-        outliers = ((df["sales"] - sales_mean).abs() > 3 * sales_std).sum()
-        logger.info(f"\nStatistical outliers (>3 std): {outliers}")
-        if outliers > 0:
-            logger.info(f"  (This is normal - {outliers/len(df)*100:.1f}% of data)")
+    outliers = report.outliers
+    logger.info(f"\nStatistical outliers (>3 std): {outliers}")
+    if outliers > 0:
+        logger.info(f"  (This is normal - {outliers/len(df)*100:.1f}% of data)")
     
     # Summary
-    total_issues = neg_qty + zero_sales + missing_dates + future_dates
+    total_issues = (
+        report.negative_quantities + report.non_positive_sales +
+        report.missing_order_dates + report.future_dates
+    )
     if total_issues == 0:
         log_success(logger, "No critical data quality issues found!")
     else:
         log_warning(logger, f"Total issues found: {total_issues}")
 
-def main():
+    return report
+
+def _hash_keys(df: pd.DataFrame, columns) -> np.ndarray:
+    """Return one 64-bit hash per row over the given key columns."""
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+def _mark_seen(hashes: np.ndarray, seen: np.ndarray):
+    """
+    Flag hashes already present in this chunk or in earlier chunks.
+
+    Args:
+        hashes: Row key hashes for the current chunk
+        seen: Sorted array of unique hashes from earlier chunks
+
+    Returns:
+        Tuple of (boolean duplicate mask, updated sorted seen array)
+    """
+    duplicated = pd.Series(hashes).duplicated().to_numpy()
+    if len(seen):
+        positions = np.searchsorted(seen, hashes).clip(max=len(seen) - 1)
+        duplicated |= seen[positions] == hashes
+    # The new hashes are unique and absent from seen, so sort only them and
+    # merge them in at their insertion points instead of re-sorting seen
+    new = np.sort(hashes[~duplicated])
+    seen = np.insert(seen, np.searchsorted(seen, new), new)
+    return duplicated, seen
+
+def clean_in_chunks(raw_path: Path, output_path: Path = CLEANED_SALES_FILE,
+                    chunksize: int = CLEANING_CHUNK_SIZE) -> dict:
+    """
+    Run the cleaning pipeline over the raw file in bounded-size chunks.
+
+    Each chunk goes through the same steps as the in-memory pipeline and
+    is appended to the output straight away, so memory use depends on
+    the chunk size rather than the file size. Cross-chunk duplicates are
+    detected with sorted arrays of 64-bit key hashes instead of keeping
+    the keys themselves.
+
+    The streaming report has no outlier count, since that needs the
+    global mean and standard deviation before the first chunk is scanned.
+
+    Args:
+        raw_path: Path to the raw CSV file
+        output_path: Path to the cleaned CSV file
+        chunksize: Number of raw rows per chunk
+
+    Returns:
+        Dictionary with accumulated validation and cleaning counters
+    """
+    if not raw_path.exists():
+        log_error(logger, f"Data file not found: {raw_path}")
+        logger.info(f"  Please ensure the raw data file exists at: {raw_path}")
+        sys.exit(1)
+
+    counts = {
+        "rows_read": 0, "rows_written": 0,
+        "negative_quantities": 0, "non_positive_sales": 0,
+        "missing_order_dates": 0, "duplicate_order_ids": 0,
+        "future_dates": 0, "duplicate_records": 0,
+        "min_date": None, "max_date": None,
+        "sales_sum": 0.0, "sales_sumsq": 0.0, "sales_count": 0
+    }
+    seen_order_ids = np.empty(0, dtype=np.uint64)
+    seen_records = np.empty(0, dtype=np.uint64)
+    today = datetime.now()
+
+    logger.info(f"Streaming {raw_path.name} in chunks of {chunksize:,} rows...")
+
+    with ChunkedSalesWriter(output_path) as writer:
+        for chunk in pd.read_csv(raw_path, chunksize=chunksize):
+            chunk = standardize_columns(chunk)
+            chunk = parse_dates(chunk)
+            chunk = convert_numeric_columns(chunk)
+
+            # Validation counters (same checks as validate_data)
+            order_dates = chunk["order_date"]
+            sales = chunk["sales"]
+            counts["rows_read"] += len(chunk)
+            counts["negative_quantities"] += int((chunk["quantity"] < 0).sum())
+            counts["non_positive_sales"] += int((sales <= 0).sum())
+            counts["missing_order_dates"] += int(order_dates.isna().sum())
+            counts["future_dates"] += int((order_dates > today).sum())
+            counts["sales_count"] += int(sales.count())
+            counts["sales_sum"] += float(sales.sum())
+            counts["sales_sumsq"] += float((sales ** 2).sum())
+            if order_dates.notna().any():
+                chunk_min, chunk_max = order_dates.min(), order_dates.max()
+                if counts["min_date"] is None or chunk_min < counts["min_date"]:
+                    counts["min_date"] = chunk_min
+                if counts["max_date"] is None or chunk_max > counts["max_date"]:
+                    counts["max_date"] = chunk_max
+
+            order_id_dups, seen_order_ids = _mark_seen(
+                _hash_keys(chunk, ["order_id"]), seen_order_ids
+            )
+            counts["duplicate_order_ids"] += int(order_id_dups.sum())
+
+            # Same rules as clean_invalid_records, with cross-chunk de-duplication
+            chunk = chunk[(chunk["sales"] > 0) & chunk["order_date"].notna()]
+            record_dups, seen_records = _mark_seen(
+                _hash_keys(chunk, DUPLICATE_SUBSET), seen_records
+            )
+            counts["duplicate_records"] += int(record_dups.sum())
+
+            writer.write(chunk[~record_dups])
+
+        counts["rows_written"] = writer.rows_written
+
+    _log_stream_report(counts)
+    return counts
+
+def _log_stream_report(counts: dict) -> None:
+    """Log the accumulated counters of a streaming cleaning run."""
+    logger.info("\n--- Validation Report (streaming) ---")
+    logger.info(f"Negative quantities: {counts['negative_quantities']}")
+    logger.info(f"Zero or negative sales: {counts['non_positive_sales']}")
+    logger.info(f"Missing order dates: {counts['missing_order_dates']}")
+    logger.info(f"Duplicate order IDs: {counts['duplicate_order_ids']}")
+    logger.info(f"Future dates: {counts['future_dates']}")
+    if counts["min_date"] is not None:
+        logger.info(f"Date range: {counts['min_date']} to {counts['max_date']}")
+
+    n = counts["sales_count"]
+    if n > 1:
+        mean = counts["sales_sum"] / n
+        variance = max(counts["sales_sumsq"] - n * mean ** 2, 0.0) / (n - 1)
+        logger.info(f"Sales mean: {mean:,.2f}  std: {variance ** 0.5:,.2f}")
+
+    total_issues = (
+        counts["negative_quantities"] + counts["non_positive_sales"] +
+        counts["missing_order_dates"] + counts["future_dates"]
+    )
+    if total_issues == 0:
+        log_success(logger, "No critical data quality issues found!")
+    else:
+        log_warning(logger, f"Total issues found: {total_issues}")
+
+    logger.info("\n--- Cleaning Summary ---")
+    logger.info(f"Rows before cleaning: {counts['rows_read']}")
+    logger.info(f"Rows after cleaning:  {counts['rows_written']}")
+    logger.info(f"Rows removed:        {counts['rows_read'] - counts['rows_written']}")
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line options for the cleaning pipeline."""
+    parser = argparse.ArgumentParser(description="Clean raw sales data")
+    parser.add_argument("--stream", action="store_true",
+                        help="process the raw file in bounded-size chunks")
+    parser.add_argument("--chunksize", type=int, default=CLEANING_CHUNK_SIZE,
+                        help=f"rows per chunk in streaming mode (default: {CLEANING_CHUNK_SIZE})")
+    return parser.parse_args(argv)
+
+@profile_run("data_cleaning")
+def main(argv=None):
+    args = parse_args(argv)
     try:
         log_section(logger, "SALES DATA CLEANING PIPELINE")
+        ensure_directories()
+
+        if args.stream:
+            with span("clean in chunks"):
+                clean_in_chunks(RAW_SALES_FILE, CLEANED_SALES_FILE, args.chunksize)
+            log_section(logger, "CLEANING COMPLETED SUCCESSFULLY")
+            return
         
-        df = load_data(RAW_SALES_FILE)
-        df = standardize_columns(df)
-        df = parse_dates(df)
-        df = convert_numeric_columns(df)
+        with span("load"):
+            df = load_data(RAW_SALES_FILE)
+        with span("standardize"):
+            df = standardize_columns(df)
+            df = parse_dates(df)
+            df = convert_numeric_columns(df)
 
         logger.info("\n--- Data Types After Standardization ---")
         logger.info(f"\n{df.dtypes}")
 
-        validate_data(df)
+        with span("validate"):
+            report = validate_data(df)
 
-        df = clean_invalid_records(df)
+        with span("filter"):
+            df = clean_invalid_records(df, report)
 
-        # Ensure output directory exists
-        CLEANED_SALES_FILE.parent.mkdir(parents=True, exist_ok=True)
-        
-        df.to_csv(CLEANED_SALES_FILE, index=False)
-        log_success(logger, f"Cleaned data saved to {CLEANED_SALES_FILE}")
+        # Save CSV plus the typed Parquet copy used by downstream stages
+        with span("save"):
+            save_cleaned_data(df, CLEANED_SALES_FILE)
         log_section(logger, "CLEANING COMPLETED SUCCESSFULLY")
         
     except Exception as e:
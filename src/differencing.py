@@ -2,32 +2,28 @@
 Time Series Differencing
 
 This module applies first-order differencing to remove trend
-and make the time series stationary for SARIMA modeling.
+and make the time series stationary for SARIMA modeling. It also
+selects the differencing orders d and D automatically, so tuning
+does not have to search over them.
 
 Differencing: Y'(t) = Y(t) - Y(t-1)
 
 Usage:
     python src/differencing.py
 """
+import warnings
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from statsmodels.tsa.stattools import adfuller
-from config import CLEANED_SALES_FILE
-
-def load_monthly_sales():
-    """
-    Load and aggregate sales data to monthly level.
-    
-    Returns:
-        Series with monthly aggregated sales indexed by date
-    """
-    df = pd.read_csv(CLEANED_SALES_FILE, parse_dates=["order_date"])
-    monthly_sales = (
-        df.set_index("order_date")
-          .resample("M")["sales"]
-          .sum()
-    )
-    return monthly_sales
+from aggregates import load_monthly_sales
+from logger import profile_run, flush_logs
+from config import (
+    UNIT_ROOT_ALPHA,
+    UNIT_ROOT_TEST,
+    SEASONAL_STRENGTH_THRESHOLD,
+    MAX_D,
+    MAX_SEASONAL_D
+)
 
 def difference_series(series):
     """
@@ -43,6 +39,113 @@ def difference_series(series):
     """
     return series.diff().dropna()
 
+def seasonal_difference(series, m=12):
+    """
+    Apply seasonal differencing Y(t) - Y(t-m).
+    
+    Args:
+        series: Time series data
+        m: Seasonal period
+    
+    Returns:
+        Seasonally differenced series with NaN values removed
+    """
+    return series.diff(m).dropna()
+
+def is_stationary(series, alpha=UNIT_ROOT_ALPHA, test=UNIT_ROOT_TEST):
+    """
+    Decide whether a series is level-stationary.
+    
+    KPSS has stationarity as its null hypothesis and ADF has a unit
+    root as its null, so "stationary" means KPSS does not reject and/or
+    ADF rejects, depending on the test chosen.
+    
+    Args:
+        series: Time series data
+        alpha: Significance level
+        test: 'kpss', 'adf' or 'both'
+    
+    Returns:
+        True if the series is judged stationary
+    """
+    from statsmodels.tsa.stattools import adfuller, kpss
+
+    values = np.asarray(series, dtype=float)
+    if len(values) < 3 or np.ptp(values) == 0:
+        return True
+    
+    with warnings.catch_warnings():
+        # KPSS warns when its p-value is outside the lookup table range
+        warnings.simplefilter("ignore")
+        kpss_ok = kpss(values, regression="c", nlags="auto")[1] >= alpha
+        adf_ok = adfuller(values)[1] < alpha if test in ("adf", "both") else True
+    
+    if test == "kpss":
+        return kpss_ok
+    if test == "adf":
+        return adf_ok
+    return kpss_ok and adf_ok
+
+def seasonal_strength(series, m=12):
+    """
+    Strength of seasonality from an STL decomposition.
+    
+    F_s = max(0, 1 - Var(remainder) / Var(seasonal + remainder)),
+    following Wang, Smith & Hyndman (2006).
+    
+    Args:
+        series: Time series data
+        m: Seasonal period
+    
+    Returns:
+        Seasonal strength between 0 and 1 (0 if the series is too short)
+    """
+    from statsmodels.tsa.seasonal import STL
+    
+    values = np.asarray(series, dtype=float)
+    if len(values) < 2 * m or np.ptp(values) == 0:
+        return 0.0
+    
+    decomposition = STL(values, period=m, robust=True).fit()
+    remainder = decomposition.resid
+    detrended = decomposition.seasonal + remainder
+    if np.var(detrended) == 0:
+        return 0.0
+    return max(0.0, 1 - np.var(remainder) / np.var(detrended))
+
+def select_differencing_orders(series, m=12, max_d=MAX_D, max_D=MAX_SEASONAL_D,
+                               alpha=UNIT_ROOT_ALPHA, test=UNIT_ROOT_TEST):
+    """
+    Choose the seasonal (D) and non-seasonal (d) differencing orders.
+    
+    D is chosen first from the seasonal strength, then d from unit-root
+    tests on the seasonally differenced series, as in auto.arima.
+    
+    Args:
+        series: Time series data
+        m: Seasonal period
+        max_d: Maximum non-seasonal differencing order
+        max_D: Maximum seasonal differencing order
+        alpha: Significance level for the unit-root tests
+        test: 'kpss', 'adf' or 'both'
+    
+    Returns:
+        Tuple (d, D)
+    """
+    x = pd.Series(series).dropna()
+    
+    D = 0
+    while D < max_D and seasonal_strength(x, m) > SEASONAL_STRENGTH_THRESHOLD:
+        x = seasonal_difference(x, m)
+        D += 1
+    
+    d = 0
+    while d < max_d and len(x) > 3 and not is_stationary(x, alpha, test):
+        x = difference_series(x)
+        d += 1
+    
+    return d, D
+
 def adf_test(series, title=""):
     """
     Perform Augmented Dickey-Fuller test for stationarity.
@@ -54,11 +157,16 @@ def adf_test(series, title=""):
     Prints:
         ADF statistic and p-value
     """
+    from statsmodels.tsa.stattools import adfuller
+
     result = adfuller(series)
+    # Records are written by a background thread; let them go first
+    flush_logs()
     print(f"\n--- ADF Test Results {title} ---")
     print(f"ADF Statistic: {result[0]}")
     print(f"p-value: {result[1]}")
 
+@profile_run("differencing")
 def main():
     sales = load_monthly_sales()
     diff_sales = difference_series(sales)
@@ -66,5 +174,11 @@ def main():
     adf_test(sales, "Before Differencing")
     adf_test(diff_sales, "After Differencing")
 
+    d, D = select_differencing_orders(sales)
+    flush_logs()
+    print("\n--- Selected Differencing Orders ---")
+    print(f"Seasonal strength: {seasonal_strength(sales):.2f}")
+    print(f"d = {d}, D = {D}")
+
 if __name__ == "__main__":
     main()
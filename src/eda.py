@@ -11,9 +11,11 @@ Usage:
 """
 import pandas as pd
 from pathlib import Path
-import matplotlib.pyplot as plt
 import sys
-from config import CLEANED_SALES_FILE, FIGURE_SIZE
+from config import CLEANED_SALES_FILE, FIGURE_SIZE, ensure_directories
+from sales_store import load_cleaned_sales
+from aggregates import aggregate_monthly, load_monthly_sales
+from logger import profile_run, flush_logs
 
 def load_clean_data(path: Path) -> pd.DataFrame:
     """
@@ -30,13 +32,7 @@ def load_clean_data(path: Path) -> pd.DataFrame:
         ValueError: If required columns are missing
     """
     try:
-        if not path.exists():
-            raise FileNotFoundError(
-                f"Cleaned data file not found: {path}\n"
-                f"Please run data_cleaning.py first"
-            )
-        
-        df = pd.read_csv(path, parse_dates=["order_date"])
+        df = load_cleaned_sales(path=path)
         
         if df.empty:
             raise ValueError("Loaded data is empty")
@@ -44,13 +40,16 @@ def load_clean_data(path: Path) -> pd.DataFrame:
         if "order_date" not in df.columns or "sales" not in df.columns:
             raise ValueError("Required columns (order_date, sales) not found")
         
+        flush_logs()
         print(f"✓ Successfully loaded {len(df)} rows")
         return df
     
     except FileNotFoundError as e:
+        flush_logs()
         print(f"✗ Error: {e}")
         sys.exit(1)
     except Exception as e:
+        flush_logs()
         print(f"✗ Error loading data: {e}")
         sys.exit(1)
 
@@ -64,14 +63,7 @@ def monthly_sales_trend(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with monthly aggregated sales
     """
-    monthly_sales = (
-        df
-        .set_index("order_date")
-        .resample("M")["sales"]
-        .sum()
-        .reset_index()
-    )
-    return monthly_sales
+    return aggregate_monthly(df).reset_index()
 
 def plot_monthly_sales(monthly_sales: pd.DataFrame):
     """
@@ -80,6 +72,8 @@ def plot_monthly_sales(monthly_sales: pd.DataFrame):
     Args:
         monthly_sales: DataFrame with order_date and sales columns
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=FIGURE_SIZE)
     plt.plot(monthly_sales["order_date"], monthly_sales["sales"])
     plt.title("Monthly Sales Trend")
@@ -88,15 +82,18 @@ def plot_monthly_sales(monthly_sales: pd.DataFrame):
     plt.grid(True)
     plt.show()
 
+@profile_run("eda")
 def main():
     try:
+        ensure_directories()
         print("=" * 50)
         print("EXPLORATORY DATA ANALYSIS")
         print("=" * 50)
         
-        df = load_clean_data(CLEANED_SALES_FILE)
-        monthly_sales = monthly_sales_trend(df)
+        monthly_sales = load_monthly_sales(path=CLEANED_SALES_FILE).reset_index()
 
+        # Records are written by a background thread; let them go first
+        flush_logs()
         print("\n--- Monthly Sales (Top 10 Rows) ---")
         print(monthly_sales.head(10))
 
@@ -105,9 +102,11 @@ def main():
 
         plot_monthly_sales(monthly_sales)
         
+        flush_logs()
         print("\n✓ EDA completed successfully")
         
     except Exception as e:
+        flush_logs()
         print(f"\n✗ EDA failed: {e}")
         sys.exit(1)
 
@@ -0,0 +1,79 @@
+"""
+Content fingerprints for data files and in-memory series.
+
+Digests are SHA-256 hex strings. Hashing a large file is not free, so
+file digests are remembered in a small JSON index keyed by path, size and
+modification time; a file is only re-read when one of those changes.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from config import DIGEST_CACHE_FILE
+
+_CHUNK_BYTES = 1024 * 1024
+
+def _load_digest_index(index_path: Path) -> dict:
+    """Load the digest index, treating a missing or corrupt file as empty."""
+    try:
+        with open(index_path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def file_digest(path: Path, index_path: Path = DIGEST_CACHE_FILE) -> str:
+    """
+    Return the SHA-256 digest of a file's contents.
+    
+    Args:
+        path: File to hash
+        index_path: JSON index used to remember digests between runs
+    
+    Returns:
+        Hex digest string
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    key = str(path)
+
+    index = _load_digest_index(index_path)
+    entry = index.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_CHUNK_BYTES), b""):
+            digest.update(block)
+
+    index[key] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest()
+    }
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    tmp_path.replace(index_path)
+
+    return index[key]["sha256"]
+
+def series_digest(series: pd.Series) -> str:
+    """
+    Return a SHA-256 digest of a series' index and values.
+    
+    Args:
+        series: Series to hash
+    
+    Returns:
+        Hex digest string
+    """
+    hashed = pd.util.hash_pandas_object(series, index=True).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
@@ -2,42 +2,34 @@
 After differencing to ensure stationarity, the model produced stable forecasts with well-behaved residuals.
 The widening confidence intervals reflect increasing uncertainty, which is expected in long-horizon forecasting.”'''
 
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
-from pathlib import Path
 import sys
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 from config import (
-    CLEANED_SALES_FILE,
     FORECAST_OUTPUT_FILE,
     FORECAST_HORIZON,
+    FORECAST_ALPHA,
     SARIMA_ORDER,
     SARIMA_SEASONAL_ORDER,
     ENFORCE_STATIONARITY,
     ENFORCE_INVERTIBILITY,
-    FIGURE_SIZE
+    RESULTS_DIR,
+    ensure_directories
 )
-from logger import setup_logger, log_section, log_success, log_error
-from model_utils import load_model, get_model_info
-from visualization import plot_forecast
+from logger import setup_logger, log_section, log_success, log_error, span, profile_run
+from model_utils import load_model, get_model_info, saved_model_path
+from fingerprint import file_digest
+from forecast_cache import ForecastCache, forecast_key
+import aggregates
 
 logger = setup_logger(__name__)
 
+FORECAST_PLOT_FILE = RESULTS_DIR / "forecast_plot.png"
+
 def load_monthly_sales():
     """Load and aggregate sales data to monthly level."""
     try:
-        if not CLEANED_SALES_FILE.exists():
-            raise FileNotFoundError(
-                f"Cleaned data not found: {CLEANED_SALES_FILE}\n"
-                f"Please run data_cleaning.py first"
-            )
-        
-        df = pd.read_csv(CLEANED_SALES_FILE, parse_dates=["order_date"])
-        monthly_sales = (
-            df.set_index("order_date")
-              .resample("M")["sales"]
-              .sum()
-        )
+        monthly_sales = aggregates.load_monthly_sales()
         
         log_success(logger, f"Loaded {len(monthly_sales)} months of sales data")
         return monthly_sales
@@ -48,6 +40,9 @@ def load_monthly_sales():
 
 def train_model(series):
     """Train SARIMA model (fallback if no saved model exists)."""
+    # statsmodels is only needed here, not on the cached or saved-model paths
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
     logger.info(f"\nTraining new SARIMA{SARIMA_ORDER}x{SARIMA_SEASONAL_ORDER} model...")
     model = SARIMAX(
         series,
@@ -58,44 +53,156 @@ def train_model(series):
     )
     return model.fit(disp=False)
 
-def forecast_next(model, steps=None):
+def forecast_next(model, steps=None, alpha=FORECAST_ALPHA):
+    """Forecast the next `steps` months with (1 - alpha) confidence intervals."""
     if steps is None:
         steps = FORECAST_HORIZON
     forecast = model.get_forecast(steps=steps)
-    return forecast.predicted_mean, forecast.conf_int()
+    return forecast.predicted_mean, forecast.conf_int(alpha=alpha)
+
+def forecast_batch(models, requests):
+    """
+    Answer many forecast requests with one forecast per series.
+    
+    Requests for the same series share a single get_forecast call at the
+    longest requested horizon; shorter horizons are its first months and
+    each alpha only changes the interval width. A series that fails does
+    not fail the others.
+    
+    Args:
+        models: Dictionary of series key -> fitted results
+        requests: List of (series, steps, alpha) tuples
+    
+    Returns:
+        List in request order of (forecast, conf_int) pairs, or the
+        exception raised for that request's series
+    """
+    longest = {}
+    for series, steps, _ in requests:
+        longest[series] = max(steps, longest.get(series, 0))
+    
+    predictions = {}
+    for series, steps in longest.items():
+        try:
+            predictions[series] = models[series].get_forecast(steps=steps)
+        except Exception as e:
+            predictions[series] = e
+    
+    results = []
+    for series, steps, alpha in requests:
+        prediction = predictions[series]
+        if isinstance(prediction, Exception):
+            results.append(prediction)
+        else:
+            results.append((prediction.predicted_mean.iloc[:steps],
+                            prediction.conf_int(alpha=alpha).iloc[:steps]))
+    return results
+
+def model_fingerprint():
+    """
+    Identify the model forecasts are produced with.
+    
+    Returns:
+        Content digest of the saved model artifact, or a description of
+        the configured model when none is saved and one is trained on
+        the fly (that fit depends only on the data and the config)
+    """
+    model_file = saved_model_path()
+    if model_file is None:
+        return (f"fallback SARIMA{SARIMA_ORDER}x{SARIMA_SEASONAL_ORDER} "
+                f"stationarity={ENFORCE_STATIONARITY} invertibility={ENFORCE_INVERTIBILITY}")
+    return file_digest(model_file)
 
-def main():
+def compute_forecast(sales, horizon, alpha):
+    """Load the saved model (or train one) and forecast."""
+    model_info = get_model_info()
+    
+    if model_info['model_exists']:
+        logger.info("\n✓ Found saved model, loading...")
+        model = load_model(check_metadata=True)
+    else:
+        logger.info("\n⚠ No saved model found, training new model...")
+        model = train_model(sales)
+        log_success(logger, "Model trained successfully")
+    
+    logger.info(f"\nGenerating {horizon}-month forecast...")
+    forecast, conf_int = forecast_next(model, horizon, alpha)
+    log_success(logger, "Forecast generated successfully")
+    return forecast, conf_int
+
+def _alpha(value):
+    """argparse type for a significance level in (0, 1)."""
+    alpha = float(value)
+    if not 0 < alpha < 1:
+        raise argparse.ArgumentTypeError(f"alpha must be between 0 and 1, got {value}")
+    return alpha
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Forecast monthly sales")
+    parser.add_argument(
+        "--horizon", type=int, default=FORECAST_HORIZON,
+        help="Months to forecast"
+    )
+    parser.add_argument(
+        "--alpha", type=_alpha, default=FORECAST_ALPHA,
+        help="Significance level of the intervals (0.05 = 95%%)"
+    )
+    parser.add_argument(
+        "--cache", action=argparse.BooleanOptionalAction, default=True,
+        help="Reuse forecasts cached for the same model, data, horizon and alpha"
+    )
+    return parser.parse_args(argv)
+
+@profile_run("forecast")
+def main(argv=None):
+    args = parse_args(argv)
     try:
         log_section(logger, "SALES FORECASTING")
+        ensure_directories()
         
-        # Try to load saved model first
-        model_info = get_model_info()
+        # The cache key only needs file digests, so a hit skips loading
+        # the data and the model altogether
+        with span("cache lookup"):
+            cache = ForecastCache() if args.cache else None
+            key = forecast_key(model_fingerprint(), aggregates.cleaned_data_digest(),
+                               args.horizon, args.alpha)
+            cached = cache.get(key) if cache is not None else None
         
-        if model_info['model_exists']:
-            logger.info("\n✓ Found saved model, loading...")
-            model = load_model(check_metadata=True)
+        sales = None
+        if cached is not None:
+            forecast, conf_int = cached
+            log_success(logger, "Loaded cached forecast (model and data unchanged)")
         else:
-            logger.info("\n⚠ No saved model found, training new model...")
+            # Sales history is needed for the fallback fit and for plotting
             sales = load_monthly_sales()
-            model = train_model(sales)
-            log_success(logger, "Model trained successfully")
-        
-        # Load sales data for plotting
-        sales = load_monthly_sales()
+            with span("compute"):
+                forecast, conf_int = compute_forecast(sales, args.horizon, args.alpha)
+            if cache is not None:
+                cache.put(key, forecast, conf_int)
         
-        # Generate forecast
-        logger.info(f"\nGenerating {FORECAST_HORIZON}-month forecast...")
-        forecast, conf_int = forecast_next(model)
-        log_success(logger, "Forecast generated successfully")
-
-        # Plot and save
-        plot_forecast(sales, forecast, conf_int, save=True)
-
-        # Save forecast
-        forecast_df = forecast.reset_index()
-        forecast_df.columns = ["date", "forecast_sales"]
-        forecast_df.to_csv(FORECAST_OUTPUT_FILE, index=False)
-        log_success(logger, f"Forecast saved to {FORECAST_OUTPUT_FILE}")
+        published = (
+            cache is not None and cache.is_published(key) and
+            FORECAST_OUTPUT_FILE.exists() and FORECAST_PLOT_FILE.exists()
+        )
+        if published:
+            logger.info("Forecast file and plot are already up to date")
+        else:
+            if sales is None:
+                sales = load_monthly_sales()
+            
+            with span("publish"):
+                # Plot and save (matplotlib is only imported when publishing)
+                from visualization import plot_forecast
+                plot_forecast(sales, forecast, conf_int, save=True, alpha=args.alpha)
+                
+                # Save forecast
+                forecast_df = forecast.reset_index()
+                forecast_df.columns = ["date", "forecast_sales"]
+                forecast_df.to_csv(FORECAST_OUTPUT_FILE, index=False)
+            log_success(logger, f"Forecast saved to {FORECAST_OUTPUT_FILE}")
+            if cache is not None:
+                cache.mark_published(key)
         
         # Display forecast summary
         logger.info("\n--- Forecast Summary ---")
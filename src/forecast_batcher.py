@@ -0,0 +1,130 @@
+"""
+Request coalescing and micro-batching for forecast serving.
+
+Dashboards refresh many tiles at once, so the forecast service receives
+bursts of requests for the same or sibling series. ForecastBatcher sits
+between the request handlers and the model computation:
+
+- identical requests (same series, horizon and alpha) that arrive while
+  one is already queued or running share its result instead of being
+  computed again;
+- different requests arriving within a short window are collected and
+  handed to one batched compute call (see forecast.forecast_batch) in
+  the worker pool, instead of one executor round trip each.
+
+Usage:
+    batcher = ForecastBatcher(lambda batch: forecast_batch(models, batch), executor)
+    forecast, conf_int = await batcher.submit("market=EU", 12, 0.05)
+"""
+import asyncio
+from typing import Callable, Dict, List, Tuple
+
+from config import SERVICE_BATCH_WINDOW_MS, SERVICE_MAX_BATCH
+
+class ForecastBatcher:
+    """
+    Coalesce identical in-flight requests and batch the rest.
+
+    Args:
+        compute: Function taking a list of (series, steps, alpha) requests
+            and returning a result, or an exception, per request
+        executor: Executor the compute function runs in (None = the
+            loop's default executor)
+        window_ms: How long the first request of a batch waits for others
+        max_batch: Batch size that triggers an immediate compute call
+    """
+
+    def __init__(self, compute: Callable[[List[Tuple]], List], executor=None,
+                 window_ms: float = SERVICE_BATCH_WINDOW_MS, max_batch: int = SERVICE_MAX_BATCH):
+        self.compute = compute
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._inflight = {}
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        self.requests = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_requests = 0
+
+    async def submit(self, series: str, steps: int, alpha: float):
+        """
+        Return the result of one request, sharing work with concurrent ones.
+
+        Raises:
+            Whatever the compute function reported for this request
+        """
+        self.requests += 1
+        key = (series, steps, alpha)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._inflight[key] = future
+            self._pending.append(key)
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        # A cancelled caller must not cancel the result other callers share
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        """Send the pending requests to the worker pool as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple]) -> None:
+        """
+        Compute one batch and resolve its futures.
+
+        Every future of the batch is resolved and removed from the
+        in-flight table, whatever happens: left behind, it would hang
+        every later identical request coalesced onto it.
+        """
+        self.batches += 1
+        self.batched_requests += len(batch)
+        loop = asyncio.get_running_loop()
+        results = None
+        # Reported if the batch is cancelled (e.g. the executor shuts down)
+        error = RuntimeError("Forecast batch was cancelled before it completed")
+        try:
+            try:
+                results = list(await loop.run_in_executor(self.executor, self.compute, batch))
+            except Exception as e:
+                error = e
+            else:
+                if len(results) != len(batch):
+                    error = RuntimeError(
+                        f"Forecast batch returned {len(results)} results for {len(batch)} requests"
+                    )
+                    results = None
+        finally:
+            for i, key in enumerate(batch):
+                future = self._inflight.pop(key, None)
+                if future is None or future.done():
+                    continue
+                result = results[i] if results is not None else error
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Counts of requests, coalesced requests and batches."""
+        return {
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'batches': self.batches,
+            'mean_batch_size': round(self.batched_requests / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,135 @@
+"""
+On-disk cache of forecast results.
+
+A forecast depends only on the model artifact, the sales data, the
+horizon and the interval level, so forecast.py stores each result under
+a key built from those four values and serves repeated requests (e.g.
+dashboard refreshes) from disk without loading the model.
+
+Every entry is one small CSV in FORECAST_CACHE_DIR. Reading an entry
+touches its modification time, and once the cache holds more than
+FORECAST_CACHE_SIZE entries the least recently used ones are deleted.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from config import FORECAST_CACHE_DIR, FORECAST_CACHE_SIZE
+from logger import setup_logger, log_warning
+
+logger = setup_logger(__name__)
+
+# Records which entry the published forecast files were written from
+_PUBLISHED_FILE = "published.json"
+
+def forecast_key(model_digest: str, data_digest: str, horizon: int, alpha: float) -> str:
+    """
+    Build the cache key of one forecast.
+
+    Args:
+        model_digest: Digest of the model artifact (or a description of
+            the model when it is trained on the fly)
+        data_digest: Digest of the sales data
+        horizon: Months forecast
+        alpha: Significance level of the intervals
+
+    Returns:
+        Hex digest identifying the forecast
+    """
+    payload = {
+        "model": model_digest,
+        "data": data_digest,
+        "horizon": int(horizon),
+        "alpha": float(alpha)
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+class ForecastCache:
+    """
+    Least-recently-used store of forecasts and their intervals.
+
+    Usage:
+        cache = ForecastCache()
+        key = forecast_key(model_digest, data_digest, 12, 0.05)
+        cached = cache.get(key)
+        if cached is None:
+            cache.put(key, forecast, conf_int)
+    """
+
+    def __init__(self, cache_dir: Path = FORECAST_CACHE_DIR, max_entries: int = FORECAST_CACHE_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"forecast_{key[:32]}.csv"
+
+    def _entries(self):
+        return list(self.cache_dir.glob("forecast_*.csv"))
+
+    def __len__(self):
+        return len(self._entries())
+
+    def get(self, key: str) -> Optional[Tuple[pd.Series, pd.DataFrame]]:
+        """
+        Return the cached (forecast, conf_int) pair, or None.
+
+        A hit marks the entry as most recently used.
+        """
+        path = self._path(key)
+        try:
+            frame = pd.read_csv(path, index_col="date", parse_dates=["date"])
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log_warning(logger, f"Ignoring unreadable forecast cache entry {path.name}: {e}")
+            return None
+
+        frame.index.name = None
+        if len(frame) > 2:
+            frame.index.freq = pd.infer_freq(frame.index)
+        forecast = frame["forecast"].rename("predicted_mean")
+        return forecast, frame.drop(columns="forecast")
+
+    def put(self, key: str, forecast: pd.Series, conf_int: pd.DataFrame) -> Path:
+        """
+        Store a forecast and evict the least recently used entries.
+
+        Returns:
+            Path of the new entry
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        frame = pd.concat([forecast.rename("forecast"), conf_int], axis=1)
+        frame.index.name = "date"
+
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        frame.to_csv(tmp_path)
+        tmp_path.replace(path)
+
+        self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries beyond max_entries."""
+        entries = sorted(self._entries(), key=lambda path: path.stat().st_mtime_ns, reverse=True)
+        for path in entries[self.max_entries:]:
+            path.unlink(missing_ok=True)
+
+    def is_published(self, key: str) -> bool:
+        """Whether the published forecast files were written from this entry."""
+        try:
+            with open(self.cache_dir / _PUBLISHED_FILE, 'r') as f:
+                return json.load(f).get("key") == key
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+    def mark_published(self, key: str) -> None:
+        """Remember that the published forecast files hold this entry."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / _PUBLISHED_FILE, 'w') as f:
+            json.dump({"key": key}, f)
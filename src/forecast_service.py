@@ -0,0 +1,354 @@
+"""
+Local Forecast Service
+
+A long-running HTTP service that loads the saved models once and answers
+forecast requests as JSON, so consumers such as the Power BI refresh do
+not pay for a new interpreter, the imports and the model load per call.
+
+The server uses asyncio from the standard library. Model computations run
+in a thread pool, so the event loop keeps accepting requests while
+forecasts are computed. Concurrent requests go through a ForecastBatcher:
+identical ones share one computation and the rest are computed in
+micro-batches (see forecast_batcher.py).
+
+Endpoints (GET):
+    /forecast?series=sales&horizon=12&alpha=0.05
+        Forecast with (1 - alpha) intervals. `series` is "sales" for the
+        main model or a hierarchy node id such as "market=EU".
+    /series   Keys of the loaded models
+    /metrics  Request counts and latency percentiles per endpoint, and
+              batching counters
+    /health   Liveness and number of loaded models
+
+Usage:
+    python src/forecast_service.py
+    python src/forecast_service.py --port 9000 --no-hierarchy
+    python src/forecast_service.py --batch-window 20
+    curl "http://127.0.0.1:8765/forecast?series=market%3DEU&horizon=6"
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from config import (
+    FORECAST_HORIZON,
+    FORECAST_ALPHA,
+    HIERARCHY_MANIFEST_FILE,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_WORKERS,
+    SERVICE_MAX_HORIZON,
+    SERVICE_LOAD_HIERARCHY,
+    SERVICE_LATENCY_WINDOW,
+    SERVICE_DEFAULT_SERIES,
+    SERVICE_BATCH_WINDOW_MS
+)
+from logger import setup_logger, log_section, log_success, log_warning, log_error, profile_run
+from model_utils import load_model, load_compact_model, saved_model_path
+from forecast import forecast_batch
+from forecast_batcher import ForecastBatcher
+
+logger = setup_logger(__name__)
+
+# Largest request head (request line + headers) accepted
+_MAX_HEAD_BYTES = 16 * 1024
+
+class RequestError(Exception):
+    """A request that cannot be answered, with its HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+def load_models(include_hierarchy: bool = SERVICE_LOAD_HIERARCHY,
+                manifest_path: Path = HIERARCHY_MANIFEST_FILE) -> Dict:
+    """
+    Load every saved model into memory.
+
+    Args:
+        include_hierarchy: Also load the per-node models listed in the
+            hierarchy manifest
+        manifest_path: Manifest written by train_hierarchy.py
+
+    Returns:
+        Dictionary of series key -> SARIMAX results
+    """
+    models = {}
+    if saved_model_path() is not None:
+        models[SERVICE_DEFAULT_SERIES] = load_model(check_metadata=False)
+
+    manifest_path = Path(manifest_path)
+    if include_hierarchy and manifest_path.exists():
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        for node, entry in manifest['nodes'].items():
+            if not entry.get('model_file'):
+                continue
+            try:
+                models[node] = load_compact_model(manifest_path.parent / entry['model_file'])
+            except Exception as e:
+                log_warning(logger, f"Could not load model of node '{node}': {e}")
+    return models
+
+class LatencyStats:
+    """
+    Request counts and recent latencies per endpoint.
+
+    Percentiles are computed over the last `window` requests of each
+    endpoint; counts cover the whole lifetime of the service.
+    """
+
+    def __init__(self, window: int = SERVICE_LATENCY_WINDOW):
+        self.window = window
+        self.started = time.time()
+        self._latencies = {}
+        self._counts = {}
+        self._errors = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True) -> None:
+        """Record one finished request."""
+        if endpoint not in self._latencies:
+            self._latencies[endpoint] = deque(maxlen=self.window)
+        self._latencies[endpoint].append(seconds)
+        self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+        if not ok:
+            self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def snapshot(self) -> Dict:
+        """Summarize the recorded requests."""
+        endpoints = {}
+        for endpoint, latencies in self._latencies.items():
+            ms = np.asarray(latencies) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            endpoints[endpoint] = {
+                'count': self._counts[endpoint],
+                'errors': self._errors.get(endpoint, 0),
+                'mean_ms': round(float(ms.mean()), 3),
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3),
+                'max_ms': round(float(ms.max()), 3)
+            }
+        return {'uptime_s': round(time.time() - self.started, 1), 'endpoints': endpoints}
+
+class ForecastService:
+    """
+    HTTP front end for a set of preloaded models.
+
+    Usage:
+        service = ForecastService(load_models())
+        server = await service.start("127.0.0.1", 8765)
+        async with server:
+            await server.serve_forever()
+    """
+
+    def __init__(self, models: Dict, workers: int = SERVICE_WORKERS,
+                 max_horizon: int = SERVICE_MAX_HORIZON,
+                 batch_window_ms: float = SERVICE_BATCH_WINDOW_MS):
+        self.models = models
+        self.max_horizon = max_horizon
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="forecast")
+        self.batcher = ForecastBatcher(self.compute_batch, self.executor, window_ms=batch_window_ms)
+        self.stats = LatencyStats()
+        # statsmodels results objects are not documented as thread-safe
+        self._locks = {key: threading.Lock() for key in models}
+        self._routes = {
+            '/forecast': self._forecast,
+            '/series': self._series,
+            '/metrics': self._metrics,
+            '/health': self._health
+        }
+
+    async def start(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+        """Start listening; port 0 picks a free port."""
+        return await asyncio.start_server(self._handle_connection, host, port,
+                                          limit=_MAX_HEAD_BYTES)
+
+    def close(self) -> None:
+        """Stop the compute threads."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def compute_batch(self, requests: List[Tuple]) -> List:
+        """Forecast a batch of (series, horizon, alpha) requests (runs in a worker thread)."""
+        # Locks are taken in sorted order so concurrent batches cannot deadlock
+        locks = [self._locks[series] for series in sorted({series for series, _, _ in requests})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            return forecast_batch(self.models, requests)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    async def _forecast(self, query: Dict) -> Dict:
+        series = query.get('series', SERVICE_DEFAULT_SERIES)
+        if series not in self.models:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown series '{series}'")
+        try:
+            horizon = int(query.get('horizon', FORECAST_HORIZON))
+            alpha = float(query.get('alpha', FORECAST_ALPHA))
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "horizon must be an integer and alpha a number")
+        if not 1 <= horizon <= self.max_horizon:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"horizon must be between 1 and {self.max_horizon}")
+        if not 0 < alpha < 1:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "alpha must be between 0 and 1")
+
+        forecast, conf_int = await self.batcher.submit(series, horizon, alpha)
+        return {
+            'series': series,
+            'horizon': horizon,
+            'alpha': alpha,
+            'dates': [str(date.date()) for date in forecast.index],
+            'forecast': forecast.round(4).tolist(),
+            'lower': conf_int.iloc[:, 0].round(4).tolist(),
+            'upper': conf_int.iloc[:, 1].round(4).tolist()
+        }
+
+    async def _series(self, query: Dict) -> Dict:
+        return {'series': sorted(self.models)}
+
+    async def _metrics(self, query: Dict) -> Dict:
+        return dict(self.stats.snapshot(), batching=self.batcher.stats())
+
+    async def _health(self, query: Dict) -> Dict:
+        return {'status': 'ok', 'models': len(self.models)}
+
+    async def _dispatch(self, method: str, target: str):
+        """Answer one request; returns (status, payload, endpoint)."""
+        url = urlsplit(target)
+        handler = self._routes.get(url.path)
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {'error': f"No endpoint {url.path}"}, 'other'
+        if method != 'GET':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "Only GET is supported"}, url.path
+
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            return HTTPStatus.OK, await handler(query), url.path
+        except RequestError as e:
+            return e.status, {'error': str(e)}, url.path
+        except Exception as e:
+            log_error(logger, f"{url.path} failed: {e}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(e).__name__}: {e}"}, url.path
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                        {'error': "Request head too large"}, keep_alive=False)
+                    break
+
+                start = time.perf_counter()
+                lines = head.decode('latin-1').split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST,
+                                        {'error': "Malformed request line"}, keep_alive=False)
+                    break
+                headers = {
+                    name.strip().lower(): value.strip()
+                    for name, _, value in (line.partition(":") for line in lines[1:] if line)
+                }
+                # Request bodies are never read, so only GET keeps the connection
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1' and method == 'GET')
+
+                status, payload, endpoint = await self._dispatch(method, target)
+                await self._respond(writer, status, payload, keep_alive)
+                self.stats.record(endpoint, time.perf_counter() - start, ok=status < 400)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus,
+                       payload: Dict, keep_alive: bool) -> None:
+        """Write a JSON response."""
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+async def serve(host: str, port: int, models: Dict, workers: int,
+                batch_window_ms: float = SERVICE_BATCH_WINDOW_MS) -> None:
+    """Run the service until interrupted."""
+    service = ForecastService(models, workers=workers, batch_window_ms=batch_window_ms)
+    server = await service.start(host, port)
+    log_success(logger, f"Serving {len(models)} model(s) on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Serve forecasts over HTTP")
+    parser.add_argument("--host", default=SERVICE_HOST, help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="Port to listen on")
+    parser.add_argument(
+        "--workers", type=int, default=SERVICE_WORKERS,
+        help="Threads running model computations"
+    )
+    parser.add_argument(
+        "--batch-window", type=float, default=SERVICE_BATCH_WINDOW_MS,
+        help="Milliseconds to collect concurrent requests into one batch"
+    )
+    parser.add_argument(
+        "--hierarchy", action=argparse.BooleanOptionalAction, default=SERVICE_LOAD_HIERARCHY,
+        help="Also serve the per-node hierarchy models"
+    )
+    return parser.parse_args(argv)
+
+@profile_run("forecast_service")
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        log_section(logger, "FORECAST SERVICE")
+
+        start = time.time()
+        models = load_models(include_hierarchy=args.hierarchy)
+        if not models:
+            raise FileNotFoundError("No saved models found - run train_sarima.py first")
+        log_success(logger, f"Loaded {len(models)} model(s) in {time.time() - start:.1f}s")
+
+        asyncio.run(serve(args.host, args.port, models, args.workers, args.batch_window))
+
+    except KeyboardInterrupt:
+        logger.info("Service stopped")
+    except Exception as e:
+        log_error(logger, f"Forecast service failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Hierarchical Monthly Series
+
+Builds the monthly sales series for every node of the reporting
+hierarchy (total, market, market/region, category, ...) from the cleaned
+transactions. The transaction table is grouped only once, by month and
+by every column used in any level; each level is then summed from that
+much smaller bottom-level table.
+
+Nodes are identified by strings such as "total", "market=EU" or
+"category=Technology|sub_category=Phones".
+
+Usage:
+    from hierarchy import load_hierarchy_series
+    wide = load_hierarchy_series()   # months x nodes
+"""
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+from config import CLEANED_SALES_FILE, AGGREGATES_DIR, HIERARCHY_LEVELS
+from aggregates import cleaned_data_digest
+from sales_store import load_cleaned_sales
+
+TOTAL_NODE = "total"
+_MISSING_KEY = "unknown"
+
+# In-process memo: (data digest, levels, value) -> wide frame
+_MEMO = {}
+
+def level_columns(levels: Sequence[Tuple[str, ...]] = HIERARCHY_LEVELS) -> List[str]:
+    """Return every grouping column used by the levels, in first-seen order."""
+    columns = []
+    for level in levels:
+        for col in level:
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+def node_id(level: Tuple[str, ...], key: Tuple = ()) -> str:
+    """
+    Build the identifier of a hierarchy node.
+
+    Args:
+        level: Grouping columns of the node's level
+        key: Values of those columns
+
+    Returns:
+        "total" for the empty level, otherwise "col=value|col=value"
+    """
+    if not level:
+        return TOTAL_NODE
+    values = [_MISSING_KEY if pd.isna(v) else str(v) for v in key]
+    return "|".join(f"{col}={value}" for col, value in zip(level, values))
+
+def parse_node_id(node: str) -> Dict[str, str]:
+    """Return the {column: value} mapping encoded in a node identifier."""
+    if node == TOTAL_NODE:
+        return {}
+    return dict(part.split("=", 1) for part in node.split("|"))
+
+def node_filename(node: str, suffix: str = ".npz") -> str:
+    """
+    Return a filesystem-safe file name for a node.
+
+    A short hash keeps names unique when two values slugify alike.
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", node).strip("-").lower()[:80]
+    digest = hashlib.sha1(node.encode("utf-8")).hexdigest()[:8]
+    return f"{slug}_{digest}{suffix}"
+
+def bottom_level_series(df: pd.DataFrame, levels: Sequence[Tuple[str, ...]] = HIERARCHY_LEVELS,
+                        value: str = "sales", date_column: str = "order_date") -> pd.DataFrame:
+    """
+    Aggregate transactions to monthly totals per combination of all level columns.
+
+    This is the only pass over the transaction table.
+
+    Args:
+        df: Cleaned transactions
+        levels: Hierarchy levels
+        value: Column to sum
+        date_column: Datetime column to group by month
+
+    Returns:
+        Frame indexed by month-end date with one column per observed
+        combination (a MultiIndex over level_columns(levels))
+    """
+    columns = level_columns(levels)
+    grouped = df.groupby(
+        [pd.Grouper(key=date_column, freq="M")] + columns,
+        observed=True, dropna=False, sort=True
+    )[value].sum()
+
+    if columns:
+        bottom = grouped.unstack(columns, fill_value=0.0)
+    else:
+        bottom = grouped.to_frame(TOTAL_NODE)
+
+    months = pd.date_range(bottom.index.min(), bottom.index.max(), freq="M")
+    return bottom.reindex(months, fill_value=0.0).astype(float)
+
+def aggregate_levels(bottom: pd.DataFrame,
+                     levels: Sequence[Tuple[str, ...]] = HIERARCHY_LEVELS) -> pd.DataFrame:
+    """
+    Sum the bottom-level series up to every node of every level.
+
+    Args:
+        bottom: Output of bottom_level_series()
+        levels: Hierarchy levels
+
+    Returns:
+        Frame of months x nodes, columns named by node_id()
+    """
+    frames = []
+    for level in levels:
+        if not level:
+            frames.append(bottom.sum(axis=1).to_frame(TOTAL_NODE))
+            continue
+        summed = bottom.T.groupby(level=list(level), dropna=False, sort=True).sum().T
+        keys = summed.columns if len(level) > 1 else [(k,) for k in summed.columns]
+        summed.columns = [node_id(level, key) for key in keys]
+        frames.append(summed)
+
+    wide = pd.concat(frames, axis=1)
+    wide = wide.loc[:, ~wide.columns.duplicated()]
+    wide.index.freq = "M"
+    return wide
+
+def build_hierarchy_series(df: pd.DataFrame, levels: Sequence[Tuple[str, ...]] = HIERARCHY_LEVELS,
+                           value: str = "sales", date_column: str = "order_date") -> pd.DataFrame:
+    """
+    Build the monthly series of every hierarchy node from transactions.
+
+    Args:
+        df: Cleaned transactions
+        levels: Hierarchy levels
+        value: Column to sum
+        date_column: Datetime column to group by month
+
+    Returns:
+        Frame of months x nodes
+    """
+    bottom = bottom_level_series(df, levels, value, date_column)
+    return aggregate_levels(bottom, levels)
+
+def _levels_digest(levels: Sequence[Tuple[str, ...]]) -> str:
+    """Short hash of the level definition, part of the cache key."""
+    return hashlib.sha1(repr([tuple(level) for level in levels]).encode()).hexdigest()[:8]
+
+def _write_hierarchy(wide: pd.DataFrame, path: Path, value: str) -> None:
+    """
+    Persist the node series, removing older versions.
+
+    Written under a temporary name and renamed into place, like the
+    monthly aggregates, so a concurrent reader never sees a partial file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for stale in path.parent.glob(f"hierarchy_{value}_*.csv"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    wide.to_csv(tmp_path)
+    tmp_path.replace(path)
+
+def load_hierarchy_series(levels: Sequence[Tuple[str, ...]] = HIERARCHY_LEVELS,
+                          value: str = "sales", path: Path = CLEANED_SALES_FILE,
+                          cache_dir: Path = AGGREGATES_DIR) -> pd.DataFrame:
+    """
+    Load the node series for the cleaned data, using the aggregate cache.
+
+    Args:
+        levels: Hierarchy levels
+        value: Column to sum per month
+        path: Path to the cleaned CSV file
+        cache_dir: Directory holding persisted aggregates
+
+    Returns:
+        Frame of months x nodes
+
+    Raises:
+        FileNotFoundError: If no cleaned data exists
+    """
+    digest = cleaned_data_digest(path, cache_dir)
+    levels_key = _levels_digest(levels)
+    memo_key = (digest, levels_key, value, str(cache_dir))
+    if memo_key in _MEMO:
+        return _MEMO[memo_key].copy()
+
+    cache_path = Path(cache_dir) / f"hierarchy_{value}_{digest[:16]}_{levels_key}.csv"
+    if cache_path.exists():
+        wide = pd.read_csv(cache_path, index_col=0, parse_dates=True).asfreq("M")
+    else:
+        columns = ["order_date", value] + level_columns(levels)
+        df = load_cleaned_sales(columns=columns, path=path)
+        wide = build_hierarchy_series(df, levels, value)
+        _write_hierarchy(wide, cache_path, value)
+
+    _MEMO[memo_key] = wide
+    return wide.copy()
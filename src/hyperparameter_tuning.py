@@ -2,39 +2,505 @@
 SARIMA Hyperparameter Tuning
 
 This module explores different SARIMA parameter combinations
-to find the optimal model based on AIC/BIC criteria.
+to find the optimal model based on AIC/BIC criteria, either with an
+exhaustive grid or with a stepwise (Hyndman-Khandakar) search.
 
 Usage:
     python src/hyperparameter_tuning.py
+    python src/hyperparameter_tuning.py --jobs 8
+    python src/hyperparameter_tuning.py --method stepwise
+    python src/hyperparameter_tuning.py --warm-start
 """
+import argparse
+import signal
+import threading
+import time
 import pandas as pd
 import numpy as np
+from concurrent.futures import as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from contextlib import contextmanager
 from itertools import product
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 import warnings
 warnings.filterwarnings('ignore')
 
-from config import CLEANED_SALES_FILE, SARIMA_ORDER, SARIMA_SEASONAL_ORDER
-from logger import setup_logger, log_section, log_success, log_warning
+from config import (
+    SARIMA_ORDER,
+    SARIMA_SEASONAL_ORDER,
+    TUNING_N_JOBS,
+    TUNING_METHOD,
+    TUNING_AUTO_DIFF,
+    TUNING_RESULTS_FILE,
+    TUNING_CHECKPOINT_FILE,
+    TUNING_RESUME,
+    STEPWISE_MAX_ORDER,
+    STEPWISE_MAX_STEPS,
+    TUNING_MAXITER,
+    TUNING_WARM_START,
+    TUNING_WARM_START_BASELINE,
+    TUNING_FIT_TIMEOUT,
+    TUNING_TIME_BUDGET,
+    TUNING_BACKTEST_TOP,
+    ensure_directories
+)
+from logger import setup_logger, log_section, log_success, log_warning, span, profile_run
+import aggregates
+from differencing import select_differencing_orders
+from tuning_checkpoint import TuningCheckpoint
+from parallel import resolve_n_jobs, process_pool
+from backtesting import backtest_candidates
 
 logger = setup_logger(__name__)
 
 def load_monthly_sales():
     """Load and aggregate sales data to monthly level."""
-    df = pd.read_csv(CLEANED_SALES_FILE, parse_dates=["order_date"])
-    monthly_sales = (
-        df.set_index("order_date")
-          .resample("M")["sales"]
-          .sum()
-    )
+    monthly_sales = aggregates.load_monthly_sales()
     log_success(logger, f"Loaded {len(monthly_sales)} months of sales data")
     return monthly_sales
 
+def candidate_orders(p_range=(0, 2), d_range=(0, 2), q_range=(0, 2),
+                     P_range=(0, 2), D_range=(0, 2), Q_range=(0, 2), m=12):
+    """
+    List all (order, seasonal_order) pairs of a parameter grid.
+    
+    Returns:
+        List of ((p, d, q), (P, D, Q, m)) tuples in grid order
+    """
+    p_values = range(p_range[0], p_range[1] + 1)
+    d_values = range(d_range[0], d_range[1] + 1)
+    q_values = range(q_range[0], q_range[1] + 1)
+    P_values = range(P_range[0], P_range[1] + 1)
+    D_values = range(D_range[0], D_range[1] + 1)
+    Q_values = range(Q_range[0], Q_range[1] + 1)
+    
+    return [
+        ((p, d, q), (P, D, Q, m))
+        for p, d, q, P, D, Q in product(p_values, d_values, q_values,
+                                        P_values, D_values, Q_values)
+    ]
+
+class FitTimeout(Exception):
+    """Raised inside a fit when its time limit is exceeded."""
+
+@contextmanager
+def _fit_deadline(deadline):
+    """
+    Interrupt the enclosed block once the wall-clock deadline passes.
+    
+    Uses a real-time interval timer where available (POSIX, main thread),
+    which also covers start-parameter estimation. Elsewhere the limit is
+    only enforced by the optimizer callback in fit_candidate.
+    """
+    use_timer = (
+        deadline is not None and
+        hasattr(signal, "setitimer") and
+        threading.current_thread() is threading.main_thread()
+    )
+    if not use_timer:
+        yield
+        return
+    
+    def _on_timeout(signum, frame):
+        raise FitTimeout()
+    
+    previous_handler = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, max(deadline - time.time(), 1e-3))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+def _candidate_record(order, seasonal_order, status, elapsed=0.0, error=None):
+    """Build a result record without fit statistics."""
+    p, d, q = order
+    P, D, Q, m = seasonal_order
+    return {
+        'p': p, 'd': d, 'q': q,
+        'P': P, 'D': D, 'Q': Q,
+        'AIC': np.nan,
+        'BIC': np.nan,
+        'AICc': np.nan,
+        'order': tuple(order),
+        'seasonal_order': tuple(seasonal_order),
+        'n_params': np.nan,
+        'nobs_effective': np.nan,
+        'status': status,
+        'error': error,
+        'elapsed': elapsed,
+        'iterations': np.nan,
+        'warm_start': None,
+        'params': None
+    }
+
+def _order_size(order, seasonal_order):
+    """Number of ARMA coefficients, p + q + P + Q."""
+    return order[0] + order[2] + seasonal_order[0] + seasonal_order[2]
+
+def nested_seed(order, seasonal_order, fitted, criterion='AIC'):
+    """
+    Pick the fitted model whose parameters should start a candidate's fit.
+    
+    A seed must be nested in the candidate: the same d, D and m and no
+    larger p, q, P or Q, so each of its coefficients has a counterpart.
+    The closest such model (most coefficients) is preferred, then the
+    one with the lowest criterion.
+    
+    Args:
+        order: Candidate (p, d, q)
+        seasonal_order: Candidate (P, D, Q, m)
+        fitted: Result records of models fitted so far
+        criterion: Tie-breaker between equally close seeds
+    
+    Returns:
+        The seed's result record, or None if no nested model was fitted
+    """
+    (p, d, q), (P, D, Q, m) = order, seasonal_order
+    best = None
+    for record in fitted:
+        if not record.get('params') or not np.isfinite(record[criterion]):
+            continue
+        (sp, sd, sq), (sP, sD, sQ, sm) = record['order'], record['seasonal_order']
+        if (sd, sD, sm) != (d, D, m) or (sp, sq, sP, sQ) == (p, q, P, Q):
+            continue
+        if sp <= p and sq <= q and sP <= P and sQ <= Q:
+            rank = (-_order_size(record['order'], record['seasonal_order']), record[criterion])
+            if best is None or rank < best[0]:
+                best = (rank, record)
+    return best[1] if best is not None else None
+
+def map_start_params(params, param_names):
+    """
+    Map a nested model's parameters onto a larger model.
+    
+    Coefficients are matched by name (ar.L1, ma.S.L12, sigma2, ...);
+    lags the nested model does not have start at zero, which is exactly
+    the nested model's optimum inside the larger one.
+    
+    Args:
+        params: Dictionary of the nested model's parameters
+        param_names: Parameter names of the model being fitted
+    
+    Returns:
+        Array of start parameters, or None if a non-ARMA parameter has
+        no counterpart (statsmodels' defaults are used then)
+    """
+    start = []
+    for name in param_names:
+        if name in params:
+            start.append(params[name])
+        elif name.startswith(('ar.', 'ma.')):
+            start.append(0.0)
+        else:
+            return None
+    return np.array(start)
+
+def fit_candidate(series, order, seasonal_order,
+                  enforce_stationarity=False, enforce_invertibility=False,
+                  maxiter=TUNING_MAXITER, timeout=None, deadline=None,
+                  start_params=None, seed=None):
+    """
+    Fit one SARIMA candidate and return its result record.
+    
+    Args:
+        series: Time series data
+        order: (p, d, q)
+        seasonal_order: (P, D, Q, m)
+        enforce_stationarity: Passed to SARIMAX
+        enforce_invertibility: Passed to SARIMAX
+        maxiter: Maximum optimizer iterations
+        timeout: Wall-clock limit for this fit in seconds (None = no limit)
+        deadline: Absolute time.time() after which the fit is abandoned,
+            used for the global search budget
+        start_params: Parameters of a nested model (name -> value) to
+            start the optimizer from; see map_start_params
+        seed: Label of the model start_params came from, for the record
+    
+    Returns:
+        Result dictionary with status 'ok', 'failed', 'timeout' or
+        'skipped', the error message if any, the elapsed seconds, the
+        optimizer iterations, the warm-start seed and the fitted
+        parameters
+    """
+    start = time.time()
+    limits = [limit for limit in (deadline, start + timeout if timeout else None)
+              if limit is not None]
+    fit_deadline = min(limits) if limits else None
+    
+    if fit_deadline is not None and start >= fit_deadline:
+        return _candidate_record(order, seasonal_order, 'skipped',
+                                 error="time budget exhausted")
+    
+    def _check_deadline(params):
+        if fit_deadline is not None and time.time() > fit_deadline:
+            raise FitTimeout()
+    
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    try:
+        with _fit_deadline(fit_deadline):
+            model = SARIMAX(
+                series,
+                order=order,
+                seasonal_order=seasonal_order,
+                enforce_stationarity=enforce_stationarity,
+                enforce_invertibility=enforce_invertibility
+            )
+            warm = map_start_params(start_params, model.param_names) if start_params else None
+            
+            try:
+                fitted = model.fit(disp=False, maxiter=maxiter, callback=_check_deadline,
+                                   start_params=warm)
+            except Exception:
+                # A seed the model rejects must not lose the candidate
+                if warm is None or (fit_deadline is not None and time.time() >= fit_deadline):
+                    raise
+                warm = None
+                fitted = model.fit(disp=False, maxiter=maxiter, callback=_check_deadline)
+    except Exception as e:
+        # The alarm can fire inside compiled code, which re-raises it as
+        # some other error type; anything past the deadline is a timeout.
+        if isinstance(e, FitTimeout) or (fit_deadline is not None and
+                                         time.time() >= fit_deadline):
+            return _candidate_record(order, seasonal_order, 'timeout',
+                                     elapsed=time.time() - start,
+                                     error=f"exceeded {fit_deadline - start:.1f}s")
+        return _candidate_record(order, seasonal_order, 'failed',
+                                 elapsed=time.time() - start,
+                                 error=f"{type(e).__name__}: {e}")
+    
+    record = _candidate_record(order, seasonal_order, 'ok', elapsed=time.time() - start)
+    record.update({
+        'AIC': fitted.aic,
+        'BIC': fitted.bic,
+        'AICc': fitted.aicc,
+        'n_params': len(fitted.params),
+        'nobs_effective': int(fitted.nobs_effective),
+        'iterations': (fitted.mle_retvals or {}).get('iterations', np.nan),
+        'warm_start': seed if warm is not None else None,
+        'params': {name: float(value) for name, value in zip(model.param_names, fitted.params)}
+    })
+    return record
+
+def is_viable(record, criterion='AIC'):
+    """
+    Check that a fit is usable for model selection.
+    
+    Rejects failed or timed-out fits, non-finite criteria, and degenerate
+    fits where differencing and burn-in leave too few observations for
+    the number of parameters (these produce meaningless, very low AIC
+    values).
+    """
+    return (
+        record['status'] == 'ok' and
+        np.isfinite(record[criterion]) and
+        record['nobs_effective'] > record['n_params'] + 1
+    )
+
+def _default_fit_options(fit_options=None):
+    """fit_candidate options with the search defaults filled in."""
+    fit_options = dict(fit_options or {})
+    fit_options.setdefault('enforce_stationarity', False)
+    fit_options.setdefault('enforce_invertibility', False)
+    fit_options.setdefault('maxiter', TUNING_MAXITER)
+    return fit_options
+
+def _run_candidates(series, candidates, n_jobs, fit_options=None, deadline=None,
+                    checkpoint=None, seed_records=None):
+    """
+    Fit candidates sequentially or across a process pool.
+    
+    Candidates already in the checkpoint are returned straight away and
+    every newly finished fit is appended to it. Once the deadline passes,
+    running fits are interrupted and the remaining candidates are
+    returned as 'skipped' without being fitted.
+    
+    With seed_records, each fit is warm-started from the parameters of
+    its closest nested model among them (see nested_seed).
+    
+    Args:
+        series: Time series data
+        candidates: List of (order, seasonal_order) pairs
+        n_jobs: Worker processes (1 = sequential, -1 = all cores)
+        fit_options: Extra keyword arguments for fit_candidate
+        deadline: Absolute time.time() at which the search must stop
+        checkpoint: Optional TuningCheckpoint for this series
+        seed_records: Records of earlier fits to warm-start from (None =
+            statsmodels' default start parameters)
+    
+    Yields:
+        (candidate index, result record) as each fit finishes
+    """
+    fit_options = _default_fit_options(fit_options)
+    if seed_records is not None:
+        # Only warm-started fits get a different checkpoint key
+        fit_options['warm_start'] = True
+    
+    todo = []
+    for i, (order, seasonal_order) in enumerate(candidates):
+        record = (checkpoint.lookup(order, seasonal_order, fit_options)
+                  if checkpoint is not None else None)
+        if record is not None:
+            yield i, record
+        else:
+            todo.append(i)
+    if checkpoint is not None and len(todo) < len(candidates):
+        logger.info(f"Reused {len(candidates) - len(todo)} checkpointed fit(s)")
+    
+    def finished(i, record):
+        if checkpoint is not None:
+            checkpoint.save(*candidates[i], fit_options, record)
+        return i, record
+    
+    run_options = dict(fit_options, deadline=deadline)
+    run_options.pop('warm_start', None)
+    
+    def options(i):
+        seed = nested_seed(*candidates[i], seed_records) if seed_records else None
+        if seed is None:
+            return run_options
+        return dict(run_options, start_params=seed['params'],
+                    seed=f"{seed['order']}x{seed['seasonal_order']}")
+    
+    n_jobs = min(resolve_n_jobs(n_jobs), max(len(todo), 1))
+    
+    if n_jobs == 1:
+        for i in todo:
+            order, seasonal_order = candidates[i]
+            yield finished(i, fit_candidate(series, order, seasonal_order, **options(i)))
+        return
+    
+    with process_pool(n_jobs) as executor:
+        futures = {
+            executor.submit(fit_candidate, series, *candidates[i], **options(i)): i
+            for i in todo
+        }
+        pending = set(futures)
+        while pending:
+            remaining = None if deadline is None else max(deadline - time.time(), 0)
+            try:
+                for future in as_completed(pending, timeout=remaining):
+                    pending.discard(future)
+                    yield finished(futures[future], future.result())
+            except FuturesTimeout:
+                # Budget spent: drop queued fits, running ones stop at the deadline
+                for future in list(pending):
+                    if future.cancel():
+                        pending.discard(future)
+                        order, seasonal_order = candidates[futures[future]]
+                        yield futures[future], _candidate_record(
+                            order, seasonal_order, 'skipped',
+                            error="time budget exhausted"
+                        )
+                deadline = None
+
+def results_to_frame(records, criterion='AIC'):
+    """
+    Build the results table sorted by a criterion.
+    
+    Args:
+        records: List of (candidate index, result record) pairs
+        criterion: Column to sort by
+    
+    Returns:
+        DataFrame sorted by the criterion (failed fits last), ties kept
+        in candidate order; fitted parameters are not included
+    """
+    records = [
+        {k: v for k, v in record.items() if k != 'params'}
+        for _, record in sorted(records, key=lambda item: item[0])
+    ]
+    results_df = pd.DataFrame(records)
+    if results_df.empty:
+        return results_df
+    return results_df.sort_values(criterion, kind='mergesort').reset_index(drop=True)
+
+def add_cold_iterations(series, results_df, fit_options=None, n_jobs=1, deadline=None,
+                        checkpoint=None, sample=TUNING_WARM_START_BASELINE):
+    """
+    Add the iterations warm-started fits would have needed from a cold start.
+    
+    Cold fits of the same candidates found in the checkpoint are reused;
+    up to `sample` others, best first, are refitted from statsmodels'
+    default start parameters (and checkpointed, so later runs reuse them).
+    
+    Args:
+        series: Time series data
+        results_df: Search results (see results_to_frame)
+        fit_options: Extra keyword arguments the search passed to fit_candidate
+        n_jobs: Worker processes for the cold refits
+        deadline: Absolute time.time() at which the search must stop
+        checkpoint: Optional TuningCheckpoint for this series
+        sample: Maximum number of cold refits
+    
+    Returns:
+        Copy of results_df with a 'cold_iterations' column (NaN where
+        there is no cold reference)
+    """
+    results_df = results_df.copy()
+    results_df['cold_iterations'] = np.nan
+    if results_df.empty:
+        return results_df
+    
+    cold_options = _default_fit_options(fit_options)
+    warm = results_df.index[(results_df['status'] == 'ok') & results_df['warm_start'].notna()]
+    cold_records, todo = {}, []
+    for row in warm:
+        candidate = (results_df.at[row, 'order'], results_df.at[row, 'seasonal_order'])
+        record = checkpoint.lookup(*candidate, cold_options) if checkpoint is not None else None
+        if record is not None:
+            cold_records[row] = record
+        elif len(todo) < sample:
+            todo.append(row)
+    
+    candidates = [(results_df.at[row, 'order'], results_df.at[row, 'seasonal_order']) for row in todo]
+    for index, record in _run_candidates(series, candidates, n_jobs, cold_options,
+                                         deadline, checkpoint):
+        cold_records[todo[index]] = record
+    
+    for row, record in cold_records.items():
+        if record['status'] == 'ok':
+            results_df.at[row, 'cold_iterations'] = record['iterations']
+    return results_df
+
+def log_fit_summary(results_df):
+    """Log how many fits succeeded, failed, timed out or were skipped."""
+    counts = results_df['status'].value_counts() if not results_df.empty else {}
+    log_success(logger, f"Successfully fitted {counts.get('ok', 0)} models "
+                        f"in {results_df['elapsed'].sum() if len(results_df) else 0:.1f}s of fit time")
+    for status in ('failed', 'timeout', 'skipped'):
+        if counts.get(status, 0):
+            log_warning(logger, f"{counts[status]} candidate(s) {status}")
+    if counts.get('timeout', 0):
+        example = results_df[results_df["status"] == "timeout"].iloc[0]
+        logger.info(f"  e.g. SARIMA{example['order']}x{example['seasonal_order']}: {example['error']}")
+    
+    ok = results_df[results_df['status'] == 'ok'] if len(results_df) else results_df
+    if 'iterations' in ok and ok['iterations'].notna().any():
+        warm = ok['warm_start'].notna()
+        logger.info(f"Optimizer iterations: {int(ok['iterations'].sum())} in total, "
+                    f"{ok['iterations'].mean():.1f} per fit "
+                    f"({warm.sum()} of {len(ok)} fits warm-started)")
+    if 'cold_iterations' in ok and ok['cold_iterations'].notna().any():
+        compared = ok[ok['cold_iterations'].notna()]
+        cold, warm_iterations = compared['cold_iterations'].sum(), compared['iterations'].sum()
+        logger.info(f"Warm starts saved {int(cold - warm_iterations)} of {int(cold)} iterations "
+                    f"({(cold - warm_iterations) / cold:.0%}) on {len(compared)} fit(s) "
+                    f"refitted cold for reference")
+
 def grid_search_sarima(series, p_range=(0, 2), d_range=(0, 2), q_range=(0, 2),
-                       P_range=(0, 2), D_range=(0, 2), Q_range=(0, 2), m=12):
+                       P_range=(0, 2), D_range=(0, 2), Q_range=(0, 2), m=12,
+                       n_jobs=1, auto_diff=False, fit_timeout=None, time_budget=None,
+                       checkpoint=None, warm_start=False,
+                       warm_start_baseline=TUNING_WARM_START_BASELINE):
     """
     Perform grid search over SARIMA parameters.
     
+    With warm_start, candidates are fitted in waves of increasing size
+    (p + q + P + Q) so every fit can start from the parameters of a
+    nested model fitted in an earlier wave; each wave still runs in
+    parallel.
+    
     Args:
         series: Time series data
         p_range: Range for AR order (p)
@@ -44,69 +510,247 @@ def grid_search_sarima(series, p_range=(0, 2), d_range=(0, 2), q_range=(0, 2),
         D_range: Range for seasonal differencing order (D)
         Q_range: Range for seasonal MA order (Q)
         m: Seasonal period (12 for monthly data)
+        n_jobs: Worker processes (1 = sequential, -1 = all cores)
+        auto_diff: Fix d and D with select_differencing_orders instead
+            of searching d_range and D_range
+        fit_timeout: Wall-clock limit per candidate fit in seconds
+        time_budget: Wall-clock limit for the whole search in seconds
+        checkpoint: Optional TuningCheckpoint; candidates already in it
+            are not refitted and new fits are appended to it
+        warm_start: Seed each fit from the closest fitted nested model
+        warm_start_baseline: Warm-started candidates to refit cold to
+            report the iterations saved (see add_cold_iterations)
     
     Returns:
-        DataFrame with results sorted by AIC
+        DataFrame with one row per candidate sorted by AIC, including
+        status, error and elapsed columns for failed or timed-out fits
     """
-    results = []
+    if auto_diff:
+        d, D = select_differencing_orders(series, m)
+        d_range, D_range = (d, d), (D, D)
+        logger.info(f"Selected differencing orders: d={d}, D={D}")
     
-    # Generate all combinations
-    p_values = range(p_range[0], p_range[1] + 1)
-    d_values = range(d_range[0], d_range[1] + 1)
-    q_values = range(q_range[0], q_range[1] + 1)
-    P_values = range(P_range[0], P_range[1] + 1)
-    D_values = range(D_range[0], D_range[1] + 1)
-    Q_values = range(Q_range[0], Q_range[1] + 1)
-    
-    total_combinations = (
-        len(list(p_values)) * len(list(d_values)) * len(list(q_values)) *
-        len(list(P_values)) * len(list(D_values)) * len(list(Q_values))
-    )
+    candidates = candidate_orders(p_range, d_range, q_range,
+                                  P_range, D_range, Q_range, m)
+    total_combinations = len(candidates)
+    workers = min(resolve_n_jobs(n_jobs), max(total_combinations, 1))
+    deadline = time.time() + time_budget if time_budget else None
     
-    logger.info(f"\nTesting {total_combinations} parameter combinations...")
+    logger.info(f"\nTesting {total_combinations} parameter combinations "
+                f"on {workers} worker(s)...")
     logger.info("This may take a few minutes...\n")
     
-    count = 0
-    for p, d, q, P, D, Q in product(p_values, d_values, q_values, 
-                                      P_values, D_values, Q_values):
-        try:
-            count += 1
-            if count % 10 == 0:
-                logger.info(f"Progress: {count}/{total_combinations}")
-            
-            model = SARIMAX(
-                series,
-                order=(p, d, q),
-                seasonal_order=(P, D, Q, m),
-                enforce_stationarity=False,
-                enforce_invertibility=False
-            )
-            
-            fitted = model.fit(disp=False, maxiter=50)
-            
-            results.append({
-                'p': p, 'd': d, 'q': q,
-                'P': P, 'D': D, 'Q': Q,
-                'AIC': fitted.aic,
-                'BIC': fitted.bic,
-                'order': (p, d, q),
-                'seasonal_order': (P, D, Q, m)
-            })
-            
-        except Exception as e:
-            # Skip combinations that don't converge
-            continue
+    if warm_start:
+        sizes = sorted({_order_size(*candidate) for candidate in candidates})
+        waves = [[i for i, candidate in enumerate(candidates) if _order_size(*candidate) == size]
+                 for size in sizes]
+    else:
+        waves = [list(range(total_combinations))]
+    
+    records = []
+    for wave in waves:
+        seed_records = [record for _, record in records] if warm_start else None
+        for index, record in _run_candidates(series, [candidates[i] for i in wave], n_jobs,
+                                             {'timeout': fit_timeout}, deadline, checkpoint,
+                                             seed_records):
+            records.append((wave[index], record))
+            if len(records) % 10 == 0:
+                logger.info(f"Progress: {len(records)}/{total_combinations}")
     
-    # Convert to DataFrame and sort by AIC
-    results_df = pd.DataFrame(results)
-    results_df = results_df.sort_values('AIC').reset_index(drop=True)
+    results_df = results_to_frame(records)
+    if warm_start:
+        results_df = add_cold_iterations(series, results_df, {'timeout': fit_timeout}, n_jobs,
+                                         deadline, checkpoint, warm_start_baseline)
     
-    log_success(logger, f"Successfully fitted {len(results_df)} models")
+    log_fit_summary(results_df)
     return results_df
 
-def main():
+def _stepwise_neighbours(order, seasonal_order, max_order):
+    """
+    Return the neighbouring models of one stepwise step.
+    
+    Varies p, q, P and Q by one, p and q together, and P and Q together,
+    keeping d, D and m fixed and staying within max_order.
+    """
+    (p, d, q), (P, D, Q, m) = order, seasonal_order
+    max_p, max_q, max_P, max_Q = max_order
+    moves = [
+        (1, 0, 0, 0), (-1, 0, 0, 0), (0, 1, 0, 0), (0, -1, 0, 0),
+        (1, 1, 0, 0), (-1, -1, 0, 0),
+        (0, 0, 1, 0), (0, 0, -1, 0), (0, 0, 0, 1), (0, 0, 0, -1),
+        (0, 0, 1, 1), (0, 0, -1, -1)
+    ]
+    neighbours = []
+    for dp, dq, dP, dQ in moves:
+        new_p, new_q, new_P, new_Q = p + dp, q + dq, P + dP, Q + dQ
+        if (0 <= new_p <= max_p and 0 <= new_q <= max_q and
+                0 <= new_P <= max_P and 0 <= new_Q <= max_Q):
+            neighbours.append(((new_p, d, new_q), (new_P, D, new_Q, m)))
+    return neighbours
+
+def stepwise_search_sarima(series, start_order=SARIMA_ORDER,
+                           start_seasonal_order=SARIMA_SEASONAL_ORDER,
+                           criterion='AICc', max_order=STEPWISE_MAX_ORDER,
+                           max_steps=STEPWISE_MAX_STEPS, enforce=True, n_jobs=1,
+                           auto_diff=False, fit_timeout=None, time_budget=None,
+                           checkpoint=None, warm_start=False,
+                           warm_start_baseline=TUNING_WARM_START_BASELINE):
+    """
+    Stepwise (Hyndman-Khandakar) search over SARIMA orders.
+    
+    Fits the configured model plus the four standard starting models,
+    then repeatedly moves to the best neighbour of the current model
+    until no neighbour improves the criterion. d, D and m are taken from
+    the starting orders and never changed. Degenerate fits (see
+    is_viable) are never selected.
+    
+    Stationarity and invertibility are enforced by default. Without
+    them SARIMAX uses a diffuse burn-in that grows with the model size,
+    so larger models are scored on fewer observations and the criterion
+    keeps improving as orders grow.
+    
+    Args:
+        series: Time series data
+        start_order: Starting (p, d, q)
+        start_seasonal_order: Starting (P, D, Q, m)
+        criterion: 'AICc' (default), 'AIC' or 'BIC'
+        max_order: Upper bounds for (p, q, P, Q)
+        max_steps: Maximum number of improvement steps
+        enforce: Enforce stationarity and invertibility in every fit
+        n_jobs: Worker processes for each step's candidates
+        auto_diff: Replace the starting d and D with the orders chosen by
+            select_differencing_orders
+        fit_timeout: Wall-clock limit per candidate fit in seconds
+        time_budget: Wall-clock limit for the whole search in seconds;
+            the best model found so far is kept when it runs out
+        checkpoint: Optional TuningCheckpoint; candidates already in it
+            are not refitted and new fits are appended to it
+        warm_start: Seed each fit from the closest nested model evaluated
+            in an earlier step
+        warm_start_baseline: Warm-started candidates to refit cold to
+            report the iterations saved (see add_cold_iterations)
+    
+    Returns:
+        DataFrame of every evaluated model sorted by the criterion
+    """
+    d, D, m = start_order[1], start_seasonal_order[1], start_seasonal_order[3]
+    if auto_diff:
+        d, D = select_differencing_orders(series, m)
+        start_order = (start_order[0], d, start_order[2])
+        start_seasonal_order = (start_seasonal_order[0], D, start_seasonal_order[2], m)
+        logger.info(f"Selected differencing orders: d={d}, D={D}")
+    initial = [
+        (tuple(start_order), tuple(start_seasonal_order)),
+        ((2, d, 2), (1, D, 1, m)),
+        ((0, d, 0), (0, D, 0, m)),
+        ((1, d, 0), (1, D, 0, m)),
+        ((0, d, 1), (0, D, 1, m))
+    ]
+    
+    evaluated = {}
+    fit_options = {
+        'enforce_stationarity': enforce,
+        'enforce_invertibility': enforce,
+        'timeout': fit_timeout
+    }
+    deadline = time.time() + time_budget if time_budget else None
+    
+    def evaluate(candidates):
+        """Fit candidates not seen before and return the best new record."""
+        pending = [c for c in dict.fromkeys(candidates) if c not in evaluated]
+        seed_records = list(evaluated.values()) if warm_start else None
+        for index, record in _run_candidates(series, pending, n_jobs, fit_options,
+                                             deadline, checkpoint, seed_records):
+            evaluated[pending[index]] = record
+        fitted = [evaluated[c] for c in pending if is_viable(evaluated[c], criterion)]
+        return min(fitted, key=lambda r: r[criterion], default=None)
+    
+    logger.info(f"\nStepwise search from SARIMA{tuple(start_order)}x{tuple(start_seasonal_order)} "
+                f"by {criterion}...")
+    best = evaluate(initial)
+    if best is None:
+        raise ValueError("None of the starting models could be fitted")
+    
+    for step in range(1, max_steps + 1):
+        if deadline is not None and time.time() >= deadline:
+            log_warning(logger, "Time budget exhausted, keeping best model so far")
+            break
+        neighbours = _stepwise_neighbours(best['order'], best['seasonal_order'], max_order)
+        candidate = evaluate(neighbours)
+        if candidate is None or candidate[criterion] >= best[criterion]:
+            break
+        best = candidate
+        logger.info(f"Step {step}: SARIMA{best['order']}x{best['seasonal_order']} "
+                    f"{criterion}={best[criterion]:.2f}")
+    
+    results_df = results_to_frame(list(enumerate(evaluated.values())), criterion)
+    if warm_start:
+        results_df = add_cold_iterations(series, results_df, fit_options, n_jobs,
+                                         deadline, checkpoint, warm_start_baseline)
+    
+    logger.info(f"Stepwise search evaluated {len(results_df)} models")
+    log_fit_summary(results_df)
+    return results_df
+
+def add_backtest_scores(series, results_df, top=TUNING_BACKTEST_TOP, n_jobs=1):
+    """
+    Backtest the best candidates and add their rolling-origin errors.
+    
+    Args:
+        series: Time series data
+        results_df: Sorted results table from results_to_frame()
+        top: Number of successful candidates to backtest
+        n_jobs: Worker processes
+    
+    Returns:
+        The results table with backtest_mae, backtest_rmse and
+        backtest_mape columns (NaN for candidates not backtested)
+    """
+    results_df = results_df.copy()
+    best = results_df[results_df['status'] == 'ok'].head(top)
+    scores = backtest_candidates(
+        series,
+        list(zip(best['order'], best['seasonal_order'])),
+        n_jobs=n_jobs
+    )
+    for metric in ('mae', 'rmse', 'mape'):
+        results_df[f'backtest_{metric}'] = np.nan
+        results_df.loc[best.index, f'backtest_{metric}'] = scores[metric].to_numpy()
+    return results_df
+
+def parse_args(argv=None):
+    """Parse command-line options for hyperparameter tuning."""
+    parser = argparse.ArgumentParser(description="Tune SARIMA hyperparameters")
+    parser.add_argument("--jobs", type=int, default=TUNING_N_JOBS,
+                        help=f"worker processes, -1 for all cores (default: {TUNING_N_JOBS})")
+    parser.add_argument("--method", choices=["grid", "stepwise"], default=TUNING_METHOD,
+                        help=f"search strategy (default: {TUNING_METHOD})")
+    parser.add_argument("--auto-diff", action=argparse.BooleanOptionalAction,
+                        default=TUNING_AUTO_DIFF,
+                        help="choose d and D with unit-root/seasonality tests before searching")
+    parser.add_argument("--fit-timeout", type=float, default=TUNING_FIT_TIMEOUT,
+                        help=f"seconds allowed per candidate fit (default: {TUNING_FIT_TIMEOUT})")
+    parser.add_argument("--time-budget", type=float, default=TUNING_TIME_BUDGET,
+                        help=f"seconds allowed for the whole search (default: {TUNING_TIME_BUDGET})")
+    parser.add_argument("--resume", action=argparse.BooleanOptionalAction, default=TUNING_RESUME,
+                        help="reuse fits checkpointed by earlier runs")
+    parser.add_argument("--warm-start", action=argparse.BooleanOptionalAction,
+                        default=TUNING_WARM_START,
+                        help="start each fit from the parameters of a fitted nested model")
+    parser.add_argument("--warm-start-baseline", type=int, default=TUNING_WARM_START_BASELINE,
+                        help="warm-started candidates refitted cold to report the iterations "
+                             f"saved (default: {TUNING_WARM_START_BASELINE})")
+    parser.add_argument("--backtest-top", type=int, default=TUNING_BACKTEST_TOP,
+                        help="backtest the N best candidates on rolling origins (default: "
+                             f"{TUNING_BACKTEST_TOP})")
+    return parser.parse_args(argv)
+
+@profile_run("hyperparameter_tuning")
+def main(argv=None):
+    args = parse_args(argv)
     try:
         log_section(logger, "SARIMA HYPERPARAMETER TUNING")
+        ensure_directories()
         
         # Load data
         sales = load_monthly_sales()
@@ -114,27 +758,53 @@ def main():
         # Current model parameters
         logger.info(f"\nCurrent model: SARIMA{SARIMA_ORDER}x{SARIMA_SEASONAL_ORDER}")
         
-        # Perform grid search (limited range for speed)
-        logger.info("\nPerforming grid search...")
-        logger.info("Parameter ranges:")
-        logger.info("  p, q: 0-2")
-        logger.info("  d: 0-2")
-        logger.info("  P, Q: 0-2")
-        logger.info("  D: 0-2")
-        logger.info("  m: 12 (fixed)")
+        # Every finished fit is checkpointed so an interrupted run can resume
+        if not args.resume and TUNING_CHECKPOINT_FILE.exists():
+            TUNING_CHECKPOINT_FILE.unlink()
+        checkpoint = TuningCheckpoint(sales, TUNING_CHECKPOINT_FILE)
+        if len(checkpoint):
+            logger.info(f"Checkpoint holds {len(checkpoint)} earlier fit(s)")
         
-        results = grid_search_sarima(
-            sales,
-            p_range=(0, 2), d_range=(0, 2), q_range=(0, 2),
-            P_range=(0, 2), D_range=(0, 2), Q_range=(0, 2)
-        )
+        if args.method == "stepwise":
+            logger.info("\nPerforming stepwise search...")
+            with span("stepwise search"):
+                results = stepwise_search_sarima(sales, n_jobs=args.jobs,
+                                                 auto_diff=args.auto_diff,
+                                                 fit_timeout=args.fit_timeout,
+                                                 time_budget=args.time_budget,
+                                                 checkpoint=checkpoint,
+                                                 warm_start=args.warm_start,
+                                                 warm_start_baseline=args.warm_start_baseline)
+            criterion = 'AICc'
+        else:
+            # Perform grid search (limited range for speed)
+            logger.info("\nPerforming grid search...")
+            logger.info("Parameter ranges:")
+            logger.info("  p, q: 0-2")
+            logger.info("  d: " + ("auto" if args.auto_diff else "0-2"))
+            logger.info("  P, Q: 0-2")
+            logger.info("  D: " + ("auto" if args.auto_diff else "0-2"))
+            logger.info("  m: 12 (fixed)")
+            
+            with span("grid search"):
+                results = grid_search_sarima(
+                    sales,
+                    p_range=(0, 2), d_range=(0, 2), q_range=(0, 2),
+                    P_range=(0, 2), D_range=(0, 2), Q_range=(0, 2),
+                    n_jobs=args.jobs, auto_diff=args.auto_diff,
+                    fit_timeout=args.fit_timeout, time_budget=args.time_budget,
+                    checkpoint=checkpoint, warm_start=args.warm_start,
+                    warm_start_baseline=args.warm_start_baseline
+                )
+            criterion = 'AIC'
         
         # Display top 10 models
-        log_section(logger, "TOP 10 MODELS BY AIC")
+        log_section(logger, f"TOP 10 MODELS BY {criterion}")
         logger.info("\n" + results.head(10).to_string(index=False))
         
         # Highlight current model
         current_model = results[
+            (results['status'] == 'ok') &
             (results['p'] == SARIMA_ORDER[0]) &
             (results['d'] == SARIMA_ORDER[1]) &
             (results['q'] == SARIMA_ORDER[2]) &
@@ -146,21 +816,28 @@ def main():
         if not current_model.empty:
             rank = current_model.index[0] + 1
             logger.info(f"\n\nCurrent model rank: #{rank} out of {len(results)}")
-            logger.info(f"Current model AIC: {current_model['AIC'].values[0]:.2f}")
-            logger.info(f"Best model AIC: {results['AIC'].iloc[0]:.2f}")
+            logger.info(f"Current model {criterion}: {current_model[criterion].values[0]:.2f}")
+            logger.info(f"Best model {criterion}: {results[criterion].iloc[0]:.2f}")
             
-            improvement = current_model['AIC'].values[0] - results['AIC'].iloc[0]
+            improvement = current_model[criterion].values[0] - results[criterion].iloc[0]
             if improvement > 2:
-                log_warning(logger, f"Potential improvement: {improvement:.2f} AIC points")
+                log_warning(logger, f"Potential improvement: {improvement:.2f} {criterion} points")
                 logger.info(f"\nRecommended model: SARIMA{results['order'].iloc[0]}x{results['seasonal_order'].iloc[0]}")
             else:
                 log_success(logger, "Current model is near-optimal!")
         
+        if args.backtest_top > 0:
+            log_section(logger, f"BACKTEST OF TOP {args.backtest_top} MODELS")
+            with span("backtest"):
+                results = add_backtest_scores(sales, results, args.backtest_top, n_jobs=args.jobs)
+            backtested = results.dropna(subset=['backtest_mae']).sort_values('backtest_mae')
+            logger.info("\n" + backtested[
+                ['order', 'seasonal_order', criterion, 'backtest_mae', 'backtest_rmse', 'backtest_mape']
+            ].to_string(index=False))
+        
         # Save results
-        from config import RESULTS_DIR
-        results_file = RESULTS_DIR / "hyperparameter_tuning_results.csv"
-        results.to_csv(results_file, index=False)
-        log_success(logger, f"Results saved to {results_file}")
+        results.to_csv(TUNING_RESULTS_FILE, index=False)
+        log_success(logger, f"Results saved to {TUNING_RESULTS_FILE}")
         
         log_section(logger, "TUNING COMPLETED")
         
@@ -1,15 +1,56 @@
 """
 Centralized logging configuration for the sales forecasting project.
+
+With LOG_QUEUE set, module loggers only put records on a queue and one
+background thread formats and writes them, so logging from a hot loop
+does not wait for the console or the disk. Worker processes started by
+parallel.process_pool forward their records to the parent the same way,
+so lines from several workers never interleave in the log file.
+
+Also provides lightweight profiling: `span` times a block of code (with
+resident and, optionally, traced memory), spans nest, and `profile_run`
+wraps a stage's main so every run leaves a JSON report of its spans in
+RUN_REPORT_DIR.
+
+Usage:
+    @profile_run("train_sarima")
+    def main():
+        with span("load data"):
+            sales = load_monthly_sales()
 """
+import atexit
+import functools
+import json
 import logging
+import os
+import queue
 import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from config import LOG_FILE, LOG_LEVEL, LOG_FORMAT
+from typing import Dict, List, Optional
+from config import (
+    LOG_FILE,
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_QUEUE,
+    RUN_REPORT_DIR,
+    PROFILE_TRACEMALLOC,
+    PROFILE_TOP_ALLOCATIONS
+)
 
 def setup_logger(name: str, log_to_file: bool = True) -> logging.Logger:
     """
     Set up a logger with console and optional file output.
     
+    With LOG_QUEUE the logger gets a queue handler and the console and file
+    handlers run on the shared background listener. In a worker process
+    (see configure_worker_logging) records go to the parent instead.
+    
     Args:
         name: Name of the logger (usually __name__)
         log_to_file: Whether to also log to file
@@ -25,12 +66,6 @@ def setup_logger(name: str, log_to_file: bool = True) -> logging.Logger:
     
     logger.setLevel(getattr(logging, LOG_LEVEL))
     
-    # Console handler with UTF-8 encoding
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter('%(message)s')
-    console_handler.setFormatter(console_formatter)
-    
     # Fix Windows encoding issue (only if not in test mode)
     if sys.platform == 'win32' and not hasattr(sys.stdout, '_pytest_capture'):
         try:
@@ -41,17 +76,33 @@ def setup_logger(name: str, log_to_file: bool = True) -> logging.Logger:
             # If stdout is already wrapped or doesn't have buffer, skip
             pass
     
-    logger.addHandler(console_handler)
+    if _worker_queue is not None:
+        logger.addHandler(QueueHandler(_worker_queue))
+    elif LOG_QUEUE:
+        logger.addHandler(_BackgroundHandler(log_to_file))
+    else:
+        for handler in _output_handlers(log_to_file):
+            logger.addHandler(handler)
+    _configured_loggers.add(name)
+    
+    return logger
+
+def _output_handlers(log_to_file: bool = True) -> List[logging.Handler]:
+    """Console handler and, optionally, file handler, both UTF-8."""
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter('%(message)s'))
+    handlers = [console_handler]
     
-    # File handler with UTF-8 encoding
     if log_to_file:
-        file_handler = logging.FileHandler(LOG_FILE, mode='a', encoding='utf-8')
+        # delay=True: the file is only opened once something is logged
+        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.FileHandler(LOG_FILE, mode='a', encoding='utf-8', delay=True)
         file_handler.setLevel(logging.DEBUG)
-        file_formatter = logging.Formatter(LOG_FORMAT)
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(file_handler)
     
-    return logger
+    return handlers
 
 def log_section(logger: logging.Logger, title: str, width: int = 50):
     """Log a section header."""
@@ -70,3 +121,344 @@ def log_error(logger: logging.Logger, message: str):
 def log_warning(logger: logging.Logger, message: str):
     """Log a warning message."""
     logger.warning(f"⚠ {message}")
+
+# ============================================
+# QUEUE LOGGING
+# ============================================
+# Loggers configured by setup_logger in this process
+_configured_loggers = set()
+
+# Queue and thread writing the records of every queue-mode logger
+_log_queue: Optional[queue.Queue] = None
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+# Set in worker processes: records are sent to the parent through it
+_worker_queue = None
+
+class _BackgroundHandler(QueueHandler):
+    """Queue handler feeding the shared listener, which it starts on first use."""
+
+    def __init__(self, log_to_file: bool = True):
+        super().__init__(None)
+        self.log_to_file = log_to_file
+
+    def prepare(self, record):
+        # Render the message now, as QueueHandler does, so arguments
+        # changed before the listener writes the record do not show;
+        # the listener applies the handlers' formatters
+        record.msg = record.getMessage()
+        record.args = None
+        record.log_to_file = self.log_to_file
+        return record
+
+    def enqueue(self, record):
+        (_log_queue or _start_listener()).put_nowait(record)
+
+def _start_listener() -> queue.Queue:
+    """Start the background listener if needed and return its queue."""
+    global _log_queue, _listener
+    with _listener_lock:
+        if _log_queue is None:
+            handlers = _output_handlers()
+            # Records of loggers set up with log_to_file=False skip the file
+            handlers[-1].addFilter(lambda record: getattr(record, "log_to_file", True))
+            _listener = QueueListener(queue.Queue(), *handlers, respect_handler_level=True)
+            _listener.start()
+            _log_queue = _listener.queue
+        return _log_queue
+
+def flush_logs():
+    """Wait until the background listener has written every queued record."""
+    if _log_queue is not None:
+        _log_queue.join()
+
+def stop_log_listener():
+    """
+    Write out the queued records and stop the background listener.
+
+    Runs at interpreter exit. Logging afterwards starts a new listener.
+    """
+    global _log_queue, _listener
+    with _listener_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _log_queue, _listener = None, None
+
+atexit.register(stop_log_listener)
+
+class _ParentLoggerHandler(logging.Handler):
+    """Hands a record received from a worker to this process's logger of the same name."""
+
+    def handle(self, record):
+        logger = setup_logger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+        return True
+
+def configure_worker_logging(log_queue):
+    """
+    Send this worker process's log records to its parent.
+
+    Replaces the handlers that forked workers inherit (which would write
+    to the parent's console and file themselves, or to a queue nobody
+    reads in this process) with a handler putting records on log_queue.
+
+    Args:
+        log_queue: multiprocessing queue read by forward_worker_logs
+    """
+    global _worker_queue, _log_queue, _listener
+    _worker_queue = log_queue
+    # A forked worker inherits the parent's listener, but not its thread
+    _log_queue, _listener = None, None
+    for name in _configured_loggers:
+        logger = logging.getLogger(name)
+        logger.handlers.clear()
+        logger.addHandler(QueueHandler(log_queue))
+
+@contextmanager
+def forward_worker_logs(context=None):
+    """
+    Receive the log records of worker processes for as long as the block runs.
+
+    Usage:
+        with forward_worker_logs() as log_queue:
+            pool = ProcessPoolExecutor(initializer=configure_worker_logging,
+                                       initargs=(log_queue,))
+
+    Args:
+        context: multiprocessing context of the workers (default: the default context)
+
+    Yields:
+        Queue to pass to configure_worker_logging in each worker
+    """
+    if context is None:
+        import multiprocessing as context
+    log_queue = context.Queue()
+    listener = QueueListener(log_queue, _ParentLoggerHandler())
+    listener.start()
+    try:
+        yield log_queue
+    finally:
+        # Records the workers sent before exiting are handled before stop returns
+        listener.stop()
+        log_queue.close()
+        log_queue.join_thread()
+
+# ============================================
+# PROFILING
+# ============================================
+_MB = 1024 * 1024
+
+# Stack of open spans per thread, and every finished span of the process
+_open_spans = threading.local()
+_finished_spans: List[Dict] = []
+_finished_lock = threading.Lock()
+
+def _proc_status_mb(field: str) -> Optional[float]:
+    """Read a memory field (e.g. VmRSS) from /proc/self/status in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def current_rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB (None where unsupported)."""
+    return _proc_status_mb("VmRSS")
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB (None where unsupported)."""
+    # VmHWM starts afresh with each program, while ru_maxrss on Linux
+    # carries over the peak of the parent process
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / _MB if sys.platform == "darwin" else peak / 1024
+
+def _top_allocations(limit: int = PROFILE_TOP_ALLOCATIONS) -> List[Dict]:
+    """Largest live allocation sites according to tracemalloc."""
+    statistics = tracemalloc.take_snapshot().statistics("lineno")
+    return [
+        {"site": str(stat.traceback[0]), "size_mb": round(stat.size / _MB, 3), "count": stat.count}
+        for stat in statistics[:limit]
+    ]
+
+def _span_message(record: Dict) -> str:
+    parts = [f"{record['seconds']:.2f}s"]
+    if record["rss_mb"] is not None:
+        parts.append(f"RSS {record['rss_mb']:.0f} MB (peak {record['peak_rss_mb']:.0f} MB)")
+    if "traced_peak_mb" in record:
+        parts.append(f"traced peak {record['traced_peak_mb']:.1f} MB")
+    status = "" if record["status"] == "ok" else f" [{record['status']}]"
+    return f"⏱ {record['path']}: {', '.join(parts)}{status}"
+
+@contextmanager
+def span(name: str, logger: logging.Logger = None, snapshot: bool = False):
+    """
+    Time a block of code and record its memory use.
+
+    Spans opened inside another span (in the same thread) are nested:
+    their path is "outer/inner". When the block exits, a one-line summary
+    is logged (the full record is attached as `record.span`) and the
+    record is kept for the run report.
+
+    When tracemalloc is tracing, the record also holds the traced memory
+    allocated by the block and the traced peak during it.
+
+    Args:
+        name: Span name
+        logger: Logger for the summary line (default: the "profiling" logger)
+        snapshot: Also list the largest allocation sites (needs tracemalloc)
+
+    Yields:
+        The span record, completed when the block exits
+    """
+    stack = getattr(_open_spans, "stack", None)
+    if stack is None:
+        stack = _open_spans.stack = []
+    parent = stack[-1] if stack else None
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        traced_before, peak_so_far = tracemalloc.get_traced_memory()
+        if parent is not None:
+            # Resetting the peak for this span must not lose the parent's
+            parent["_peak"] = max(parent.get("_peak", 0), peak_so_far)
+        tracemalloc.reset_peak()
+
+    record = {
+        "name": name,
+        "path": f"{parent['path']}/{name}" if parent else name,
+        "depth": len(stack),
+        "started_at": datetime.now().isoformat(),
+        "status": "ok"
+    }
+    stack.append(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            record["status"] = "failed"
+        raise
+    except BaseException:
+        record["status"] = "failed"
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 4)
+        stack.pop()
+        record["rss_mb"] = current_rss_mb()
+        record["peak_rss_mb"] = peak_rss_mb()
+
+        if tracing and tracemalloc.is_tracing():
+            traced_after, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, record.pop("_peak", 0))
+            record["traced_mb"] = round((traced_after - traced_before) / _MB, 3)
+            record["traced_peak_mb"] = round(peak / _MB, 3)
+            if parent is not None:
+                parent["_peak"] = max(parent.get("_peak", 0), peak)
+            if snapshot:
+                record["top_allocations"] = _top_allocations()
+
+        with _finished_lock:
+            _finished_spans.append(record)
+        (logger or setup_logger("profiling")).info(_span_message(record), extra={"span": record})
+
+def timed(name: str = None, logger: logging.Logger = None):
+    """
+    Decorator running every call of a function in a span.
+
+    Args:
+        name: Span name (default: the function's qualified name)
+        logger: Logger for the summary line
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__qualname__, logger):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def write_run_report(stage: str, spans: List[Dict], report_dir: Path = RUN_REPORT_DIR) -> Path:
+    """
+    Write the spans of one run as a JSON report.
+
+    Args:
+        stage: Stage name; the report is `<stage>.json` and replaces the
+            report of the previous run
+        spans: Finished span records, the stage's root span last
+        report_dir: Directory of the reports
+
+    Returns:
+        Path of the report
+    """
+    root = spans[-1]
+    report = {
+        "stage": stage,
+        "status": root["status"],
+        "started_at": root["started_at"],
+        "finished_at": datetime.now().isoformat(),
+        "wall_seconds": root["seconds"],
+        "peak_rss_mb": root["peak_rss_mb"],
+        "tracemalloc": "traced_peak_mb" in root,
+        "argv": sys.argv[1:],
+        "pid": os.getpid(),
+        # In start order, so parents come before their children
+        "spans": sorted(spans, key=lambda record: (record["started_at"], record["depth"]))
+    }
+    report_dir = Path(report_dir)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    path = report_dir / f"{stage}.json"
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    tmp_path.replace(path)
+    return path
+
+def profile_run(stage: str, report_dir: Path = RUN_REPORT_DIR, trace_memory: bool = PROFILE_TRACEMALLOC):
+    """
+    Decorator for a stage's main: run it in a root span and write a report.
+
+    The report is written whether main returns, raises or exits.
+
+    Args:
+        stage: Stage name (root span and report file name)
+        report_dir: Directory of the reports
+        trace_memory: Trace Python allocations with tracemalloc for the run
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_tracing = trace_memory and not tracemalloc.is_tracing()
+            if start_tracing:
+                tracemalloc.start()
+            with _finished_lock:
+                first = len(_finished_spans)
+            try:
+                with span(stage, snapshot=trace_memory):
+                    return func(*args, **kwargs)
+            finally:
+                with _finished_lock:
+                    spans = _finished_spans[first:]
+                try:
+                    write_run_report(stage, spans, report_dir)
+                except OSError as e:
+                    log_warning(setup_logger("profiling"), f"Could not write run report: {e}")
+                if start_tracing:
+                    tracemalloc.stop()
+        return wrapper
+    return decorator
@@ -1,77 +1,117 @@
+"""
+SARIMA Model Evaluation
+
+Holds out the last TEST_SIZE months, refits the configured SARIMA on the
+rest and reports MAE, RMSE and MAPE with a train/test/prediction plot.
+It then backtests the same specification over BACKTEST_FOLDS rolling
+origins (see backtesting.py) and saves the per-fold metrics.
+
+Usage:
+    python src/model_evaluation.py
+    python src/model_evaluation.py --folds 12 --window sliding --refit
+"""
+import argparse
+import sys
+
 import pandas as pd
-import numpy as np
-from pathlib import Path
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-import matplotlib.pyplot as plt
+
 from config import (
-    CLEANED_SALES_FILE,
     TEST_SIZE,
     SARIMA_ORDER,
     SARIMA_SEASONAL_ORDER,
-    ENFORCE_STATIONARITY,
-    ENFORCE_INVERTIBILITY,
-    FIGURE_SIZE
-)
-from visualization import plot_model_evaluation
-
-# ----------------------------
-# Load cleaned data
-# ----------------------------
-df = pd.read_csv(CLEANED_SALES_FILE, parse_dates=["order_date"])
-
-# Aggregate to monthly sales
-monthly_sales = (
-    df.set_index("order_date")
-      .resample("M")["sales"]
-      .sum()
+    BACKTEST_FOLDS,
+    BACKTEST_WINDOW,
+    BACKTEST_REFIT,
+    BACKTEST_N_JOBS,
+    BACKTEST_RESULTS_FILE,
+    ensure_directories
 )
+from logger import setup_logger, log_section, log_success, log_error, span, profile_run
+from aggregates import load_monthly_sales
+from backtesting import backtest, fold_metrics, aggregate_metrics, forecast_metrics
 
-# ----------------------------
-# Train-test split (last 12 months as test)
-# ----------------------------
-train = monthly_sales[:-TEST_SIZE]
-test = monthly_sales[-TEST_SIZE:]
-
-print("Train period:", train.index.min(), "to", train.index.max())
-print("Test period :", test.index.min(), "to", test.index.max())
-
-# ----------------------------
-# Fit SARIMA on TRAIN data
-# ----------------------------
-model = SARIMAX(
-    train,
-    order=SARIMA_ORDER,
-    seasonal_order=SARIMA_SEASONAL_ORDER,
-    enforce_stationarity=ENFORCE_STATIONARITY,
-    enforce_invertibility=ENFORCE_INVERTIBILITY
-)
+logger = setup_logger(__name__)
 
-results = model.fit(disp=False)
+def evaluate_holdout(series: pd.Series, test_size: int = TEST_SIZE):
+    """
+    Fit on all but the last `test_size` months and forecast them.
 
-# ----------------------------
-# Predict on TEST period
-# ----------------------------
-predictions = results.predict(
-    start=test.index[0],
-    end=test.index[-1],
-    typ="levels"
-)
+    Args:
+        series: Monthly sales
+        test_size: Months held out
+
+    Returns:
+        (train, test, predictions, metrics)
+    """
+    forecasts = backtest(series, SARIMA_ORDER, SARIMA_SEASONAL_ORDER,
+                         horizon=test_size, n_folds=1, window="expanding", refit=True)
+    predictions = pd.Series(forecasts['predicted'].to_numpy(), index=forecasts['date'])
+    train = series[:-test_size]
+    test = series[-test_size:]
+    return train, test, predictions, forecast_metrics(test, predictions)
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Evaluate the SARIMA model")
+    parser.add_argument(
+        "--folds", type=int, default=BACKTEST_FOLDS,
+        help="Rolling origins for the backtest (0 = holdout only)"
+    )
+    parser.add_argument(
+        "--window", choices=["expanding", "sliding"], default=BACKTEST_WINDOW,
+        help="Training window of the backtest"
+    )
+    parser.add_argument(
+        "--refit", action=argparse.BooleanOptionalAction, default=BACKTEST_REFIT,
+        help="Refit at every origin instead of reusing the first fit"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=BACKTEST_N_JOBS,
+        help="Worker processes for refitted folds"
+    )
+    return parser.parse_args(argv)
+
+@profile_run("model_evaluation")
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        log_section(logger, "MODEL EVALUATION")
+        ensure_directories()
+
+        monthly_sales = load_monthly_sales()
+        with span("holdout"):
+            train, test, predictions, metrics = evaluate_holdout(monthly_sales)
+
+        logger.info(f"Train period: {train.index.min().date()} to {train.index.max().date()}")
+        logger.info(f"Test period : {test.index.min().date()} to {test.index.max().date()}")
+        logger.info("\n--- Model Evaluation ---")
+        logger.info(f"MAE  : {metrics['mae']:.2f}")
+        logger.info(f"RMSE : {metrics['rmse']:.2f}")
+        logger.info(f"MAPE : {metrics['mape']:.2f}%")
+
+        with span("plot"):
+            from visualization import plot_model_evaluation
+            plot_model_evaluation(train, test, predictions, metrics, save=True)
+
+        if args.folds > 0:
+            log_section(logger, f"ROLLING-ORIGIN BACKTEST ({args.folds} FOLDS)")
+            with span("backtest"):
+                forecasts = backtest(
+                    monthly_sales, SARIMA_ORDER, SARIMA_SEASONAL_ORDER,
+                    n_folds=args.folds, window=args.window, refit=args.refit, n_jobs=args.jobs
+                )
+            folds = fold_metrics(forecasts)
+            logger.info(folds.round(2).to_string())
+            logger.info("\n" + aggregate_metrics(folds).round(2).to_string())
+
+            folds.to_csv(BACKTEST_RESULTS_FILE)
+            log_success(logger, f"Fold metrics saved to {BACKTEST_RESULTS_FILE}")
+
+        log_section(logger, "EVALUATION COMPLETED SUCCESSFULLY")
+
+    except Exception as e:
+        log_error(logger, f"Evaluation failed: {e}")
+        sys.exit(1)
 
-# ----------------------------
-# Evaluation metrics
-# ----------------------------
-mae = mean_absolute_error(test, predictions)
-rmse = np.sqrt(mean_squared_error(test, predictions))
-mape = np.mean(np.abs((test - predictions) / test)) * 100
-
-print("\n--- Model Evaluation ---")
-print(f"MAE  : {mae:.2f}")
-print(f"RMSE : {rmse:.2f}")
-print(f"MAPE : {mape:.2f}%")
-
-# ----------------------------
-# Plot: Train vs Test vs Prediction
-# ----------------------------
-metrics = {'mae': mae, 'rmse': rmse, 'mape': mape}
-plot_model_evaluation(train, test, predictions, metrics, save=True)
+if __name__ == "__main__":
+    main()
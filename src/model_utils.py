@@ -1,41 +1,250 @@
 """
 Utility functions for model persistence and management.
+
+Models can be stored in two formats:
+- pickle: the full SARIMAXResults object via joblib (large; carries the
+  data and every filter/smoother matrix)
+- compact: a small .npz with the fitted parameters, the model spec, the
+  last few observations and the predicted state at their start. Loading
+  re-runs the Kalman filter over those observations only, which gives
+  the same forecasts as the full results object.
 """
-import joblib
 import json
+import numpy as np
+import pandas as pd
 from pathlib import Path
 from datetime import datetime
-from typing import Any, Dict
-from config import SARIMA_MODEL_FILE, MODEL_METADATA_FILE
-from logger import setup_logger, log_success, log_error
+from typing import Any, Dict, Tuple
+from config import (
+    SARIMA_MODEL_FILE,
+    SARIMA_COMPACT_MODEL_FILE,
+    MODEL_METADATA_FILE,
+    MODEL_FORMAT,
+    COMPACT_MODEL_TAIL
+)
+from logger import setup_logger, log_success, log_warning, log_error
 
 logger = setup_logger(__name__)
 
-def save_model(model: Any, metadata: Dict = None) -> bool:
+def residual_variance(results: Any) -> float:
+    """
+    In-sample one-step-ahead error variance of a fitted model.
+
+    Residuals inside the diffuse burn-in (loglikelihood_burn) are
+    dominated by the initialization and skipped. Only meaningful for a
+    fit over the full history; a compact model only holds its tail.
+
+    Args:
+        results: Fitted SARIMAXResults
+
+    Returns:
+        Residual variance, or the estimated sigma2 when fewer than two
+        residuals follow the burn-in
+    """
+    resid = np.asarray(results.resid, dtype=float)[int(results.loglikelihood_burn):]
+    resid = resid[np.isfinite(resid)]
+    if len(resid) > 1:
+        return float(np.var(resid, ddof=1))
+    names = list(results.model.param_names)
+    return float(np.asarray(results.params)[names.index('sigma2')]) if 'sigma2' in names else float('nan')
+
+def save_compact_model(results: Any, path: Path = SARIMA_COMPACT_MODEL_FILE,
+                       tail: int = COMPACT_MODEL_TAIL, stats: Dict = None) -> Path:
+    """
+    Save a fitted SARIMAX model as a compact parameter-only artifact.
+    
+    Args:
+        results: Fitted SARIMAXResults
+        path: Destination .npz file
+        tail: Number of final observations to keep
+        stats: Fit statistics (aic, bic, llf, nobs, resid_var) to store
+            instead of those of `results`, e.g. after update_model()
+            appended data without refitting
+    
+    Returns:
+        Path to the saved artifact
+    
+    Raises:
+        ValueError: If the model uses exogenous regressors
+    """
+    model = results.model
+    if model.k_exog:
+        raise ValueError("Compact artifacts do not support exogenous regressors")
+    
+    # States before the diffuse burn-in have no proper covariance
+    nobs = int(results.nobs)
+    burn = int(getattr(results.filter_results, "nobs_diffuse", 0))
+    tail = max(1, min(tail, nobs - burn))
+    start = nobs - tail
+    
+    endog = np.asarray(model.endog).reshape(nobs, -1)[start:, 0]
+    index = model._index[start:] if model._index is not None else pd.RangeIndex(start, nobs)
+    freq = getattr(index, "freqstr", None)
+    
+    spec = {
+        'order': list(model.order),
+        'seasonal_order': list(model.seasonal_order),
+        'trend': model.trend,
+        'enforce_stationarity': bool(model.enforce_stationarity),
+        'enforce_invertibility': bool(model.enforce_invertibility),
+        'param_names': list(model.param_names),
+        'freq': freq,
+        'datetime_index': isinstance(index, pd.DatetimeIndex),
+        'name': model.endog_names,
+        'nobs': nobs,
+        'aic': float(results.aic),
+        'bic': float(results.bic),
+        'llf': float(results.llf),
+        'resid_var': residual_variance(results)
+    }
+    spec.update(stats or {})
+    
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            spec=np.array(json.dumps(spec)),
+            params=np.asarray(results.params, dtype=float),
+            endog=endog.astype(float),
+            index=np.asarray(index.asi8 if isinstance(index, pd.DatetimeIndex) else index,
+                             dtype=np.int64),
+            state=results.predicted_state[:, start],
+            state_cov=results.predicted_state_cov[:, :, start]
+        )
+    return path
+
+def read_compact_spec(path: Path = SARIMA_COMPACT_MODEL_FILE) -> Dict:
+    """
+    Read the model spec stored in a compact artifact.
+    
+    Args:
+        path: Compact .npz artifact
+    
+    Returns:
+        Dictionary with orders, fit statistics and parameter names
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return json.loads(str(data['spec']))
+
+def load_compact_model(path: Path = SARIMA_COMPACT_MODEL_FILE) -> Any:
+    """
+    Rebuild a forecast-capable results object from a compact artifact.
+    
+    Args:
+        path: Compact .npz artifact
+    
+    Returns:
+        SARIMAXResults filtered over the stored observations
+    """
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    
+    with np.load(path, allow_pickle=False) as data:
+        spec = json.loads(str(data['spec']))
+        params = data['params']
+        endog = data['endog']
+        index = data['index']
+        state = data['state']
+        state_cov = data['state_cov']
+    
+    if spec['datetime_index']:
+        index = pd.DatetimeIndex(index, freq=spec['freq'])
+    else:
+        index = pd.RangeIndex(int(index[0]), int(index[0]) + len(index))
+    series = pd.Series(endog, index=index, name=spec['name'])
+    
+    model = SARIMAX(
+        series,
+        order=tuple(spec['order']),
+        seasonal_order=tuple(spec['seasonal_order']),
+        trend=spec['trend'],
+        enforce_stationarity=spec['enforce_stationarity'],
+        enforce_invertibility=spec['enforce_invertibility']
+    )
+    model.initialize_known(state, state_cov)
+    return model.filter(pd.Series(params, index=spec['param_names']))
+
+def update_model(results: Any, series: pd.Series, refit: bool = False,
+                 maxiter: int = None) -> Tuple[Any, int, bool]:
+    """
+    Bring a fitted model up to date with the latest observations.
+    
+    Months after the model's last observation are appended to the
+    state-space filter with the existing parameters, which costs one
+    filter pass over the new data. With refit=True the parameters are
+    re-estimated on the whole series, starting from the current ones.
+    If already-seen months were revised in `series`, appending would
+    keep stale data in the filter, so the model is refitted instead
+    (a compact model can only check the months of its stored tail).
+    
+    Args:
+        results: Fitted SARIMAXResults (full or loaded from a compact artifact)
+        series: Complete monthly series, including the new months
+        refit: Re-estimate the parameters (warm-started)
+        maxiter: Optimizer iterations for the refit (None = statsmodels default)
+    
+    Returns:
+        (updated results, number of new months, whether the model was refitted)
+    """
+    model = results.model
+    # statsmodels only concatenates data under the same name
+    series = series.rename(model.endog_names)
+    stored = pd.Series(np.asarray(model.endog).reshape(len(model._index), -1)[:, 0],
+                       index=model._index)
+    new = series[series.index > stored.index[-1]]
+    
+    revised = not np.allclose(series.reindex(stored.index), stored)
+    if revised and not refit:
+        log_warning(logger, "Earlier months were revised - refitting instead of appending")
+        refit = True
+    
+    if refit:
+        fit_kwargs = {'disp': False, 'start_params': results.params}
+        if maxiter is not None:
+            fit_kwargs['maxiter'] = maxiter
+        # clone() starts from the default initialization, as a fresh fit would
+        return model.clone(series).fit(**fit_kwargs), len(new), True
+    
+    if new.empty:
+        return results, 0, False
+    # Keep the initialization so compact models continue from their stored state
+    return results.append(new, copy_initialization=True), len(new), False
+
+def save_model(model: Any, metadata: Dict = None, model_format: str = MODEL_FORMAT,
+               stats: Dict = None) -> bool:
     """
     Save trained model and metadata to disk.
     
     Args:
         model: Trained model object (SARIMAX results)
         metadata: Optional dictionary with model information
+        model_format: 'compact' or 'pickle'
+        stats: Fit statistics to store in a compact artifact instead of
+            those of `model` (see save_compact_model)
     
     Returns:
         True if successful, False otherwise
     """
     try:
         # Save model
-        joblib.dump(model, SARIMA_MODEL_FILE)
-        log_success(logger, f"Model saved to {SARIMA_MODEL_FILE}")
+        if model_format == "compact":
+            model_file = save_compact_model(model, SARIMA_COMPACT_MODEL_FILE, stats=stats)
+        else:
+            import joblib
+            model_file = SARIMA_MODEL_FILE
+            joblib.dump(model, model_file)
+        log_success(logger, f"Model saved to {model_file}")
         
-        # Save metadata
-        if metadata:
-            metadata['saved_at'] = datetime.now().isoformat()
-            metadata['model_file'] = str(SARIMA_MODEL_FILE)
-            
-            with open(MODEL_METADATA_FILE, 'w') as f:
-                json.dump(metadata, f, indent=2)
-            
-            log_success(logger, f"Metadata saved to {MODEL_METADATA_FILE}")
+        # Save metadata, always: it names the artifact load_model reads
+        metadata = dict(metadata or {})
+        metadata['saved_at'] = datetime.now().isoformat()
+        metadata['model_file'] = str(model_file)
+        metadata['model_format'] = model_format
+        
+        with open(MODEL_METADATA_FILE, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        
+        log_success(logger, f"Metadata saved to {MODEL_METADATA_FILE}")
         
         return True
     
@@ -43,10 +252,58 @@ def save_model(model: Any, metadata: Dict = None) -> bool:
         log_error(logger, f"Failed to save model: {e}")
         return False
 
+def model_artifact_path(model_format: str = MODEL_FORMAT) -> Path:
+    """Path save_model writes for a model format ('compact' or 'pickle')."""
+    return SARIMA_COMPACT_MODEL_FILE if model_format == "compact" else SARIMA_MODEL_FILE
+
+def saved_model_format() -> str:
+    """
+    Return the format of the last saved model according to its metadata.
+    
+    Returns:
+        'compact' or 'pickle', or None without a readable metadata file
+    """
+    try:
+        with open(MODEL_METADATA_FILE, 'r') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if metadata.get('model_format') in ("compact", "pickle"):
+        return metadata['model_format']
+    # Metadata written before the compact format only names the file
+    model_file = str(metadata.get('model_file', ''))
+    if model_file.endswith(".npz"):
+        return "compact"
+    if model_file.endswith(".pkl"):
+        return "pickle"
+    return None
+
+def saved_model_path() -> Path:
+    """
+    Return the model artifact load_model() would read.
+    
+    That is the artifact of the format recorded in MODEL_METADATA_FILE
+    by the last save_model call, so a file of the other format left by
+    an earlier run is never served. Without metadata, the artifact of
+    MODEL_FORMAT is preferred over the other one.
+    
+    Returns:
+        Path of the artifact, or None if no artifact exists
+    """
+    other_format = "pickle" if MODEL_FORMAT == "compact" else "compact"
+    formats = [saved_model_format(), MODEL_FORMAT, other_format]
+    for model_format in formats:
+        if model_format is not None and model_artifact_path(model_format).exists():
+            return model_artifact_path(model_format)
+    return None
+
 def load_model(check_metadata: bool = True) -> Any:
     """
     Load trained model from disk.
     
+    Reads the artifact chosen by saved_model_path: the format recorded in
+    the model metadata, else MODEL_FORMAT, else the other format.
+    
     Args:
         check_metadata: Whether to load and display metadata
     
@@ -57,15 +314,20 @@ def load_model(check_metadata: bool = True) -> Any:
         FileNotFoundError: If model file doesn't exist
     """
     try:
-        if not SARIMA_MODEL_FILE.exists():
+        model_file = saved_model_path()
+        if model_file == SARIMA_COMPACT_MODEL_FILE:
+            model = load_compact_model(model_file)
+            log_success(logger, f"Model loaded from {model_file}")
+        elif model_file is not None:
+            import joblib
+            model = joblib.load(model_file)
+            log_success(logger, f"Model loaded from {model_file}")
+        else:
             raise FileNotFoundError(
                 f"Model file not found: {SARIMA_MODEL_FILE}\n"
                 f"Please train the model first using train_sarima.py"
             )
         
-        model = joblib.load(SARIMA_MODEL_FILE)
-        log_success(logger, f"Model loaded from {SARIMA_MODEL_FILE}")
-        
         # Load and display metadata
         if check_metadata and MODEL_METADATA_FILE.exists():
             with open(MODEL_METADATA_FILE, 'r') as f:
@@ -92,12 +354,18 @@ def get_model_info() -> Dict:
         Dictionary with model information
     """
     info = {
-        'model_exists': SARIMA_MODEL_FILE.exists(),
+        'model_exists': SARIMA_MODEL_FILE.exists() or SARIMA_COMPACT_MODEL_FILE.exists(),
         'model_path': str(SARIMA_MODEL_FILE),
+        'compact_model_exists': SARIMA_COMPACT_MODEL_FILE.exists(),
+        'compact_model_path': str(SARIMA_COMPACT_MODEL_FILE),
+        'active_model_path': str(saved_model_path()) if saved_model_path() else None,
         'metadata_exists': MODEL_METADATA_FILE.exists(),
         'metadata_path': str(MODEL_METADATA_FILE)
     }
     
+    if SARIMA_COMPACT_MODEL_FILE.exists():
+        info['compact_model_size_kb'] = SARIMA_COMPACT_MODEL_FILE.stat().st_size / 1024
+    
     if SARIMA_MODEL_FILE.exists():
         info['model_size_mb'] = SARIMA_MODEL_FILE.stat().st_size / (1024 * 1024)
         info['model_modified'] = datetime.fromtimestamp(
@@ -0,0 +1,80 @@
+"""
+Process-pool helpers shared by the model-fitting stages.
+
+Fitting many SARIMA models is CPU-bound, so tuning, hierarchical training
+and backtesting fan the fits out over worker processes. Each worker is
+limited to one BLAS thread so N workers use N cores instead of
+oversubscribing them. Workers send their log records to the parent,
+whose logger writes them, so lines from different workers never mix.
+"""
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from logger import configure_worker_logging, forward_worker_logs
+
+# Environment variables that cap BLAS/OpenMP thread pools in worker processes
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"
+)
+
+def resolve_n_jobs(n_jobs):
+    """Translate n_jobs (-1 = all cores) into a positive worker count."""
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+@contextmanager
+def single_threaded_blas_env():
+    """
+    Temporarily set BLAS thread-count variables to 1.
+
+    Worker processes inherit the environment when they start, so with
+    N workers each fit uses one core instead of oversubscribing them.
+    """
+    previous = {name: os.environ.get(name) for name in _THREAD_ENV_VARS}
+    os.environ.update({name: "1" for name in _THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def init_worker(log_queue=None):
+    """
+    Pin BLAS to one thread in a worker that already loaded numpy (fork).
+
+    Args:
+        log_queue: Queue from logger.forward_worker_logs; the worker's log
+            records are sent through it to the parent
+    """
+    if log_queue is not None:
+        configure_worker_logging(log_queue)
+    warnings.filterwarnings('ignore')
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+@contextmanager
+def process_pool(max_workers):
+    """
+    Start a process pool whose workers use a single BLAS thread and log
+    through the parent.
+
+    Usage:
+        with process_pool(4) as executor:
+            futures = [executor.submit(fit, spec) for spec in specs]
+    """
+    with single_threaded_blas_env(), forward_worker_logs() as log_queue:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                                 initargs=(log_queue,)) as executor:
+            yield executor
@@ -0,0 +1,427 @@
+"""
+Pipeline Runner
+
+Runs the forecasting workflow as a graph of stages instead of six scripts
+run by hand. Each stage is one of the existing scripts with declared
+input files, output files and the config settings it reads; a stage
+depends on the stages that write its inputs.
+
+Before a stage runs, its key is computed from the digests of its input
+files and scripts and the values of its config settings. If the key and
+the output digests match the last successful run recorded in
+PIPELINE_STATE_FILE, the stage is skipped. Because keys hash content, a
+rerun stage whose outputs come out identical does not invalidate the
+stages after it.
+
+Stages whose inputs are ready run at the same time (up to --jobs), each
+in its own process, so e.g. the stationarity checks and the evaluation
+run alongside training.
+
+Usage:
+    python src/pipeline.py                   # run every stage that is out of date
+    python src/pipeline.py forecast          # forecast and the stages it needs
+    python src/pipeline.py --dry-run         # show what would run
+    python src/pipeline.py --force train     # rerun even when up to date
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import config
+from config import (
+    PROJECT_ROOT,
+    RAW_SALES_FILE,
+    CLEANED_SALES_FILE,
+    FORECAST_OUTPUT_FILE,
+    MODEL_METADATA_FILE,
+    RESULTS_DIR,
+    BACKTEST_FOLDS,
+    BACKTEST_RESULTS_FILE,
+    DIGEST_CACHE_FILE,
+    PIPELINE_STATE_FILE,
+    PIPELINE_N_JOBS,
+    ensure_directories
+)
+from logger import setup_logger, log_section, log_success, log_warning, log_error, profile_run
+from fingerprint import file_digest
+from model_utils import model_artifact_path, saved_model_path
+from parallel import resolve_n_jobs
+
+logger = setup_logger(__name__)
+
+SRC_DIR = Path(__file__).parent
+
+_SARIMA_SETTINGS = ["SARIMA_ORDER", "SARIMA_SEASONAL_ORDER", "ENFORCE_STATIONARITY", "ENFORCE_INVERTIBILITY"]
+
+# Stages in a valid run order. "code" lists the source files hashed into
+# the key besides the script itself. An input may also be a function
+# returning the path (or None), resolved when the key is computed; such
+# inputs add no dependency, so a stage also lists a fixed file written
+# by the same producer (the forecast stage reads whichever model
+# artifact the loader picks from the metadata).
+STAGES = [
+    {
+        "name": "clean",
+        "script": "data_cleaning.py",
+        "inputs": [RAW_SALES_FILE],
+        "outputs": [CLEANED_SALES_FILE],
+        "config": ["NUMERIC_COLUMNS", "DATE_COLUMNS", "DATE_FORMATS", "DUPLICATE_SUBSET",
+                   "CATEGORICAL_COLUMNS", "PARQUET_COMPRESSION"],
+        "code": ["sales_store.py"]
+    },
+    {
+        "name": "stationarity",
+        "script": "stationarity_check.py",
+        "inputs": [CLEANED_SALES_FILE],
+        "outputs": [],
+        "config": [],
+        "code": ["aggregates.py"]
+    },
+    {
+        "name": "differencing",
+        "script": "differencing.py",
+        "inputs": [CLEANED_SALES_FILE],
+        "outputs": [],
+        "config": ["UNIT_ROOT_ALPHA", "UNIT_ROOT_TEST", "SEASONAL_STRENGTH_THRESHOLD",
+                   "MAX_D", "MAX_SEASONAL_D"],
+        "code": ["aggregates.py"]
+    },
+    {
+        "name": "train",
+        "script": "train_sarima.py",
+        "inputs": [CLEANED_SALES_FILE],
+        "outputs": [model_artifact_path(), MODEL_METADATA_FILE],
+        "config": _SARIMA_SETTINGS + ["MODEL_FORMAT", "COMPACT_MODEL_TAIL"],
+        "code": ["aggregates.py", "model_utils.py"]
+    },
+    {
+        "name": "forecast",
+        "script": "forecast.py",
+        "inputs": [CLEANED_SALES_FILE, saved_model_path, MODEL_METADATA_FILE],
+        "outputs": [FORECAST_OUTPUT_FILE, RESULTS_DIR / "forecast_plot.png"],
+        "config": ["FORECAST_HORIZON", "FORECAST_ALPHA"],
+        "code": ["aggregates.py", "model_utils.py", "forecast_cache.py", "fingerprint.py",
+                 "visualization.py"]
+    },
+    {
+        "name": "evaluate",
+        "script": "model_evaluation.py",
+        "inputs": [CLEANED_SALES_FILE],
+        "outputs": [RESULTS_DIR / "model_evaluation.png"] + ([BACKTEST_RESULTS_FILE] if BACKTEST_FOLDS > 0 else []),
+        "config": _SARIMA_SETTINGS + ["TEST_SIZE", "BACKTEST_FOLDS", "BACKTEST_STEP", "BACKTEST_WINDOW",
+                                      "BACKTEST_WINDOW_SIZE", "BACKTEST_REFIT"],
+        "code": ["aggregates.py", "backtesting.py", "visualization.py"]
+    },
+]
+
+def _relative(path: Path) -> str:
+    """Path as stored in the state file (relative to the project when possible)."""
+    path = Path(path).resolve()
+    try:
+        return str(path.relative_to(PROJECT_ROOT.resolve()))
+    except ValueError:
+        return str(path)
+
+def input_paths(stage: Dict) -> List[Optional[Path]]:
+    """Paths of a stage's inputs, calling those given as functions."""
+    return [path() if callable(path) else Path(path) for path in stage["inputs"]]
+
+def stage_dependencies(stages: Sequence[Dict]) -> Dict[str, List[str]]:
+    """
+    Derive stage dependencies from declared inputs and outputs.
+
+    Args:
+        stages: Stage definitions
+
+    Returns:
+        Mapping of stage name to the names of the stages writing its inputs
+    """
+    producers = {}
+    for stage in stages:
+        for path in stage["outputs"]:
+            producers[_relative(path)] = stage["name"]
+
+    return {
+        stage["name"]: sorted({
+            producers[_relative(path)] for path in stage["inputs"]
+            if not callable(path) and _relative(path) in producers and producers[_relative(path)] != stage["name"]
+        })
+        for stage in stages
+    }
+
+def select_stages(stages: Sequence[Dict], targets: Optional[Sequence[str]] = None) -> List[Dict]:
+    """
+    Return the target stages and everything upstream of them, in order.
+
+    Raises:
+        ValueError: For an unknown stage name
+    """
+    if not targets:
+        return list(stages)
+
+    names = [stage["name"] for stage in stages]
+    unknown = [target for target in targets if target not in names]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)} (expected one of {', '.join(names)})")
+
+    dependencies = stage_dependencies(stages)
+    needed, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(dependencies[name])
+    return [stage for stage in stages if stage["name"] in needed]
+
+def stage_key(stage: Dict) -> Optional[str]:
+    """
+    Hash everything a stage's outputs depend on.
+
+    Args:
+        stage: Stage definition
+
+    Returns:
+        Hex digest of the input files, source files, config values and
+        arguments, or None if an input file does not exist yet
+    """
+    sources = [stage["script"]] + stage.get("code", [])
+    files = input_paths(stage) + [SRC_DIR / source for source in sources]
+    if not all(path is not None and path.exists() for path in files):
+        return None
+
+    payload = {
+        "files": {_relative(path): file_digest(path, DIGEST_CACHE_FILE) for path in files},
+        "config": {name: repr(getattr(config, name)) for name in stage["config"]},
+        "args": list(stage.get("args", []))
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def output_digests(stage: Dict) -> Optional[Dict[str, str]]:
+    """Digests of a stage's outputs, or None if one of them is missing."""
+    outputs = [Path(path) for path in stage["outputs"]]
+    if not all(path.exists() for path in outputs):
+        return None
+    return {_relative(path): file_digest(path, DIGEST_CACHE_FILE) for path in outputs}
+
+def load_state(path: Path = PIPELINE_STATE_FILE) -> Dict:
+    """Load the pipeline state, treating a missing or corrupt file as empty."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_state(state: Dict, path: Path = PIPELINE_STATE_FILE) -> None:
+    """Write the pipeline state atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    tmp_path.replace(path)
+
+def is_up_to_date(stage: Dict, key: Optional[str], state: Dict) -> bool:
+    """Whether the last successful run had this key and its outputs are unchanged."""
+    entry = state.get(stage["name"])
+    if key is None or not entry or entry.get("key") != key:
+        return False
+    return output_digests(stage) == entry.get("outputs")
+
+def run_stage(stage: Dict) -> Dict:
+    """
+    Run one stage's script in a separate process.
+
+    Returns:
+        Record with the stage name, status ('ok' or 'failed'), return
+        code, elapsed seconds and the captured output
+    """
+    command = [sys.executable, str(SRC_DIR / stage["script"]), *stage.get("args", [])]
+    # Plots are saved to files; never open a window from a stage
+    env = dict(os.environ, MPLBACKEND="Agg")
+
+    start = time.time()
+    result = subprocess.run(command, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    return {
+        "stage": stage["name"],
+        "status": "ok" if result.returncode == 0 else "failed",
+        "returncode": result.returncode,
+        "elapsed": round(time.time() - start, 2),
+        "output": result.stdout + result.stderr
+    }
+
+def _log_output(record: Dict, tail: Optional[int] = None) -> None:
+    lines = record["output"].rstrip().splitlines()
+    for line in lines[-tail:] if tail else lines:
+        logger.info(f"  [{record['stage']}] {line}")
+
+def plan(stages: Sequence[Dict] = STAGES, targets: Optional[Sequence[str]] = None,
+         force: bool = False, state_path: Path = PIPELINE_STATE_FILE) -> List[Dict]:
+    """
+    Work out which stages a run would execute, without running any.
+
+    A stage downstream of one that will run is reported as 'pending',
+    since whether it reruns depends on the new outputs.
+
+    Returns:
+        One record per selected stage with its status ('up to date',
+        'will run' or 'pending')
+    """
+    selected = select_stages(stages, targets)
+    dependencies = stage_dependencies(selected)
+    state = load_state(state_path)
+
+    status = {}
+    for stage in selected:
+        name = stage["name"]
+        if any(status[upstream] != "up to date" for upstream in dependencies[name]):
+            status[name] = "pending"
+        elif not force and is_up_to_date(stage, stage_key(stage), state):
+            status[name] = "up to date"
+        else:
+            status[name] = "will run"
+    return [{"stage": name, "status": status[name]} for name in status]
+
+def run_pipeline(stages: Sequence[Dict] = STAGES, targets: Optional[Sequence[str]] = None,
+                 n_jobs: int = PIPELINE_N_JOBS, force: bool = False,
+                 state_path: Path = PIPELINE_STATE_FILE, verbose: bool = False) -> List[Dict]:
+    """
+    Run the selected stages, skipping those that are up to date.
+
+    A stage starts as soon as every stage it depends on has finished or
+    was skipped, with at most n_jobs stages running at a time. When a
+    stage fails, the stages depending on it are not run; independent
+    stages still are.
+
+    Args:
+        stages: Stage definitions in a valid run order
+        targets: Names of the stages to bring up to date (None = all)
+        n_jobs: Stages run concurrently (-1 = all cores)
+        force: Run the selected stages even when they are up to date
+        state_path: JSON file recording the last successful runs
+        verbose: Log the output of successful stages too
+
+    Returns:
+        One record per selected stage, with status 'ok', 'cached',
+        'failed' or 'blocked'
+    """
+    selected = select_stages(stages, targets)
+    dependencies = stage_dependencies(selected)
+    state = load_state(state_path)
+
+    records = {}
+    pending = list(selected)
+    running = {}
+    with ThreadPoolExecutor(max_workers=resolve_n_jobs(n_jobs)) as executor:
+        while pending or running:
+            n_pending = len(pending)
+            for stage in list(pending):
+                name = stage["name"]
+                upstream = [records.get(dependency) for dependency in dependencies[name]]
+                if any(record is None for record in upstream):
+                    continue
+                pending.remove(stage)
+
+                if any(record["status"] in ("failed", "blocked") for record in upstream):
+                    records[name] = {"stage": name, "status": "blocked", "elapsed": 0.0}
+                    log_warning(logger, f"{name}: not run (an upstream stage failed)")
+                    continue
+
+                key = stage_key(stage)
+                if not force and is_up_to_date(stage, key, state):
+                    records[name] = {"stage": name, "status": "cached", "elapsed": 0.0}
+                    log_success(logger, f"{name}: up to date")
+                    continue
+
+                logger.info(f"{name}: running {stage['script']}")
+                running[executor.submit(run_stage, stage)] = (stage, key)
+
+            if not running:
+                if len(pending) == n_pending:
+                    raise ValueError("Stage dependencies form a cycle: "
+                                     f"{', '.join(stage['name'] for stage in pending)}")
+                # Only skipped or blocked stages this pass; the stages
+                # they unblocked are picked up by the next one
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key = running.pop(future)
+                record = future.result()
+                outputs = output_digests(stage)
+                if record["status"] == "ok" and outputs is None:
+                    record["status"] = "failed"
+                    record["output"] += "\nDeclared outputs were not written\n"
+
+                if record["status"] == "ok":
+                    state[stage["name"]] = {
+                        "key": key,
+                        "outputs": outputs,
+                        "elapsed": record["elapsed"],
+                        "finished_at": datetime.now().isoformat()
+                    }
+                    save_state(state, state_path)
+                    log_success(logger, f"{stage['name']}: done in {record['elapsed']:.1f}s")
+                    if verbose:
+                        _log_output(record)
+                else:
+                    log_error(logger, f"{stage['name']}: failed (exit code {record['returncode']})")
+                    _log_output(record, tail=20)
+                records[stage["name"]] = record
+
+    return [records[stage["name"]] for stage in selected]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the forecasting pipeline stages that are out of date")
+    parser.add_argument(
+        "stages", nargs="*", metavar="STAGE",
+        help=f"Stages to bring up to date, with their upstream stages "
+             f"(default: all of {', '.join(stage['name'] for stage in STAGES)})"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=PIPELINE_N_JOBS,
+        help="Stages run concurrently (-1 = all cores)"
+    )
+    parser.add_argument("--force", action="store_true", help="Run the stages even when up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Show which stages would run and exit")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of every stage")
+    return parser.parse_args(argv)
+
+@profile_run("pipeline")
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        log_section(logger, "FORECASTING PIPELINE")
+        ensure_directories()
+
+        if args.dry_run:
+            for record in plan(STAGES, args.stages, args.force):
+                logger.info(f"{record['stage']:<14} {record['status']}")
+            return
+
+        start = time.time()
+        records = run_pipeline(STAGES, args.stages, args.jobs, args.force, verbose=args.verbose)
+
+        logger.info("\n--- Pipeline Summary ---")
+        for record in records:
+            logger.info(f"{record['stage']:<14} {record['status']:<8} {record['elapsed']:>7.1f}s")
+        logger.info(f"Total: {time.time() - start:.1f}s")
+
+        failed = [record["stage"] for record in records if record["status"] in ("failed", "blocked")]
+        if failed:
+            raise RuntimeError(f"stage(s) did not complete: {', '.join(failed)}")
+        log_section(logger, "PIPELINE COMPLETED")
+
+    except Exception as e:
+        log_error(logger, f"Pipeline failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Forecast Reconciliation
+
+Independently fitted node models (see train_hierarchy.py) do not add up:
+the market forecasts do not sum to the total, and so on. This stage turns
+the base forecasts of every node into coherent forecasts.
+
+All methods work on whole matrices. Nodes are the rows of a sparse
+summing matrix S (aggregate nodes first, then the bottom series, i.e. one
+series per combination of all hierarchy columns), so that any coherent
+forecast is S @ bottom. Supported methods:
+
+- bottom_up:   S @ bottom base forecasts
+- top_down:    total forecast split by historical bottom-level proportions
+- ols:         S (S'S)^-1 S' y_hat
+- wls_struct:  weighted by the number of bottom series under each node
+- wls_var:     weighted by in-sample error variances (MinT, diagonal)
+
+Usage:
+    python src/reconciliation.py
+    python src/reconciliation.py --method ols
+"""
+import argparse
+import json
+import sys
+import warnings
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+from config import (
+    FORECAST_HORIZON,
+    HIERARCHY_LEVELS,
+    HIERARCHY_MANIFEST_FILE,
+    RECONCILIATION_METHOD,
+    RECONCILED_FORECAST_FILE,
+    ensure_directories
+)
+from logger import setup_logger, log_section, log_success, log_warning, log_error, span, profile_run
+from aggregates import cleaned_data_digest
+from baselines import seasonal_naive
+from hierarchy import bottom_level_series, level_columns, node_id
+from model_utils import load_compact_model
+from sales_store import load_cleaned_sales
+
+logger = setup_logger(__name__)
+
+METHODS = ("bottom_up", "top_down", "ols", "wls_struct", "wls_var")
+
+def summing_matrix(bottom_columns: pd.Index,
+                   levels: Sequence[Tuple[str, ...]] = HIERARCHY_LEVELS) -> Tuple[sparse.csr_matrix, List[str]]:
+    """
+    Build the sparse summing matrix of a (grouped) hierarchy.
+
+    Args:
+        bottom_columns: Columns of bottom_level_series(), one per bottom series
+        levels: Hierarchy levels
+
+    Returns:
+        (S, node_ids): S has one row per node and one column per bottom
+        series; the aggregate nodes come first and the bottom series last
+    """
+    columns = level_columns(levels)
+    if not isinstance(bottom_columns, pd.MultiIndex):
+        bottom_columns = pd.MultiIndex.from_arrays([bottom_columns], names=columns)
+    keys = list(zip(*(bottom_columns.get_level_values(col) for col in columns)))
+    n_bottom = len(keys)
+    position = {col: i for i, col in enumerate(columns)}
+
+    node_ids, rows, cols = [], [], []
+    for level in levels:
+        if set(level) == set(columns):
+            continue  # same nodes as the bottom level
+        idx = [position[col] for col in level]
+        ids = [node_id(level, tuple(key[i] for i in idx)) for key in keys]
+        codes, uniques = pd.factorize(pd.Index(ids), sort=True)
+        rows.append(codes + len(node_ids))
+        cols.append(np.arange(n_bottom))
+        node_ids.extend(uniques)
+
+    n_aggregate = len(node_ids)
+    rows.append(np.arange(n_bottom) + n_aggregate)
+    cols.append(np.arange(n_bottom))
+    node_ids.extend(node_id(tuple(columns), key) for key in keys)
+
+    rows = np.concatenate(rows)
+    S = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, np.concatenate(cols))),
+        shape=(n_aggregate + n_bottom, n_bottom)
+    )
+    return S, node_ids
+
+def bottom_up(S: sparse.spmatrix, bottom_forecasts: np.ndarray) -> np.ndarray:
+    """
+    Aggregate bottom-level forecasts to every node.
+
+    Args:
+        S: Summing matrix
+        bottom_forecasts: Array of shape (n_bottom, horizon)
+
+    Returns:
+        Coherent forecasts of shape (n_nodes, horizon)
+    """
+    return np.asarray(S @ bottom_forecasts)
+
+def historical_proportions(bottom_history: np.ndarray,
+                           method: str = "proportion_of_averages") -> np.ndarray:
+    """
+    Estimate each bottom series' share of the total.
+
+    Args:
+        bottom_history: Array of shape (n_bottom, n_months)
+        method: 'proportion_of_averages' (mean series / mean total) or
+            'average_proportions' (mean of the monthly shares)
+
+    Returns:
+        Array of n_bottom proportions summing to 1
+    """
+    bottom_history = np.asarray(bottom_history, dtype=float)
+    total = bottom_history.sum(axis=0)
+    if method == "proportion_of_averages":
+        proportions = bottom_history.mean(axis=1) / total.mean()
+    elif method == "average_proportions":
+        valid = total != 0
+        proportions = (bottom_history[:, valid] / total[valid]).mean(axis=1)
+    else:
+        raise ValueError(f"Unknown proportions method: {method}")
+    return proportions / proportions.sum()
+
+def top_down(S: sparse.spmatrix, total_forecast: np.ndarray,
+             proportions: np.ndarray) -> np.ndarray:
+    """
+    Split the total forecast across the bottom level and aggregate it back.
+
+    Args:
+        S: Summing matrix
+        total_forecast: Array of shape (horizon,)
+        proportions: Bottom-level shares from historical_proportions()
+
+    Returns:
+        Coherent forecasts of shape (n_nodes, horizon)
+    """
+    return bottom_up(S, np.outer(proportions, total_forecast))
+
+def reconcile(S: sparse.spmatrix, base: np.ndarray, method: str = "ols",
+              residual_var: np.ndarray = None, proportions: np.ndarray = None) -> np.ndarray:
+    """
+    Reconcile base forecasts of all nodes.
+
+    For the least-squares methods the reconciled bottom level solves
+    (S' W^-1 S) b = S' W^-1 y_hat with W diagonal. In a grouped
+    hierarchy S' W^-1 S is dense (the total links every pair of bottom
+    series), so with S = [A; I] the Woodbury identity is used instead:
+    only a sparse system the size of the aggregate nodes is factorized,
+    once for all horizons.
+
+    Args:
+        S: Summing matrix (aggregate rows first, bottom rows last)
+        base: Base forecasts of shape (n_nodes, horizon)
+        method: One of METHODS
+        residual_var: In-sample error variance per node (wls_var)
+        proportions: Bottom-level shares (top_down)
+
+    Returns:
+        Coherent forecasts of shape (n_nodes, horizon)
+
+    Raises:
+        ValueError: For an unknown method or missing inputs
+    """
+    S = sparse.csr_matrix(S)
+    base = np.asarray(base, dtype=float)
+    n_nodes, n_bottom = S.shape
+
+    if method == "bottom_up":
+        return bottom_up(S, base[n_nodes - n_bottom:])
+
+    if method == "top_down":
+        if proportions is None:
+            raise ValueError("top_down reconciliation needs bottom-level proportions")
+        total_rows = np.flatnonzero(S.getnnz(axis=1) == n_bottom)
+        return top_down(S, base[total_rows[0]], proportions)
+
+    if method == "ols":
+        weights = np.ones(n_nodes)
+    elif method == "wls_struct":
+        weights = 1.0 / np.asarray(S.sum(axis=1)).ravel()
+    elif method == "wls_var":
+        if residual_var is None:
+            raise ValueError("wls_var reconciliation needs residual variances")
+        residual_var = np.asarray(residual_var, dtype=float)
+        # Nodes without a usable variance get the median weight
+        fallback = np.nanmedian(residual_var[residual_var > 0]) if np.any(residual_var > 0) else 1.0
+        residual_var = np.where(np.isfinite(residual_var) & (residual_var > 0), residual_var, fallback)
+        weights = 1.0 / residual_var
+    else:
+        raise ValueError(f"Unknown reconciliation method: {method} (expected one of {METHODS})")
+
+    n_aggregate = n_nodes - n_bottom
+    A = S[:n_aggregate]
+    w_aggregate, w_bottom = weights[:n_aggregate], weights[n_aggregate:]
+    
+    # (D + A' E A)^-1 = D^-1 - D^-1 A' (E^-1 + A D^-1 A')^-1 A D^-1,
+    # with D = diag(w_bottom) and E = diag(w_aggregate)
+    rhs = A.T @ (w_aggregate[:, None] * base[:n_aggregate]) + w_bottom[:, None] * base[n_aggregate:]
+    scaled = rhs / w_bottom[:, None]
+    if n_aggregate:
+        inner = sparse.diags(1.0 / w_aggregate) + A @ sparse.diags(1.0 / w_bottom) @ A.T
+        correction = splu(sparse.csc_matrix(inner)).solve(np.asarray(A @ scaled))
+        scaled = scaled - (A.T @ correction) / w_bottom[:, None]
+    return bottom_up(S, scaled)
+
+def coherence_error(S: sparse.spmatrix, forecasts: np.ndarray) -> float:
+    """Largest absolute gap between the aggregate rows and the sum of their bottom series."""
+    n_nodes, n_bottom = S.shape
+    n_aggregate = n_nodes - n_bottom
+    gap = forecasts[:n_aggregate] - S[:n_aggregate] @ forecasts[n_aggregate:]
+    return float(np.abs(gap).max()) if n_aggregate else 0.0
+
+def seasonal_naive_variance(history: np.ndarray, m: int = 12) -> np.ndarray:
+    """In-sample variance of one-season-ahead naive errors per series."""
+    errors = history[:, m:] - history[:, :-m]
+    return errors.var(axis=1, ddof=1) if errors.shape[1] > 1 else np.full(len(history), np.nan)
+
+def base_forecasts(node_ids: List[str], history: np.ndarray, manifest: Dict = None,
+                   models_dir: Path = HIERARCHY_MANIFEST_FILE.parent,
+                   steps: int = FORECAST_HORIZON, m: int = 12) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build base forecasts and error variances for every node.
+
+    Nodes with a fitted model in the manifest are forecast with it; all
+    other nodes (the bottom series and skipped nodes) use the seasonal
+    naive forecast. A model node's variance is the residual variance of
+    its full-history fit, recorded in the manifest at training time (the
+    compact model only holds the last months, so its own residuals are
+    not comparable with the naive variances of the other nodes).
+
+    Args:
+        node_ids: Row labels of the summing matrix
+        history: Node history of shape (n_nodes, n_months)
+        manifest: Hierarchy manifest (None = seasonal naive everywhere)
+        models_dir: Directory holding the node model files
+        steps: Forecast horizon
+        m: Season length
+
+    Returns:
+        (forecasts, variances), of shapes (n_nodes, steps) and (n_nodes,)
+    """
+    forecasts = seasonal_naive(history, steps, m)
+    variances = seasonal_naive_variance(history, m)
+
+    entries = (manifest or {}).get('nodes', {})
+    missing_variance = 0
+    for row, node in enumerate(node_ids):
+        entry = entries.get(node)
+        if not entry or not entry.get('model_file'):
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            results = load_compact_model(Path(models_dir) / entry['model_file'])
+            forecasts[row] = results.get_forecast(steps).predicted_mean.to_numpy()
+        if entry.get('resid_var') is not None:
+            variances[row] = entry['resid_var']
+        else:
+            missing_variance += 1
+    if missing_variance:
+        log_warning(logger, f"{missing_variance} node model(s) have no recorded residual variance; "
+                            "using the seasonal naive variance (retrain with train_hierarchy.py)")
+    return forecasts, variances
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Reconcile hierarchical forecasts")
+    parser.add_argument(
+        "--method", choices=METHODS, default=RECONCILIATION_METHOD,
+        help="Reconciliation method"
+    )
+    return parser.parse_args(argv)
+
+@profile_run("reconciliation")
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        log_section(logger, "FORECAST RECONCILIATION")
+        ensure_directories()
+
+        with span("build hierarchy"):
+            columns = ["order_date", "sales"] + level_columns(HIERARCHY_LEVELS)
+            bottom = bottom_level_series(load_cleaned_sales(columns=columns), HIERARCHY_LEVELS)
+            S, node_ids = summing_matrix(bottom.columns, HIERARCHY_LEVELS)
+            history = np.asarray(S @ bottom.to_numpy().T)
+        n_aggregate = S.shape[0] - S.shape[1]
+        log_success(logger, f"{n_aggregate} aggregate nodes over {S.shape[1]} bottom series")
+
+        manifest = None
+        if HIERARCHY_MANIFEST_FILE.exists():
+            with open(HIERARCHY_MANIFEST_FILE, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('data_digest') != cleaned_data_digest():
+                log_warning(logger, "Node models were trained on older data - run train_hierarchy.py")
+        else:
+            log_warning(logger, "No node models found - using seasonal naive base forecasts")
+
+        with span("base forecasts"):
+            base, variances = base_forecasts(node_ids, history, manifest)
+        logger.info(f"Largest aggregation gap in base forecasts: {coherence_error(S, base):,.2f}")
+
+        with span("reconcile"):
+            reconciled = reconcile(
+                S, base, args.method,
+                residual_var=variances,
+                proportions=historical_proportions(history[n_aggregate:])
+            )
+        logger.info(f"Largest aggregation gap after {args.method}: {coherence_error(S, reconciled):,.2e}")
+
+        index = pd.date_range(bottom.index[-1], periods=FORECAST_HORIZON + 1, freq="M")[1:]
+        output = pd.DataFrame(reconciled[:n_aggregate].T, index=index, columns=node_ids[:n_aggregate])
+        output.index.name = "date"
+        output.to_csv(RECONCILED_FORECAST_FILE)
+        log_success(logger, f"Reconciled forecasts saved to {RECONCILED_FORECAST_FILE}")
+
+        log_section(logger, "RECONCILIATION COMPLETED SUCCESSFULLY")
+
+    except Exception as e:
+        log_error(logger, f"Reconciliation failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Columnar Storage for the Cleaned Sales Table
+
+The cleaned CSV remains the canonical, human-readable output of the
+cleaning pipeline. Next to it we keep a compressed Parquet copy with
+proper dtypes (datetimes, floats, dictionary-encoded categoricals) so
+downstream stages can load only the columns they need without
+re-parsing text.
+
+Readers should always go through load_cleaned_sales(), which prefers the
+Parquet copy and falls back to the CSV when the copy is missing, older
+than the CSV, or pyarrow is not installed.
+"""
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from config import (
+    CLEANED_SALES_FILE,
+    CLEANED_SALES_PARQUET,
+    CATEGORICAL_COLUMNS,
+    DATE_COLUMNS,
+    PARQUET_COMPRESSION
+)
+from logger import setup_logger, log_success, log_warning
+
+logger = setup_logger(__name__)
+
+def parquet_available() -> bool:
+    """Return True if a working Parquet engine (pyarrow) is installed."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def parquet_path_for(csv_path: Path) -> Path:
+    """
+    Return the Parquet companion path for a cleaned CSV file.
+
+    Args:
+        csv_path: Path to the cleaned CSV file
+
+    Returns:
+        Path to the matching Parquet file
+    """
+    return Path(csv_path).with_suffix(".parquet")
+
+def is_parquet_fresh(csv_path: Path, parquet_path: Path) -> bool:
+    """
+    Check whether the Parquet copy can be used instead of the CSV.
+
+    The copy is considered stale if the CSV was written after it.
+
+    Args:
+        csv_path: Path to the cleaned CSV file
+        parquet_path: Path to the Parquet copy
+
+    Returns:
+        True if the Parquet copy exists and is not older than the CSV
+    """
+    if not parquet_path.exists():
+        return False
+    if not csv_path.exists():
+        return True
+    return parquet_path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns
+
+def to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast low-cardinality text columns to categoricals.
+
+    Args:
+        df: Cleaned sales DataFrame
+
+    Returns:
+        DataFrame with CATEGORICAL_COLUMNS stored as category dtype
+    """
+    df = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+def save_parquet(df: pd.DataFrame, parquet_path: Path = CLEANED_SALES_PARQUET) -> bool:
+    """
+    Write the typed, compressed Parquet copy of the cleaned data.
+
+    Args:
+        df: Cleaned sales DataFrame
+        parquet_path: Destination path
+
+    Returns:
+        True if the file was written, False if pyarrow is unavailable
+    """
+    if not parquet_available():
+        log_warning(logger, "pyarrow not installed - skipping Parquet output")
+        return False
+
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    to_columnar(df).to_parquet(
+        parquet_path,
+        engine="pyarrow",
+        compression=PARQUET_COMPRESSION,
+        index=False
+    )
+    log_success(logger, f"Columnar copy saved to {parquet_path}")
+    return True
+
+def save_cleaned_data(df: pd.DataFrame, csv_path: Path = CLEANED_SALES_FILE) -> None:
+    """
+    Save cleaned data as CSV plus its Parquet companion.
+
+    The CSV is written first so the Parquet copy is never older than it.
+
+    Args:
+        df: Cleaned sales DataFrame
+        csv_path: Destination path for the CSV file
+    """
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(csv_path, index=False)
+    log_success(logger, f"Cleaned data saved to {csv_path}")
+    save_parquet(df, parquet_path_for(csv_path))
+
+class ChunkedSalesWriter:
+    """
+    Append cleaned chunks to the CSV and its Parquet companion.
+
+    Used by the streaming cleaning mode so that no more than one chunk is
+    ever held in memory. The Parquet schema is fixed from the first chunk
+    with integer columns widened to float64 and dictionary indices to
+    int32, because a later chunk may contain NaNs or more categories than
+    the first one did.
+
+    Usage:
+        with ChunkedSalesWriter(CLEANED_SALES_FILE) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, csv_path: Path = CLEANED_SALES_FILE):
+        self.csv_path = Path(csv_path)
+        self.parquet_path = parquet_path_for(self.csv_path)
+        self.rows_written = 0
+        self._header_written = False
+        self._parquet_writer = None
+        self._schema = None
+        self._write_parquet = parquet_available()
+
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        # Remove outputs of a previous run so we never append to them
+        for path in (self.csv_path, self.parquet_path):
+            if path.exists():
+                path.unlink()
+        if not self._write_parquet:
+            log_warning(logger, "pyarrow not installed - skipping Parquet output")
+
+    def _chunk_schema(self, table):
+        """Build the fixed Parquet schema from the first chunk."""
+        import pyarrow as pa
+
+        fields = []
+        for field in table.schema:
+            if pa.types.is_integer(field.type):
+                field = field.with_type(pa.float64())
+            elif pa.types.is_dictionary(field.type):
+                field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+            elif pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            fields.append(field)
+        return pa.schema(fields, metadata=table.schema.metadata)
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append one cleaned chunk to both outputs.
+
+        Args:
+            df: Cleaned chunk (same columns for every call)
+        """
+        if df.empty:
+            return
+
+        df.to_csv(self.csv_path, mode="a", header=not self._header_written, index=False)
+        self._header_written = True
+
+        if self._write_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(to_columnar(df), preserve_index=False)
+            if self._parquet_writer is None:
+                self._schema = self._chunk_schema(table)
+                self._parquet_writer = pq.ParquetWriter(
+                    self.parquet_path, self._schema, compression=PARQUET_COMPRESSION
+                )
+            self._parquet_writer.write_table(table.cast(self._schema))
+
+        self.rows_written += len(df)
+
+    def close(self) -> None:
+        """Finalize the Parquet file."""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+            log_success(logger, f"Columnar copy saved to {self.parquet_path}")
+        log_success(logger, f"Cleaned data saved to {self.csv_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._parquet_writer is not None:
+            # Don't leave a partial copy that readers would treat as fresh
+            self._parquet_writer.close()
+            self._parquet_writer = None
+            self.parquet_path.unlink(missing_ok=True)
+        return False
+
+def load_cleaned_sales(columns: Optional[List[str]] = None,
+                       path: Path = CLEANED_SALES_FILE) -> pd.DataFrame:
+    """
+    Load the cleaned sales table, preferring the Parquet copy.
+
+    Args:
+        columns: Optional list of columns to load (all columns if None)
+        path: Path to the cleaned CSV file
+
+    Returns:
+        DataFrame with parsed date columns
+
+    Raises:
+        FileNotFoundError: If neither the CSV nor the Parquet copy exists
+    """
+    path = Path(path)
+    parquet_path = parquet_path_for(path)
+
+    if parquet_available() and is_parquet_fresh(path, parquet_path):
+        return pd.read_parquet(parquet_path, columns=columns, engine="pyarrow")
+
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Cleaned data not found: {path}\n"
+            f"Please run data_cleaning.py first"
+        )
+
+    if columns is None:
+        date_columns = DATE_COLUMNS
+    else:
+        date_columns = [col for col in DATE_COLUMNS if col in columns]
+    return pd.read_csv(path, usecols=columns, parse_dates=date_columns)
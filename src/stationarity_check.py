@@ -13,24 +13,9 @@ Usage:
     python src/stationarity_check.py
 """
 import pandas as pd
-from statsmodels.tsa.stattools import adfuller
 from pathlib import Path
-from config import CLEANED_SALES_FILE
-
-def load_monthly_sales():
-    """
-    Load and aggregate sales data to monthly level.
-    
-    Returns:
-        Series with monthly aggregated sales indexed by date
-    """
-    df = pd.read_csv(CLEANED_SALES_FILE, parse_dates=["order_date"])
-    monthly_sales = (
-        df.set_index("order_date")
-          .resample("M")["sales"]
-          .sum()
-    )
-    return monthly_sales
+from aggregates import load_monthly_sales
+from logger import profile_run, flush_logs
 
 def adf_test(series):
     """
@@ -44,7 +29,11 @@ def adf_test(series):
     Prints:
         ADF statistic, p-value, and critical values
     """
+    from statsmodels.tsa.stattools import adfuller
+
     result = adfuller(series)
+    # Records are written by a background thread; let them go first
+    flush_logs()
     print("\n--- ADF Test Results ---")
     print(f"ADF Statistic: {result[0]}")
     print(f"p-value: {result[1]}")
@@ -52,6 +41,7 @@ def adf_test(series):
     for key, value in result[4].items():
         print(f"   {key}: {value}")
 
+@profile_run("stationarity_check")
 def main():
     monthly_sales = load_monthly_sales()
     adf_test(monthly_sales)
@@ -0,0 +1,418 @@
+"""
+Many-Series SARIMA Training
+
+Fits one SARIMA model per node of the sales hierarchy (see hierarchy.py)
+across a process pool and writes a compact model per node to
+models/hierarchy/, plus a manifest.json describing the run: the data
+version, the model orders, and each node's status, fit statistics and
+model file.
+
+Series are sent to workers in batches so the per-task overhead stays
+small when there are thousands of nodes. A failing node is recorded in
+the manifest and does not stop the run.
+
+With --update the existing node models are brought up to date with the
+months added since the manifest was written instead of being refitted
+(see model_utils.update_model); nodes without a model are fitted.
+
+Usage:
+    python src/train_hierarchy.py
+    python src/train_hierarchy.py --jobs 8
+    python src/train_hierarchy.py --update
+"""
+import argparse
+import json
+import sys
+import time
+import warnings
+from concurrent.futures import as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from config import (
+    SARIMA_ORDER,
+    SARIMA_SEASONAL_ORDER,
+    ENFORCE_STATIONARITY,
+    ENFORCE_INVERTIBILITY,
+    HIERARCHY_LEVELS,
+    HIERARCHY_MODELS_DIR,
+    HIERARCHY_MANIFEST_FILE,
+    HIERARCHY_MIN_MONTHS,
+    HIERARCHY_N_JOBS,
+    HIERARCHY_BATCH_SIZE,
+    ensure_directories
+)
+from logger import setup_logger, log_section, log_success, log_warning, log_error, span, profile_run
+from aggregates import cleaned_data_digest
+from hierarchy import load_hierarchy_series, node_filename, parse_node_id
+from parallel import resolve_n_jobs, process_pool
+from model_utils import save_compact_model, load_compact_model, update_model, residual_variance
+
+logger = setup_logger(__name__)
+
+def history_length(series: pd.Series) -> int:
+    """Number of months from the first non-zero value to the end."""
+    nonzero = series.to_numpy().nonzero()[0]
+    return 0 if len(nonzero) == 0 else len(series) - int(nonzero[0])
+
+def fit_node(node: str, series: pd.Series, output_dir: Path,
+             order=SARIMA_ORDER, seasonal_order=SARIMA_SEASONAL_ORDER,
+             min_months: int = HIERARCHY_MIN_MONTHS) -> Dict:
+    """
+    Fit and save the model of one hierarchy node.
+
+    Args:
+        node: Node identifier
+        series: Monthly series of the node
+        output_dir: Directory for the compact model file
+        order: (p, d, q)
+        seasonal_order: (P, D, Q, m)
+        min_months: Minimum history (from the first sale) required to fit
+
+    Returns:
+        Record with status 'ok', 'skipped' or 'failed', fit statistics,
+        model file name, error message and elapsed seconds
+    """
+    start = time.time()
+    record = {
+        'node': node,
+        'status': 'ok',
+        'n_months': history_length(series),
+        'aic': None,
+        'bic': None,
+        'resid_var': None,
+        'model_file': None,
+        'error': None
+    }
+
+    if record['n_months'] < min_months:
+        record['status'] = 'skipped'
+        record['error'] = f"only {record['n_months']} months of history (need {min_months})"
+    else:
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                results = SARIMAX(
+                    series,
+                    order=order,
+                    seasonal_order=seasonal_order,
+                    enforce_stationarity=ENFORCE_STATIONARITY,
+                    enforce_invertibility=ENFORCE_INVERTIBILITY
+                ).fit(disp=False)
+            filename = node_filename(node)
+            save_compact_model(results, Path(output_dir) / filename)
+            record.update({
+                'aic': float(results.aic),
+                'bic': float(results.bic),
+                'resid_var': residual_variance(results),
+                'model_file': filename
+            })
+        except Exception as e:
+            record['status'] = 'failed'
+            record['error'] = f"{type(e).__name__}: {e}"
+
+    record['elapsed'] = time.time() - start
+    return record
+
+def update_node(node: str, series: pd.Series, output_dir: Path, entry: Dict = None,
+                refit: bool = False, order=SARIMA_ORDER, seasonal_order=SARIMA_SEASONAL_ORDER,
+                min_months: int = HIERARCHY_MIN_MONTHS) -> Dict:
+    """
+    Bring the saved model of one node up to date with its series.
+
+    Args:
+        node: Node identifier
+        series: Complete monthly series of the node
+        output_dir: Directory holding the compact model files
+        entry: The node's manifest entry (None for a new node)
+        refit: Re-estimate the parameters instead of appending
+        order: (p, d, q) for nodes that have to be fitted
+        seasonal_order: (P, D, Q, m) for nodes that have to be fitted
+        min_months: Minimum history required to fit a node
+
+    Returns:
+        Record as from fit_node(), plus 'n_new' (months added) and
+        'refitted'; nodes without a saved model are fitted from scratch
+    """
+    if not entry or not entry.get('model_file'):
+        return fit_node(node, series, output_dir, order, seasonal_order, min_months)
+
+    start = time.time()
+    record = dict(entry, node=node, status='ok', n_months=history_length(series), error=None)
+    record.pop('keys', None)
+    try:
+        path = Path(output_dir) / entry['model_file']
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            results, n_new, refitted = update_model(load_compact_model(path), series, refit=refit)
+        if refitted:
+            record.update(aic=float(results.aic), bic=float(results.bic),
+                          resid_var=residual_variance(results))
+        if n_new or refitted:
+            # Without a refit the parameters, and so the fit statistics, are unchanged
+            stats = None if refitted else {key: entry[key] for key in ('aic', 'bic', 'resid_var')
+                                            if entry.get(key) is not None}
+            save_compact_model(results, path, stats=stats)
+        record.update(n_new=n_new, refitted=refitted)
+    except Exception as e:
+        record['status'] = 'failed'
+        record['error'] = f"{type(e).__name__}: {e}"
+
+    record['elapsed'] = time.time() - start
+    return record
+
+def _fit_batch(batch, output_dir, order, seasonal_order, min_months):
+    """Fit a list of (node, series) pairs in one worker task."""
+    return [
+        fit_node(node, series, output_dir, order, seasonal_order, min_months)
+        for node, series in batch
+    ]
+
+def _update_batch(batch, output_dir, refit, order, seasonal_order, min_months):
+    """Update a list of (node, series, manifest entry) triples in one worker task."""
+    return [
+        update_node(node, series, output_dir, entry, refit, order, seasonal_order, min_months)
+        for node, series, entry in batch
+    ]
+
+def _run_batches(task, batches: List[List], task_args: tuple, n_jobs: int) -> Dict[str, Dict]:
+    """Run `task` over batches of nodes, in a process pool if n_jobs > 1."""
+    records = {}
+    if n_jobs == 1:
+        for batch in batches:
+            for record in task(batch, *task_args):
+                records[record['node']] = record
+    else:
+        with process_pool(n_jobs) as executor:
+            futures = [executor.submit(task, batch, *task_args) for batch in batches]
+            for done, future in enumerate(as_completed(futures), 1):
+                for record in future.result():
+                    records[record['node']] = record
+                logger.debug(f"Finished batch {done}/{len(batches)}")
+    return records
+
+def train_hierarchy(wide: pd.DataFrame, output_dir: Path = HIERARCHY_MODELS_DIR,
+                    order=SARIMA_ORDER, seasonal_order=SARIMA_SEASONAL_ORDER,
+                    n_jobs: int = 1, min_months: int = HIERARCHY_MIN_MONTHS,
+                    batch_size: int = HIERARCHY_BATCH_SIZE) -> List[Dict]:
+    """
+    Fit one model per column of a months x nodes frame.
+
+    Args:
+        wide: Frame of monthly series, one column per node
+        output_dir: Directory for the compact model files
+        order: (p, d, q)
+        seasonal_order: (P, D, Q, m)
+        n_jobs: Worker processes (1 = sequential, -1 = all cores)
+        min_months: Minimum history required to fit a node
+        batch_size: Nodes per worker task
+
+    Returns:
+        List of node records in column order
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    nodes = list(wide.columns)
+    batches = [
+        [(node, wide[node]) for node in nodes[i:i + batch_size]]
+        for i in range(0, len(nodes), max(batch_size, 1))
+    ]
+    fit_args = (output_dir, order, seasonal_order, min_months)
+    n_jobs = min(resolve_n_jobs(n_jobs), max(len(batches), 1))
+    logger.info(f"Fitting {len(nodes)} series in {len(batches)} batch(es) with {n_jobs} worker(s)")
+
+    records = _run_batches(_fit_batch, batches, fit_args, n_jobs)
+    return [records[node] for node in nodes]
+
+def update_hierarchy(wide: pd.DataFrame, manifest: Dict,
+                     output_dir: Path = HIERARCHY_MODELS_DIR, refit: bool = False,
+                     n_jobs: int = 1, min_months: int = HIERARCHY_MIN_MONTHS,
+                     batch_size: int = HIERARCHY_BATCH_SIZE) -> List[Dict]:
+    """
+    Update the saved node models with the latest months of data.
+
+    Nodes keep the orders recorded in the manifest; nodes that are new or
+    had no model are fitted with those orders.
+
+    Args:
+        wide: Frame of complete monthly series, one column per node
+        manifest: Manifest of the previous run (see load_manifest)
+        output_dir: Directory holding the compact model files
+        refit: Re-estimate every node instead of appending
+        n_jobs: Worker processes (1 = sequential, -1 = all cores)
+        min_months: Minimum history required to fit a node
+        batch_size: Nodes per worker task
+
+    Returns:
+        List of node records in column order
+    """
+    nodes = list(wide.columns)
+    entries = manifest['nodes']
+    batches = [
+        [(node, wide[node], entries.get(node)) for node in nodes[i:i + batch_size]]
+        for i in range(0, len(nodes), max(batch_size, 1))
+    ]
+    update_args = (Path(output_dir), refit, tuple(manifest['order']),
+                   tuple(manifest['seasonal_order']), min_months)
+    n_jobs = min(resolve_n_jobs(n_jobs), max(len(batches), 1))
+    logger.info(f"Updating {len(nodes)} series in {len(batches)} batch(es) with {n_jobs} worker(s)")
+
+    records = _run_batches(_update_batch, batches, update_args, n_jobs)
+    return [records[node] for node in nodes]
+
+def write_manifest(records: List[Dict], wide: pd.DataFrame, data_digest: str,
+                   path: Path = HIERARCHY_MANIFEST_FILE,
+                   order=SARIMA_ORDER, seasonal_order=SARIMA_SEASONAL_ORDER,
+                   levels=HIERARCHY_LEVELS) -> Dict:
+    """
+    Write the run manifest and remove model files of earlier runs.
+
+    Args:
+        records: Node records from train_hierarchy()
+        wide: Frame the models were trained on
+        data_digest: Content hash of the cleaned data
+        path: Manifest file
+        order: (p, d, q) used for every node
+        seasonal_order: (P, D, Q, m) used for every node
+        levels: Hierarchy levels
+
+    Returns:
+        The manifest dictionary
+    """
+    path = Path(path)
+    manifest = {
+        'created_at': datetime.now().isoformat(),
+        'data_digest': data_digest,
+        'order': list(order),
+        'seasonal_order': list(seasonal_order),
+        'levels': [list(level) for level in levels],
+        'date_range': [str(wide.index.min().date()), str(wide.index.max().date())],
+        'n_observations': len(wide),
+        'nodes': {
+            record['node']: dict(
+                {k: v for k, v in record.items() if k != 'node'},
+                keys=parse_node_id(record['node'])
+            )
+            for record in records
+        }
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    current = {record['model_file'] for record in records if record['model_file']}
+    for stale in path.parent.glob("*.npz"):
+        if stale.name not in current:
+            stale.unlink()
+    return manifest
+
+def load_manifest(path: Path = HIERARCHY_MANIFEST_FILE) -> Dict:
+    """
+    Load the hierarchy manifest.
+
+    Raises:
+        FileNotFoundError: If train_hierarchy.py has not been run
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Hierarchy manifest not found: {path}\n"
+            f"Please run train_hierarchy.py first"
+        )
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def load_node_model(node: str, manifest_path: Path = HIERARCHY_MANIFEST_FILE):
+    """
+    Load the fitted model of one node.
+
+    Args:
+        node: Node identifier, e.g. "market=EU"
+        manifest_path: Manifest of the training run
+
+    Returns:
+        SARIMAX results ready for forecasting
+
+    Raises:
+        KeyError: If the node is unknown or has no fitted model
+    """
+    manifest = load_manifest(manifest_path)
+    entry = manifest['nodes'].get(node)
+    if entry is None or not entry.get('model_file'):
+        raise KeyError(f"No fitted model for node '{node}'")
+    return load_compact_model(Path(manifest_path).parent / entry['model_file'])
+
+def log_run_summary(records: List[Dict]) -> None:
+    """Log how many nodes were fitted, skipped or failed."""
+    counts = pd.Series([record['status'] for record in records]).value_counts()
+    log_success(logger, f"Fitted {counts.get('ok', 0)} of {len(records)} series")
+    if counts.get('skipped', 0):
+        log_warning(logger, f"Skipped {counts['skipped']} series with too little history")
+    if counts.get('failed', 0):
+        log_warning(logger, f"{counts['failed']} series failed to fit:")
+        for record in records:
+            if record['status'] == 'failed':
+                logger.info(f"  {record['node']}: {record['error']}")
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Fit one SARIMA model per hierarchy node")
+    parser.add_argument(
+        "--jobs", type=int, default=HIERARCHY_N_JOBS,
+        help="Worker processes (-1 = all cores, 1 = sequential)"
+    )
+    parser.add_argument(
+        "--update", action="store_true",
+        help="Update the saved models with new months instead of retraining"
+    )
+    parser.add_argument(
+        "--refit", action="store_true",
+        help="With --update, re-estimate parameters (warm-started) instead of appending"
+    )
+    return parser.parse_args(argv)
+
+@profile_run("train_hierarchy")
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        log_section(logger, "HIERARCHICAL SARIMA TRAINING")
+        ensure_directories()
+
+        with span("build series"):
+            wide = load_hierarchy_series()
+        log_success(logger, f"Built {wide.shape[1]} series of {len(wide)} months")
+
+        start = time.time()
+        if args.update:
+            manifest = load_manifest()
+            with span("update"):
+                records = update_hierarchy(wide, manifest, refit=args.refit, n_jobs=args.jobs)
+            n_new = max((record.get('n_new', 0) for record in records), default=0)
+            logger.info(f"Update took {time.time() - start:.1f}s ({n_new} new month(s))")
+            order, seasonal_order = manifest['order'], manifest['seasonal_order']
+        else:
+            with span("fit"):
+                records = train_hierarchy(wide, n_jobs=args.jobs)
+            logger.info(f"Training took {time.time() - start:.1f}s")
+            order, seasonal_order = SARIMA_ORDER, SARIMA_SEASONAL_ORDER
+        log_run_summary(records)
+
+        write_manifest(records, wide, cleaned_data_digest(),
+                       order=order, seasonal_order=seasonal_order)
+        log_success(logger, f"Manifest saved to {HIERARCHY_MANIFEST_FILE}")
+
+        log_section(logger, "TRAINING COMPLETED SUCCESSFULLY")
+
+    except Exception as e:
+        log_error(logger, f"Hierarchical training failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -52,37 +52,30 @@ Interpretable
 
 Easy to improve later
 '''
+import argparse
+import time
 import pandas as pd
 from pathlib import Path
+from datetime import datetime
 import sys
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 from config import (
-    CLEANED_SALES_FILE,
     SARIMA_ORDER,
     SARIMA_SEASONAL_ORDER,
     ENFORCE_STATIONARITY,
-    ENFORCE_INVERTIBILITY
+    ENFORCE_INVERTIBILITY,
+    MODEL_FORMAT,
+    ensure_directories
 )
-from logger import setup_logger, log_section, log_success, log_error
-from model_utils import save_model
+from logger import setup_logger, log_section, log_success, log_error, span, profile_run
+from model_utils import save_model, load_model, update_model, get_model_info
+import aggregates
 
 logger = setup_logger(__name__)
 
 def load_monthly_sales():
     """Load and aggregate sales data to monthly level."""
     try:
-        if not CLEANED_SALES_FILE.exists():
-            raise FileNotFoundError(
-                f"Cleaned data not found: {CLEANED_SALES_FILE}\n"
-                f"Please run data_cleaning.py first"
-            )
-        
-        df = pd.read_csv(CLEANED_SALES_FILE, parse_dates=["order_date"])
-        monthly_sales = (
-            df.set_index("order_date")
-              .resample("M")["sales"]
-              .sum()
-        )
+        monthly_sales = aggregates.load_monthly_sales()
         
         if len(monthly_sales) < 24:
             raise ValueError(f"Insufficient data: only {len(monthly_sales)} months available. Need at least 24 months for SARIMA")
@@ -99,6 +92,8 @@ def load_monthly_sales():
 
 def train_sarima(series):
     """Train SARIMA model on sales data."""
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
     try:
         logger.info(f"\nTraining SARIMA{SARIMA_ORDER}x{SARIMA_SEASONAL_ORDER}...")
         
@@ -118,15 +113,85 @@ def train_sarima(series):
         log_error(logger, f"Error training model: {e}")
         raise
 
-def main():
+def update_saved_model(series, refit=False):
+    """
+    Update the saved model with the months added since it was trained.
+    
+    New months are appended to the model's filter with the existing
+    parameters, so a forecast from the updated model starts at the latest
+    month without re-estimating anything. The stored AIC/BIC stay those
+    of the original fit unless the model is refitted.
+    
+    Args:
+        series: Complete monthly sales, including the new months
+        refit: Re-estimate the parameters, warm-started from the saved ones
+    
+    Returns:
+        Updated SARIMAX results
+    """
+    metadata = get_model_info().get('metadata', {})
+    model = load_model(check_metadata=False)
+    
+    start = time.time()
+    results, n_new, refitted = update_model(model, series, refit=refit)
+    elapsed = time.time() - start
+    
+    if not n_new and not refitted:
+        log_success(logger, f"Model is already up to date ({series.index.max().date()})")
+        return results
+    
+    logger.info(
+        f"{'Refitted' if refitted else 'Appended'} {n_new} new month(s) in {elapsed:.2f}s"
+    )
+    metadata.update({
+        'n_observations': len(series),
+        'date_range': f"{series.index.min()} to {series.index.max()}",
+        'updated_at': datetime.now().isoformat()
+    })
+    if refitted:
+        metadata.update({'aic': float(results.aic), 'bic': float(results.bic)})
+        stats = None
+    else:
+        stats = {key: metadata[key] for key in ('aic', 'bic') if key in metadata}
+    
+    save_model(results, metadata, metadata.get('model_format', MODEL_FORMAT), stats=stats)
+    return results
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Train the SARIMA model")
+    parser.add_argument(
+        "--update", action="store_true",
+        help="Update the saved model with new months instead of retraining"
+    )
+    parser.add_argument(
+        "--refit", action="store_true",
+        help="With --update, re-estimate parameters (warm-started) instead of appending"
+    )
+    return parser.parse_args(argv)
+
+@profile_run("train_sarima")
+def main(argv=None):
+    args = parse_args(argv)
     try:
+        ensure_directories()
+        if args.update:
+            log_section(logger, "SARIMA MODEL UPDATE")
+            with span("update"):
+                update_saved_model(load_monthly_sales(), refit=args.refit)
+            log_section(logger, "UPDATE COMPLETED SUCCESSFULLY")
+            return
+        
         log_section(logger, "SARIMA MODEL TRAINING")
         
-        sales = load_monthly_sales()
-        model_results = train_sarima(sales)
+        with span("load data"):
+            sales = load_monthly_sales()
+        with span("fit"):
+            model_results = train_sarima(sales)
 
         log_section(logger, "MODEL SUMMARY")
-        print(model_results.summary())
+        # Through the logger, so it stays in order with the queued log lines
+        logger.info(model_results.summary())
         
         # Save model with metadata
         metadata = {
@@ -139,7 +204,8 @@ def main():
             'bic': float(model_results.bic)
         }
         
-        save_model(model_results, metadata)
+        with span("save"):
+            save_model(model_results, metadata)
         
         log_section(logger, "TRAINING COMPLETED SUCCESSFULLY")
         
@@ -0,0 +1,110 @@
+"""
+Checkpoint store for hyperparameter tuning runs.
+
+Every finished candidate fit is appended as one JSON line to an
+append-only file, keyed by the series hash, the orders and the fit
+options that affect the result. A rerun, or a run over a wider grid,
+looks candidates up first and only fits the ones it has never seen.
+
+Timeouts and skipped candidates are not stored, so they are retried
+(e.g. with a larger budget) on the next run.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from config import TUNING_CHECKPOINT_FILE
+from fingerprint import series_digest
+from logger import setup_logger, log_warning
+
+logger = setup_logger(__name__)
+
+# Statuses that are deterministic for a given key and worth persisting
+PERSISTED_STATUSES = ("ok", "failed")
+
+# fit_candidate options that change the fitted model (timeouts do not)
+KEY_OPTIONS = ("enforce_stationarity", "enforce_invertibility", "maxiter", "warm_start")
+
+def checkpoint_key(series_hash, order, seasonal_order, fit_options=None):
+    """
+    Build the lookup key for one candidate.
+    
+    Args:
+        series_hash: Digest of the series being tuned
+        order: (p, d, q)
+        seasonal_order: (P, D, Q, m)
+        fit_options: fit_candidate keyword arguments
+    
+    Returns:
+        Hex digest identifying the candidate
+    """
+    fit_options = fit_options or {}
+    payload = {
+        "series": series_hash,
+        "order": list(order),
+        "seasonal_order": list(seasonal_order),
+        "options": {name: fit_options.get(name) for name in KEY_OPTIONS}
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+class TuningCheckpoint:
+    """
+    Append-only store of candidate results for one series.
+    
+    Usage:
+        checkpoint = TuningCheckpoint(series)
+        record = checkpoint.lookup(order, seasonal_order, fit_options)
+        checkpoint.save(order, seasonal_order, fit_options, record)
+    """
+
+    def __init__(self, series, path: Path = TUNING_CHECKPOINT_FILE):
+        self.path = Path(path)
+        self.series_hash = series_digest(series)
+        self._records = self._load()
+
+    def _load(self):
+        """Read stored records, ignoring a torn last line."""
+        records = {}
+        if not self.path.exists():
+            return records
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    log_warning(logger, f"Skipping unreadable checkpoint line {line_number}")
+                    continue
+                record = entry["record"]
+                record["order"] = tuple(record["order"])
+                record["seasonal_order"] = tuple(record["seasonal_order"])
+                records[entry["key"]] = record
+        return records
+
+    def __len__(self):
+        return len(self._records)
+
+    def lookup(self, order, seasonal_order, fit_options=None):
+        """
+        Return the stored record for a candidate, or None.
+        """
+        key = checkpoint_key(self.series_hash, order, seasonal_order, fit_options)
+        record = self._records.get(key)
+        return dict(record) if record is not None else None
+
+    def save(self, order, seasonal_order, fit_options, record):
+        """
+        Append a finished candidate to the store.
+        
+        Records whose status is not in PERSISTED_STATUSES are ignored.
+        """
+        if record['status'] not in PERSISTED_STATUSES:
+            return
+        
+        key = checkpoint_key(self.series_hash, order, seasonal_order, fit_options)
+        self._records[key] = dict(record)
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"key": key, "record": record}) + "\n")
+            f.flush()
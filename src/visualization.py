@@ -3,7 +3,6 @@ Visualization Utilities for Sales Forecasting Project
 
 Centralized plotting functions with consistent styling.
 """
-import matplotlib.pyplot as plt
 import pandas as pd
 from pathlib import Path
 from config import FIGURE_SIZE, RESULTS_DIR
@@ -22,6 +21,8 @@ def save_plot(filename: str, dpi: int = 300):
     Returns:
         Path to saved file
     """
+    import matplotlib.pyplot as plt
+
     filepath = RESULTS_DIR / filename
     plt.savefig(filepath, dpi=dpi, bbox_inches='tight')
     plt.close()
@@ -39,6 +40,8 @@ def plot_monthly_sales(monthly_sales: pd.DataFrame, save: bool = True):
     Returns:
         Path to saved file if save=True, None otherwise
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=FIGURE_SIZE)
     plt.plot(monthly_sales["order_date"], monthly_sales["sales"], 
              linewidth=2, color='#2E86AB', marker='o', markersize=4)
@@ -62,7 +65,7 @@ def plot_monthly_sales(monthly_sales: pd.DataFrame, save: bool = True):
         return None
 
 def plot_forecast(sales: pd.Series, forecast: pd.Series, 
-                  conf_int: pd.DataFrame, save: bool = True):
+                  conf_int: pd.DataFrame, save: bool = True, alpha: float = 0.05):
     """
     Plot actual sales with forecast and confidence intervals.
     
@@ -71,10 +74,13 @@ def plot_forecast(sales: pd.Series, forecast: pd.Series,
         forecast: Forecasted sales
         conf_int: Confidence intervals DataFrame
         save: Whether to save the plot to file
+        alpha: Significance level of the intervals (for the legend)
     
     Returns:
         Path to saved file if save=True, None otherwise
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=FIGURE_SIZE)
     
     # Plot actual sales
@@ -92,7 +98,7 @@ def plot_forecast(sales: pd.Series, forecast: pd.Series,
         conf_int.iloc[:, 1],
         color='#E63946',
         alpha=0.2,
-        label="95% Confidence Interval"
+        label=f"{1 - alpha:.0%} Confidence Interval"
     )
     
     # Styling
@@ -128,6 +134,8 @@ def plot_model_evaluation(train: pd.Series, test: pd.Series,
     Returns:
         Path to saved file if save=True, None otherwise
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=FIGURE_SIZE)
     
     # Plot data
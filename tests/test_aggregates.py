@@ -0,0 +1,70 @@
+"""
+Unit tests for the shared monthly aggregate store.
+"""
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import aggregates
+
+@pytest.fixture
+def cleaned_csv(tmp_path):
+    """Cleaned-sales CSV spanning three months."""
+    path = tmp_path / "cleaned.csv"
+    pd.DataFrame({
+        "order_date": ["2011-01-05", "2011-01-20", "2011-02-11", "2011-03-30"],
+        "sales": [100.0, 50.0, 25.0, 10.0]
+    }).to_csv(path, index=False)
+    return path
+
+class TestLoadMonthlySales:
+    """Tests for the monthly aggregate store."""
+
+    def test_aggregates_and_persists(self, tmp_path, cleaned_csv):
+        """Test monthly totals and that the aggregate is written to disk."""
+        cache_dir = tmp_path / "aggregates"
+        result = aggregates.load_monthly_sales(path=cleaned_csv, cache_dir=cache_dir)
+
+        assert result.tolist() == [150.0, 25.0, 10.0]
+        assert result.index.freqstr == "M"
+        assert len(list(cache_dir.glob("monthly_sales_*.csv"))) == 1
+
+    def test_persisted_aggregate_is_reused(self, tmp_path, cleaned_csv, monkeypatch):
+        """Test that a persisted aggregate is served without reading the sales data again."""
+        cache_dir = tmp_path / "aggregates"
+        first = aggregates.load_monthly_sales(path=cleaned_csv, cache_dir=cache_dir)
+        aggregates._MEMO.clear()
+
+        digest = aggregates.cleaned_data_digest(cleaned_csv, cache_dir)
+        persisted = aggregates._read_aggregate(
+            aggregates._aggregate_file(cache_dir, "sales", digest), "sales"
+        )
+
+        # The digest still needs the file, but the rows must not be loaded
+        def fail(*args, **kwargs):
+            raise AssertionError("cleaned sales were read again")
+        monkeypatch.setattr(aggregates, "load_cleaned_sales", fail)
+        second = aggregates.load_monthly_sales(path=cleaned_csv, cache_dir=cache_dir)
+        pd.testing.assert_series_equal(first, persisted, check_names=False)
+        pd.testing.assert_series_equal(first, second)
+
+    def test_content_change_invalidates(self, tmp_path, cleaned_csv):
+        """Test that new data produces a new aggregate."""
+        cache_dir = tmp_path / "aggregates"
+        aggregates.load_monthly_sales(path=cleaned_csv, cache_dir=cache_dir)
+
+        pd.DataFrame({
+            "order_date": ["2011-01-05", "2011-02-11"],
+            "sales": [1.0, 2.0]
+        }).to_csv(cleaned_csv, index=False)
+        result = aggregates.load_monthly_sales(path=cleaned_csv, cache_dir=cache_dir)
+
+        assert result.tolist() == [1.0, 2.0]
+        assert len(list(cache_dir.glob("monthly_sales_*.csv"))) == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
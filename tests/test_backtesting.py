@@ -0,0 +1,124 @@
+"""
+Unit tests for the rolling-origin backtesting engine.
+"""
+import pytest
+import sys
+import warnings
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from backtesting import (
+    rolling_origins,
+    backtest,
+    fold_metrics,
+    aggregate_metrics,
+    forecast_metrics,
+    backtest_candidates
+)
+
+ORDER = (1, 0, 0)
+SEASONAL_ORDER = (0, 1, 1, 12)
+
+@pytest.fixture
+def monthly_series():
+    """Four years of trending, seasonal monthly data."""
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2011-01-31", periods=48, freq="M")
+    t = np.arange(48)
+    values = 1000 + 15 * t + 200 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 20, 48)
+    return pd.Series(values, index=index)
+
+class TestRollingOrigins:
+    """Tests for fold boundaries."""
+
+    def test_expanding(self):
+        """Test that expanding folds start at zero and end with the data."""
+        origins = rolling_origins(48, horizon=6, n_folds=3, step=2)
+        assert origins == [(0, 38, 44), (0, 40, 46), (0, 42, 48)]
+
+    def test_sliding(self):
+        """Test that sliding folds keep a fixed training length."""
+        origins = rolling_origins(48, horizon=12, n_folds=2, window="sliding", window_size=30)
+        assert origins == [(5, 35, 47), (6, 36, 48)]
+
+    def test_too_short(self):
+        """Test that impossible fold layouts are rejected."""
+        with pytest.raises(ValueError):
+            rolling_origins(30, horizon=12, n_folds=6)
+        with pytest.raises(ValueError):
+            rolling_origins(48, horizon=12, n_folds=2, window="sliding", window_size=40)
+
+class TestBacktest:
+    """Tests for the backtest itself."""
+
+    def test_extend_matches_filtering_full_history(self, monthly_series):
+        """Test that reused folds equal filtering all data up to the origin with the first fit's parameters."""
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        spec = dict(order=ORDER, seasonal_order=SEASONAL_ORDER,
+                    enforce_stationarity=False, enforce_invertibility=False)
+        forecasts = backtest(monthly_series, ORDER, SEASONAL_ORDER, horizon=6,
+                             n_folds=4, step=2, refit=False)
+        origins = rolling_origins(48, horizon=6, n_folds=4, step=2)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            first_end = origins[0][1]
+            params = SARIMAX(monthly_series[:first_end], **spec).fit(disp=False).params
+            last_end = origins[-1][1]
+            expected = SARIMAX(monthly_series[:last_end], **spec).filter(params).get_forecast(6).predicted_mean
+
+        last_fold = forecasts[forecasts['fold'] == 3]
+        np.testing.assert_allclose(last_fold['predicted'], expected, rtol=1e-8)
+        assert list(last_fold['date']) == list(expected.index)
+        assert len(forecasts) == 4 * 6
+
+    def test_parallel_refit_matches_sequential(self, monthly_series):
+        """Test that refitted folds give the same result in a process pool."""
+        options = dict(horizon=6, n_folds=3, refit=True)
+        sequential = backtest(monthly_series, ORDER, SEASONAL_ORDER, n_jobs=1, **options)
+        parallel = backtest(monthly_series, ORDER, SEASONAL_ORDER, n_jobs=2, **options)
+        pd.testing.assert_frame_equal(sequential, parallel)
+
+    def test_metrics(self, monthly_series):
+        """Test per-fold and aggregated metrics."""
+        forecasts = backtest(monthly_series, ORDER, SEASONAL_ORDER, horizon=6, n_folds=3)
+        folds = fold_metrics(forecasts)
+        assert list(folds.columns) == ['origin', 'n_test', 'mae', 'rmse', 'mape']
+        assert len(folds) == 3
+
+        fold = forecasts[forecasts['fold'] == 1]
+        expected = forecast_metrics(fold['actual'], fold['predicted'])
+        for metric, value in expected.items():
+            assert folds.loc[1, metric] == pytest.approx(value)
+
+        summary = aggregate_metrics(folds)
+        assert summary.loc['mean', 'mae'] == pytest.approx(folds['mae'].mean())
+
+    def test_forecast_metrics_skips_zero_actuals(self):
+        """Test MAPE with zero actual values."""
+        metrics = forecast_metrics([0.0, 100.0], [10.0, 90.0])
+        assert metrics['mae'] == pytest.approx(10.0)
+        assert metrics['rmse'] == pytest.approx(10.0)
+        assert metrics['mape'] == pytest.approx(10.0)
+
+class TestBacktestCandidates:
+    """Tests for backtesting many candidates."""
+
+    def test_failed_candidate_is_recorded(self, monthly_series):
+        """Test that an invalid candidate does not stop the others."""
+        scores = backtest_candidates(
+            monthly_series,
+            [(ORDER, SEASONAL_ORDER), ((1, 1, 1), (1, 1, 1, 1))],
+            horizon=6, n_folds=2
+        )
+        assert list(scores['status']) == ['ok', 'failed']
+        assert scores.loc[0, 'mae'] > 0
+        assert np.isnan(scores.loc[1, 'mae'])
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
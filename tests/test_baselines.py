@@ -0,0 +1,85 @@
+"""
+Unit tests for vectorized baseline forecasts.
+"""
+import pytest
+import sys
+import numpy as np
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from baselines import (
+    batch_forecast,
+    evaluate_baselines,
+    scores_to_frame,
+    holt_winters,
+    drift,
+    seasonal_naive
+)
+
+@pytest.fixture
+def panel():
+    """Constant, trending and seasonal series over four years."""
+    t = np.arange(48)
+    return np.vstack([
+        np.full(48, 50.0),
+        10 + 2.0 * t,
+        100 + 20 * np.sin(2 * np.pi * t / 12)
+    ])
+
+class TestBatchForecast:
+    """Tests for the baseline methods."""
+
+    def test_shapes_and_constant_series(self, panel):
+        """Test that every method returns (n_series, steps) and keeps a constant flat."""
+        forecasts = batch_forecast(panel, steps=6)
+        assert set(forecasts) == {"naive", "seasonal_naive", "drift", "moving_average", "ses", "holt_winters"}
+        for values in forecasts.values():
+            assert values.shape == (3, 6)
+            np.testing.assert_allclose(values[0], 50.0)
+
+    def test_exact_patterns(self, panel):
+        """Test drift on a line and seasonal naive on a pure season."""
+        t_future = np.arange(48, 60)
+        np.testing.assert_allclose(drift(panel, 12)[1], 10 + 2.0 * t_future)
+        np.testing.assert_allclose(seasonal_naive(panel, 12)[2],
+                                   100 + 20 * np.sin(2 * np.pi * t_future / 12), atol=1e-9)
+
+    def test_seasonal_naive_wraps_horizon(self):
+        """Test that the last season is repeated over a horizon longer than a season."""
+        history = np.arange(30.0).reshape(1, 30)
+        np.testing.assert_array_equal(seasonal_naive(history, 14, m=12)[0],
+                                      list(range(18, 30)) + [18, 19])
+
+    def test_holt_winters_tracks_trend_and_season(self, panel):
+        """Test that Holt-Winters recovers a noiseless trend plus season."""
+        t = np.arange(60)
+        series = (200 + 3.0 * t + 25 * np.sin(2 * np.pi * t / 12))[None]
+        forecast = holt_winters(series[:, :48], 12)
+        np.testing.assert_allclose(forecast, series[:, 48:], rtol=1e-8)
+
+    def test_short_history(self):
+        """Test that Holt-Winters is skipped without two full seasons."""
+        forecasts = batch_forecast(np.ones((2, 20)), steps=3)
+        assert np.isnan(forecasts["holt_winters"]).all()
+        with pytest.raises(ValueError):
+            holt_winters(np.ones((2, 20)), 3)
+
+    def test_unknown_method(self, panel):
+        """Test that an unknown method is rejected."""
+        with pytest.raises(ValueError):
+            batch_forecast(panel, methods=["prophet"])
+
+class TestEvaluation:
+    """Tests for holdout scoring."""
+
+    def test_best_method_per_series(self, panel):
+        """Test that the best baseline is chosen per series."""
+        scores = scores_to_frame(evaluate_baselines(panel, holdout=12), ["flat", "line", "wave"])
+        assert scores.loc["line", "best_method"] == "drift"
+        assert scores.loc["wave", "best_mae"] == pytest.approx(0.0, abs=1e-9)
+        assert scores.loc["flat", "best_mae"] == pytest.approx(0.0)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
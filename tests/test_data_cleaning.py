@@ -2,6 +2,7 @@
 Unit tests for data cleaning module.
 """
 import pytest
+import numpy as np
 import pandas as pd
 import sys
 from pathlib import Path
@@ -52,5 +53,126 @@ class TestParseDates:
         assert pd.isna(result["order_date"].iloc[0])
         assert pd.isna(result["ship_date"].iloc[1])
 
+    def test_parse_dates_day_first_formats(self):
+        """Test that raw day-first dates in both styles are parsed."""
+        df = pd.DataFrame({
+            "order_date": ["6/1/2011", "13-01-2011", "31/12/2014"],
+            "ship_date": ["8/1/2011", "15-01-2011", None]
+        })
+        result = data_cleaning.parse_dates(df)
+        assert list(result["order_date"]) == list(pd.to_datetime(
+            ["2011-01-06", "2011-01-13", "2014-12-31"]
+        ))
+        assert result["ship_date"].iloc[1] == pd.Timestamp("2011-01-15")
+        assert pd.isna(result["ship_date"].iloc[2])
+
+    def test_parse_date_column_maps_repeated_values(self):
+        """Test that repeated strings map back to the right rows."""
+        values = pd.Series(["1/2/2012", None, "1/2/2012", "2/1/2012"], index=[10, 11, 12, 13])
+        result = data_cleaning.parse_date_column(values)
+        assert list(result.index) == [10, 11, 12, 13]
+        assert result[10] == result[12] == pd.Timestamp("2012-02-01")
+        assert result[13] == pd.Timestamp("2012-01-02")
+        assert pd.isna(result[11])
+
+class TestCleanInChunks:
+    """Tests for the streaming cleaning mode."""
+
+    def test_duplicates_removed_across_chunks(self, tmp_path):
+        """Test that duplicates split across chunks are removed once."""
+        raw = pd.DataFrame({
+            "Order ID": ["A-1", "A-2", "A-1", "A-3", "A-2"],
+            "Order Date": ["2024-01-01", "2024-01-02", "2024-01-01", "", "2024-01-05"],
+            "Ship Date": ["2024-01-03"] * 5,
+            "Product ID": ["P-1", "P-1", "P-1", "P-2", "P-9"],
+            "Sales": ["100", "$1,200", "100", "50", "0"],
+            "Profit": ["10"] * 5,
+            "Shipping Cost": ["1"] * 5,
+            "Quantity": [1, 2, 1, 1, -1]
+        })
+        raw_path = tmp_path / "raw.csv"
+        output_path = tmp_path / "cleaned.csv"
+        raw.to_csv(raw_path, index=False)
+
+        counts = data_cleaning.clean_in_chunks(raw_path, output_path, chunksize=2)
+
+        result = pd.read_csv(output_path)
+        assert list(result["order_id"]) == ["A-1", "A-2"]
+        assert result["sales"].tolist() == [100, 1200]
+        assert counts["rows_read"] == 5
+        assert counts["duplicate_records"] == 1
+        assert counts["duplicate_order_ids"] == 2
+        assert counts["missing_order_dates"] == 1
+        assert counts["negative_quantities"] == 1
+
+    def test_mark_seen_keeps_history_sorted(self):
+        """Test that merging a chunk into the seen hashes matches a full re-sort."""
+        rng = np.random.default_rng(0)
+        seen = np.array([], dtype=np.uint64)
+        expected = set()
+        for _ in range(5):
+            hashes = rng.integers(0, 50, size=20).astype(np.uint64)
+            duplicated, seen = data_cleaning._mark_seen(hashes, seen)
+
+            first = ~pd.Series(hashes).duplicated().to_numpy()
+            assert duplicated.tolist() == [not (f and h not in expected)
+                                           for h, f in zip(hashes.tolist(), first)]
+            expected.update(hashes.tolist())
+            assert seen.tolist() == sorted(expected)
+
+def validation_frame():
+    """Standardized rows covering every validation rule."""
+    return pd.DataFrame({
+        "order_id": ["A-1", "A-1", "A-2", "A-2", "A-3", None, None, "A-4"],
+        "product_id": ["P-1", "P-1", "P-1", "P-1", "P-2", "P-3", "P-3", "P-1"],
+        "order_date": pd.to_datetime(["2024-01-01", "2024-01-01", "2024-02-01", "2024-02-01",
+                                      None, "2023-12-01", "2023-12-01", "2099-01-01"]),
+        "sales": [100.0, 100.0, 0.0, 80.0, 50.0, 20.0, 20.0, np.nan],
+        "quantity": [1, 1, 2, -1, 1, 1, 1, 1]
+    })
+
+class TestValidationReport:
+    """Tests for the single-pass validation report."""
+
+    def test_counts_match_column_checks(self):
+        """Test that each counter equals the separate pandas check it replaces."""
+        df = validation_frame()
+        report = data_cleaning.validation_report(df)
+
+        assert report.rows == 8
+        assert report.negative_quantities == (df["quantity"] < 0).sum()
+        assert report.non_positive_sales == (df["sales"] <= 0).sum()
+        assert report.missing_order_dates == df["order_date"].isna().sum()
+        assert report.duplicate_order_ids == df["order_id"].duplicated().sum()
+        assert report.future_dates == 1
+        assert report.min_date == pd.Timestamp("2023-12-01")
+        assert report.max_date == pd.Timestamp("2099-01-01")
+        assert report.sales_std == pytest.approx(df["sales"].std())
+
+    def test_keep_mask_matches_sequential_filters(self):
+        """Test that the mask keeps what the filter-then-deduplicate steps kept."""
+        df = validation_frame()
+        expected = df[df["sales"] > 0].dropna(subset=["order_date"])
+        expected = expected.drop_duplicates(subset=["order_id", "product_id"])
+
+        report = data_cleaning.validation_report(df)
+        # A-2/P-1 first appears with zero sales, so its second row is kept
+        assert report.keep_mask.tolist() == [True, False, False, True, False, True, False, False]
+        pd.testing.assert_frame_equal(data_cleaning.clean_invalid_records(df, report), expected)
+
+    def test_report_must_match_frame(self):
+        """Test that a report of another frame is rejected."""
+        df = validation_frame()
+        report = data_cleaning.validation_report(df.iloc[:4])
+        with pytest.raises(ValueError):
+            data_cleaning.clean_invalid_records(df, report)
+
+    def test_report_must_match_index(self):
+        """Test that a report of a same-length frame with another index is rejected."""
+        df = validation_frame()
+        report = data_cleaning.validation_report(df)
+        with pytest.raises(ValueError):
+            data_cleaning.clean_invalid_records(df.iloc[::-1], report)
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,44 @@
+"""
+Unit tests for differencing order selection.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import differencing
+
+def _monthly(values):
+    """Wrap values in a month-end indexed series."""
+    return pd.Series(values, index=pd.date_range("2011-01-31", periods=len(values), freq="M"))
+
+class TestSelectDifferencingOrders:
+    """Tests for automatic d/D selection."""
+
+    def test_white_noise_needs_no_differencing(self):
+        """Test that a stationary series gets d=0, D=0."""
+        rng = np.random.default_rng(1)
+        series = _monthly(rng.normal(100, 5, 60))
+        assert differencing.select_differencing_orders(series) == (0, 0)
+
+    def test_random_walk_needs_first_difference(self):
+        """Test that a random walk gets d=1."""
+        rng = np.random.default_rng(2)
+        series = _monthly(np.cumsum(rng.normal(0, 10, 120)) + 500)
+        d, D = differencing.select_differencing_orders(series)
+        assert (d, D) == (1, 0)
+
+    def test_strong_seasonality_needs_seasonal_difference(self):
+        """Test that a strongly seasonal series gets D=1."""
+        rng = np.random.default_rng(3)
+        t = np.arange(60)
+        series = _monthly(1000 + 300 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 10, 60))
+        assert differencing.seasonal_strength(series) > 0.64
+        assert differencing.select_differencing_orders(series)[1] == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
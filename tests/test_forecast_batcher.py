@@ -0,0 +1,127 @@
+"""
+Unit tests for request coalescing and micro-batching.
+"""
+import pytest
+import sys
+import asyncio
+import warnings
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from forecast_batcher import ForecastBatcher
+from forecast import forecast_batch, forecast_next
+
+class RecordingCompute:
+    """Compute function that records the batches it receives."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append(list(batch))
+        return [ValueError(series) if series == "bad" else (series, steps, alpha)
+                for series, steps, alpha in batch]
+
+def submit_all(batcher, requests):
+    """Submit requests concurrently and return results or exceptions."""
+    async def scenario():
+        return await asyncio.gather(
+            *[batcher.submit(*request) for request in requests], return_exceptions=True
+        )
+    return asyncio.run(scenario())
+
+class TestForecastBatcher:
+    """Tests for coalescing and batching."""
+
+    def test_identical_requests_are_coalesced(self):
+        """Test that concurrent identical requests share one computation."""
+        compute = RecordingCompute()
+        batcher = ForecastBatcher(compute, window_ms=1)
+        results = submit_all(batcher, [("sales", 12, 0.05)] * 10)
+
+        assert results == [("sales", 12, 0.05)] * 10
+        assert compute.batches == [[("sales", 12, 0.05)]]
+        assert batcher.stats()["coalesced"] == 9
+
+    def test_different_requests_share_a_batch(self):
+        """Test that requests within the window go to one compute call."""
+        compute = RecordingCompute()
+        batcher = ForecastBatcher(compute, window_ms=1)
+        requests = [("sales", 12, 0.05), ("market=EU", 6, 0.05), ("sales", 12, 0.2)]
+        results = submit_all(batcher, requests)
+
+        assert results == requests
+        assert compute.batches == [requests]
+
+    def test_max_batch_splits_batches(self):
+        """Test that a full batch is computed without waiting for the window."""
+        compute = RecordingCompute()
+        batcher = ForecastBatcher(compute, window_ms=1000, max_batch=2)
+        submit_all(batcher, [("a", 1, 0.05), ("b", 1, 0.05), ("c", 1, 0.05), ("d", 1, 0.05)])
+        assert [len(batch) for batch in compute.batches] == [2, 2]
+
+    def test_errors_stay_with_their_request(self):
+        """Test that a failing series does not fail the rest of its batch."""
+        compute = RecordingCompute()
+        batcher = ForecastBatcher(compute, window_ms=1)
+        good, bad = submit_all(batcher, [("sales", 3, 0.05), ("bad", 3, 0.05)])
+        assert good == ("sales", 3, 0.05)
+        assert isinstance(bad, ValueError)
+
+    def test_short_result_fails_every_request(self):
+        """Test that a compute call returning too few results fails the batch instead of hanging."""
+        batcher = ForecastBatcher(lambda batch: [("only one",)], window_ms=1)
+        results = submit_all(batcher, [("a", 1, 0.05), ("b", 1, 0.05)])
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert batcher._inflight == {}
+
+    def test_cancelled_batch_releases_requests(self):
+        """Test that a cancelled compute call fails its requests and later ones compute again."""
+        async def scenario():
+            batcher = ForecastBatcher(RecordingCompute(), window_ms=1)
+            loop = asyncio.get_running_loop()
+            original = loop.run_in_executor
+
+            async def cancelled(*args):
+                raise asyncio.CancelledError()
+            loop.run_in_executor = cancelled
+            try:
+                first = await asyncio.gather(batcher.submit("a", 1, 0.05), return_exceptions=True)
+            finally:
+                loop.run_in_executor = original
+            second = await asyncio.wait_for(batcher.submit("a", 1, 0.05), timeout=5)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert isinstance(first[0], RuntimeError)
+        assert second == ("a", 1, 0.05)
+
+class TestForecastBatch:
+    """Tests for the batched forecast function."""
+
+    def test_matches_individual_forecasts(self):
+        """Test that shared forecasts equal separate forecast_next calls."""
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        rng = np.random.default_rng(0)
+        index = pd.date_range("2011-01-31", periods=48, freq="M")
+        series = pd.Series(1000 + 10 * np.arange(48) + rng.normal(0, 20, 48), index=index)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model = SARIMAX(series, order=(1, 1, 0)).fit(disp=False)
+
+        requests = [("sales", 12, 0.05), ("sales", 3, 0.2), ("missing", 3, 0.05)]
+        results = forecast_batch({"sales": model}, requests)
+
+        for (series_key, steps, alpha), result in zip(requests[:2], results[:2]):
+            expected_mean, expected_conf_int = forecast_next(model, steps, alpha)
+            pd.testing.assert_series_equal(result[0], expected_mean)
+            pd.testing.assert_frame_equal(result[1], expected_conf_int)
+        assert isinstance(results[2], KeyError)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+"""
+Unit tests for the on-disk forecast cache.
+"""
+import pytest
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from forecast_cache import ForecastCache, forecast_key
+
+@pytest.fixture
+def forecast():
+    """Twelve-month forecast with a 95% interval."""
+    index = pd.date_range("2015-01-31", periods=12, freq="M")
+    mean = pd.Series(np.linspace(100, 210, 12), index=index, name="predicted_mean")
+    conf_int = pd.DataFrame({"lower sales": mean - 20, "upper sales": mean + 20})
+    return mean, conf_int
+
+class TestForecastKey:
+    """Tests for cache keys."""
+
+    def test_every_component_changes_key(self):
+        """Test that model, data, horizon and alpha are all part of the key."""
+        base = forecast_key("model", "data", 12, 0.05)
+        assert base == forecast_key("model", "data", 12, 0.05)
+        assert base != forecast_key("other", "data", 12, 0.05)
+        assert base != forecast_key("model", "other", 12, 0.05)
+        assert base != forecast_key("model", "data", 6, 0.05)
+        assert base != forecast_key("model", "data", 12, 0.1)
+
+class TestForecastCache:
+    """Tests for storing and evicting forecasts."""
+
+    def test_round_trip(self, tmp_path, forecast):
+        """Test that a stored forecast and its intervals come back unchanged."""
+        cache = ForecastCache(tmp_path)
+        assert cache.get("a" * 64) is None
+
+        cache.put("a" * 64, *forecast)
+        mean, conf_int = cache.get("a" * 64)
+        pd.testing.assert_series_equal(mean, forecast[0])
+        pd.testing.assert_frame_equal(conf_int, forecast[1], check_names=False)
+        assert mean.index.freq == forecast[0].index.freq
+
+    def test_least_recently_used_is_evicted(self, tmp_path, forecast):
+        """Test that reading an entry protects it from eviction."""
+        cache = ForecastCache(tmp_path, max_entries=2)
+        cache.put("a" * 64, *forecast)
+        time.sleep(0.01)
+        cache.put("b" * 64, *forecast)
+        time.sleep(0.01)
+        assert cache.get("a" * 64) is not None
+        time.sleep(0.01)
+        cache.put("c" * 64, *forecast)
+
+        assert len(cache) == 2
+        assert cache.get("b" * 64) is None
+        assert cache.get("a" * 64) is not None
+
+    def test_published_marker(self, tmp_path):
+        """Test tracking which entry the output files hold."""
+        cache = ForecastCache(tmp_path)
+        assert not cache.is_published("a" * 64)
+        cache.mark_published("a" * 64)
+        assert cache.is_published("a" * 64)
+        assert not cache.is_published("b" * 64)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
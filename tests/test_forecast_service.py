@@ -0,0 +1,114 @@
+"""
+Tests for the local forecast service, run against localhost.
+"""
+import pytest
+import sys
+import json
+import asyncio
+import warnings
+import urllib.error
+import urllib.request
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from forecast_service import ForecastService, LatencyStats
+
+@pytest.fixture(scope="module")
+def models():
+    """Two small fitted models keyed like the main model and a hierarchy node."""
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2011-01-31", periods=48, freq="M")
+    t = np.arange(48)
+    fitted = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for key, level in (("sales", 1000), ("market=EU", 300)):
+            values = level + 10 * t + 0.2 * level * np.sin(2 * np.pi * t / 12) + rng.normal(0, 10, 48)
+            fitted[key] = SARIMAX(pd.Series(values, index=index), order=(1, 0, 0),
+                                  seasonal_order=(0, 1, 1, 12)).fit(disp=False)
+    return fitted
+
+def fetch(url):
+    """GET a URL and return (status, decoded JSON)."""
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def run_against_service(models, paths):
+    """Start the service on a free port, GET each path and return the answers."""
+    async def scenario():
+        service = ForecastService(models, workers=2)
+        server = await service.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.gather(*[
+                loop.run_in_executor(None, fetch, f"http://127.0.0.1:{port}{path}")
+                for path in paths
+            ])
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+    return asyncio.run(scenario())
+
+class TestForecastService:
+    """Tests for the HTTP endpoints."""
+
+    def test_forecast_matches_model(self, models):
+        """Test that a served forecast equals the model's own forecast."""
+        (status, body), = run_against_service(models, ["/forecast?series=market%3DEU&horizon=6&alpha=0.2"])
+        assert status == 200
+        assert (body["series"], body["horizon"], body["alpha"]) == ("market=EU", 6, 0.2)
+
+        expected = models["market=EU"].get_forecast(6)
+        np.testing.assert_allclose(body["forecast"], expected.predicted_mean, atol=1e-3)
+        np.testing.assert_allclose(body["lower"], expected.conf_int(alpha=0.2).iloc[:, 0], atol=1e-3)
+        assert body["dates"][0] == "2015-01-31"
+
+    def test_errors(self, models):
+        """Test unknown series, invalid parameters and unknown paths."""
+        answers = run_against_service(models, [
+            "/forecast?series=nope",
+            "/forecast?horizon=0",
+            "/forecast?alpha=abc",
+            "/nothing"
+        ])
+        assert [status for status, _ in answers] == [404, 400, 400, 404]
+        assert all("error" in body for _, body in answers)
+
+    def test_concurrent_requests_and_metrics(self, models):
+        """Test that concurrent requests are all answered and counted."""
+        paths = [f"/forecast?horizon={h}" for h in range(1, 13)] + ["/series", "/health"]
+        answers = run_against_service(models, paths)
+        assert all(status == 200 for status, _ in answers)
+        assert [len(body["forecast"]) for _, body in answers[:12]] == list(range(1, 13))
+        assert answers[-2][1]["series"] == ["market=EU", "sales"]
+        assert answers[-1][1] == {"status": "ok", "models": 2}
+
+class TestLatencyStats:
+    """Tests for latency metrics."""
+
+    def test_snapshot(self):
+        """Test counts, errors and percentiles over the window."""
+        stats = LatencyStats(window=3)
+        for seconds in (0.001, 0.002, 0.003, 0.004):
+            stats.record("/forecast", seconds)
+        stats.record("/forecast", 0.005, ok=False)
+
+        summary = stats.snapshot()["endpoints"]["/forecast"]
+        assert summary["count"] == 5
+        assert summary["errors"] == 1
+        assert summary["p50_ms"] == pytest.approx(4.0)
+        assert summary["max_ms"] == pytest.approx(5.0)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
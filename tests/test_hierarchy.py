@@ -0,0 +1,119 @@
+"""
+Unit tests for hierarchical series building and many-series training.
+"""
+import pytest
+import sys
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from hierarchy import build_hierarchy_series, node_id, node_filename, parse_node_id
+from train_hierarchy import train_hierarchy, update_hierarchy, write_manifest, load_node_model
+from model_utils import read_compact_spec
+
+LEVELS = [(), ("market",), ("market", "region"), ("segment",)]
+
+@pytest.fixture
+def transactions():
+    """Three years of synthetic transactions across markets, regions and segments."""
+    rng = np.random.default_rng(0)
+    n = 3000
+    market = rng.choice(["EU", "US"], n)
+    region = np.where(market == "EU", rng.choice(["North", "South"], n), "Central")
+    return pd.DataFrame({
+        "order_date": pd.Timestamp("2012-01-01") + pd.to_timedelta(rng.integers(0, 36 * 30, n), unit="D"),
+        "market": market,
+        "region": region,
+        "segment": rng.choice(["Consumer", "Corporate"], n),
+        "sales": rng.gamma(2.0, 100.0, n)
+    })
+
+class TestHierarchySeries:
+    """Tests for building node series."""
+
+    def test_nodes_and_totals(self, transactions):
+        """Test that every node is built and each level sums to the total."""
+        wide = build_hierarchy_series(transactions, LEVELS)
+
+        assert list(wide.columns) == [
+            "total", "market=EU", "market=US",
+            "market=EU|region=North", "market=EU|region=South", "market=US|region=Central",
+            "segment=Consumer", "segment=Corporate"
+        ]
+        assert wide.index.freqstr == "M"
+        monthly = transactions.set_index("order_date").resample("M")["sales"].sum()
+        np.testing.assert_allclose(wide["total"], monthly)
+        np.testing.assert_allclose(wide[["market=EU", "market=US"]].sum(axis=1), wide["total"])
+        np.testing.assert_allclose(
+            wide[["market=EU|region=North", "market=EU|region=South"]].sum(axis=1),
+            wide["market=EU"]
+        )
+
+    def test_single_level(self, transactions):
+        """Test a hierarchy with a single grouping column."""
+        wide = build_hierarchy_series(transactions, [(), ("segment",)])
+        assert list(wide.columns) == ["total", "segment=Consumer", "segment=Corporate"]
+
+    def test_node_names(self):
+        """Test node identifiers and file names."""
+        node = node_id(("category", "sub_category"), ("Office Supplies", "Art"))
+        assert node == "category=Office Supplies|sub_category=Art"
+        assert parse_node_id(node) == {"category": "Office Supplies", "sub_category": "Art"}
+        assert node_id(()) == "total"
+        assert node_filename(node).startswith("category-office-supplies-sub-category-art_")
+
+class TestTrainHierarchy:
+    """Tests for the many-series training run."""
+
+    def test_models_and_manifest(self, transactions, tmp_path):
+        """Test that each node gets a model and short series are skipped."""
+        wide = build_hierarchy_series(transactions, LEVELS)
+        wide["market=EU|region=South"] = wide["market=EU|region=South"].where(
+            wide.index >= wide.index[-6], 0.0
+        )
+        records = train_hierarchy(wide, tmp_path, order=(1, 0, 0),
+                                  seasonal_order=(0, 0, 0, 12), n_jobs=1, batch_size=3)
+        manifest = write_manifest(records, wide, "digest", tmp_path / "manifest.json",
+                                  order=(1, 0, 0), seasonal_order=(0, 0, 0, 12), levels=LEVELS)
+
+        statuses = {node: entry["status"] for node, entry in manifest["nodes"].items()}
+        assert statuses.pop("market=EU|region=South") == "skipped"
+        assert set(statuses.values()) == {"ok"}
+        assert len(list(tmp_path.glob("*.npz"))) == len(wide.columns) - 1
+        assert json.loads((tmp_path / "manifest.json").read_text())["nodes"]["market=EU"]["keys"] == {"market": "EU"}
+
+        model = load_node_model("market=EU", tmp_path / "manifest.json")
+        assert len(model.get_forecast(3).predicted_mean) == 3
+        with pytest.raises(KeyError):
+            load_node_model("market=EU|region=South", tmp_path / "manifest.json")
+
+    def test_update_appends_new_months(self, transactions, tmp_path):
+        """Test that an update extends every saved model to the latest month."""
+        wide = build_hierarchy_series(transactions, LEVELS)
+        spec = dict(order=(1, 0, 0), seasonal_order=(0, 0, 0, 12))
+        records = train_hierarchy(wide[:-2], tmp_path, n_jobs=1, **spec)
+        manifest = write_manifest(records, wide[:-2], "old", tmp_path / "manifest.json",
+                                  levels=LEVELS, **spec)
+        original_aic = manifest["nodes"]["total"]["aic"]
+        original_var = manifest["nodes"]["total"]["resid_var"]
+        assert original_var > 0
+
+        records = update_hierarchy(wide, manifest, tmp_path, n_jobs=1, batch_size=2)
+        manifest = write_manifest(records, wide, "new", tmp_path / "manifest.json",
+                                  levels=LEVELS, **spec)
+
+        assert {record["n_new"] for record in records} == {2}
+        assert manifest["nodes"]["total"]["aic"] == original_aic
+        # Fitted over the full history, not the compact model's tail
+        assert manifest["nodes"]["total"]["resid_var"] == original_var
+        assert read_compact_spec(tmp_path / manifest["nodes"]["total"]["model_file"])["resid_var"] == original_var
+        assert manifest["date_range"][1] == str(wide.index[-1].date())
+        forecast = load_node_model("total", tmp_path / "manifest.json").get_forecast(1)
+        assert forecast.predicted_mean.index[0] == wide.index[-1] + wide.index.freq
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,222 @@
+"""
+Unit tests for SARIMA hyperparameter tuning.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import hyperparameter_tuning
+
+@pytest.fixture
+def monthly_series():
+    """Four years of trending, seasonal monthly data."""
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2011-01-31", periods=48, freq="M")
+    t = np.arange(48)
+    values = 1000 + 15 * t + 200 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 20, 48)
+    return pd.Series(values, index=index)
+
+class TestGridSearch:
+    """Tests for the grid search."""
+
+    def test_candidate_orders_count(self):
+        """Test that the default grid has 729 combinations."""
+        candidates = hyperparameter_tuning.candidate_orders()
+        assert len(candidates) == 729
+        assert candidates[0] == ((0, 0, 0), (0, 0, 0, 12))
+
+    def test_resolve_n_jobs(self):
+        """Test worker-count normalization."""
+        assert hyperparameter_tuning.resolve_n_jobs(1) == 1
+        assert hyperparameter_tuning.resolve_n_jobs(3) == 3
+        assert hyperparameter_tuning.resolve_n_jobs(-1) >= 1
+
+    def test_parallel_matches_sequential(self, monthly_series):
+        """Test that the process pool gives the same sorted table."""
+        grid = dict(p_range=(0, 1), d_range=(1, 1), q_range=(0, 0),
+                    P_range=(0, 0), D_range=(1, 1), Q_range=(0, 1))
+        sequential = hyperparameter_tuning.grid_search_sarima(monthly_series, **grid, n_jobs=1)
+        parallel = hyperparameter_tuning.grid_search_sarima(monthly_series, **grid, n_jobs=2)
+
+        assert len(sequential) == 4
+        pd.testing.assert_frame_equal(sequential.drop(columns="elapsed"),
+                                      parallel.drop(columns="elapsed"))
+        assert sequential["AIC"].is_monotonic_increasing
+
+class TestFitLimits:
+    """Tests for per-fit timeouts and the global time budget."""
+
+    def test_fit_timeout_is_recorded(self, monthly_series):
+        """Test that a fit over its time limit is recorded as a timeout."""
+        record = hyperparameter_tuning.fit_candidate(
+            monthly_series, (2, 1, 2), (1, 1, 1, 12), maxiter=10000, timeout=1e-4
+        )
+        assert record["status"] == "timeout"
+        assert np.isnan(record["AIC"])
+        assert record["elapsed"] < 5
+
+    def test_failed_fit_is_recorded(self, monthly_series):
+        """Test that an invalid candidate is recorded as failed."""
+        record = hyperparameter_tuning.fit_candidate(monthly_series, (1, 1, 1), (1, 1, 1, 1))
+        assert record["status"] == "failed"
+        assert record["error"]
+
+    def test_time_budget_skips_remaining(self, monthly_series):
+        """Test that an exhausted budget skips the remaining candidates."""
+        results = hyperparameter_tuning.grid_search_sarima(
+            monthly_series, p_range=(0, 1), d_range=(1, 1), q_range=(0, 1),
+            P_range=(0, 0), D_range=(1, 1), Q_range=(0, 0), time_budget=1e-6
+        )
+        assert len(results) == 4
+        assert set(results["status"]) == {"skipped"}
+
+class TestCheckpoint:
+    """Tests for resumable tuning runs."""
+
+    def test_rerun_reuses_checkpointed_fits(self, tmp_path, monthly_series, monkeypatch):
+        """Test that a rerun only fits candidates it has not seen."""
+        from tuning_checkpoint import TuningCheckpoint
+        path = tmp_path / "checkpoint.jsonl"
+        grid = dict(p_range=(0, 1), d_range=(1, 1), q_range=(0, 0),
+                    P_range=(0, 0), D_range=(1, 1), Q_range=(0, 0))
+
+        first = hyperparameter_tuning.grid_search_sarima(
+            monthly_series, **grid, checkpoint=TuningCheckpoint(monthly_series, path)
+        )
+        assert len(path.read_text().splitlines()) == 2
+
+        fitted = []
+        original = hyperparameter_tuning.fit_candidate
+        def counting_fit(series, order, seasonal_order, **kwargs):
+            fitted.append(order)
+            return original(series, order, seasonal_order, **kwargs)
+        monkeypatch.setattr(hyperparameter_tuning, "fit_candidate", counting_fit)
+
+        wider = dict(grid, q_range=(0, 1))
+        second = hyperparameter_tuning.grid_search_sarima(
+            monthly_series, **wider, checkpoint=TuningCheckpoint(monthly_series, path)
+        )
+        assert sorted(fitted) == [(0, 1, 1), (1, 1, 1)]
+        assert len(second) == 4
+        pd.testing.assert_frame_equal(
+            first.drop(columns="elapsed"),
+            second[second["q"] == 0].reset_index(drop=True).drop(columns="elapsed")
+        )
+
+    def test_checkpoint_is_per_series(self, tmp_path, monthly_series):
+        """Test that fits of another series are not reused."""
+        from tuning_checkpoint import TuningCheckpoint
+        path = tmp_path / "checkpoint.jsonl"
+        record = hyperparameter_tuning.fit_candidate(monthly_series, (0, 1, 0), (0, 1, 0, 12))
+        TuningCheckpoint(monthly_series, path).save((0, 1, 0), (0, 1, 0, 12), {}, record)
+
+        assert TuningCheckpoint(monthly_series, path).lookup((0, 1, 0), (0, 1, 0, 12), {})
+        assert TuningCheckpoint(monthly_series * 2, path).lookup((0, 1, 0), (0, 1, 0, 12), {}) is None
+
+class TestWarmStart:
+    """Tests for seeding fits with nested models' parameters."""
+
+    def test_map_start_params(self):
+        """Test that shared coefficients are copied and new lags start at zero."""
+        seed = {'ar.L1': 0.5, 'ma.S.L12': -0.3, 'sigma2': 4.0}
+        names = ['ar.L1', 'ar.L2', 'ma.L1', 'ma.S.L12', 'sigma2']
+        np.testing.assert_array_equal(
+            hyperparameter_tuning.map_start_params(seed, names),
+            [0.5, 0.0, 0.0, -0.3, 4.0]
+        )
+        assert hyperparameter_tuning.map_start_params(seed, ['intercept', 'sigma2']) is None
+
+    def test_nested_seed_prefers_closest(self):
+        """Test that the closest nested model is chosen, then the lowest AIC."""
+        def record(order, seasonal_order, aic):
+            return {'order': order, 'seasonal_order': seasonal_order,
+                    'AIC': aic, 'params': {'sigma2': 1.0}}
+        fitted = [
+            record((0, 1, 0), (0, 1, 0, 12), 100.0),
+            record((1, 1, 0), (0, 1, 0, 12), 120.0),
+            record((0, 1, 1), (0, 1, 0, 12), 110.0),
+            record((1, 0, 1), (0, 1, 0, 12), 50.0),
+            record((2, 1, 1), (0, 1, 0, 12), 90.0)
+        ]
+        seed = hyperparameter_tuning.nested_seed((1, 1, 1), (0, 1, 0, 12), fitted)
+        assert seed['order'] == (0, 1, 1)
+        assert hyperparameter_tuning.nested_seed((0, 1, 0), (0, 1, 0, 12), fitted) is None
+
+    def test_seed_at_optimum_needs_fewer_iterations(self, monthly_series):
+        """Test that a good seed shortens the optimization and reaches the same fit."""
+        cold = hyperparameter_tuning.fit_candidate(monthly_series, (1, 1, 1), (0, 1, 1, 12))
+        warm = hyperparameter_tuning.fit_candidate(
+            monthly_series, (1, 1, 1), (0, 1, 1, 12), start_params=cold['params'], seed="self"
+        )
+        assert warm['warm_start'] == "self"
+        assert warm['iterations'] < cold['iterations']
+        assert warm['AIC'] == pytest.approx(cold['AIC'], abs=1e-3)
+
+    def test_grid_search_seeds_larger_models(self, monthly_series):
+        """Test that every model but the smallest is seeded by a nested one."""
+        results = hyperparameter_tuning.grid_search_sarima(
+            monthly_series, p_range=(0, 1), d_range=(1, 1), q_range=(0, 1),
+            P_range=(0, 0), D_range=(1, 1), Q_range=(0, 1), warm_start=True
+        )
+        ok = results[results["status"] == "ok"].set_index("order")
+        assert len(ok) == 8
+        assert "params" not in results
+        seeded = ok["warm_start"].notna()
+        assert not seeded[(ok.index == (0, 1, 0)) & (ok["Q"] == 0)].any()
+        assert seeded.sum() == 7
+
+    def test_iterations_saved_against_cold_fits(self, monthly_series, tmp_path):
+        """Test that warm-started fits get cold iteration counts from refits or the checkpoint."""
+        from tuning_checkpoint import TuningCheckpoint
+        grid = dict(p_range=(0, 1), d_range=(1, 1), q_range=(0, 1),
+                    P_range=(0, 0), D_range=(1, 1), Q_range=(0, 1))
+        results = hyperparameter_tuning.grid_search_sarima(
+            monthly_series, **grid, warm_start=True, warm_start_baseline=2
+        )
+        compared = results[results["cold_iterations"].notna()]
+        assert len(compared) == 2
+        assert compared["warm_start"].notna().all()
+        best = compared.iloc[0]
+        cold = hyperparameter_tuning.fit_candidate(monthly_series, best["order"], best["seasonal_order"])
+        assert best["cold_iterations"] == cold["iterations"]
+
+        # Cold fits of an earlier run are reused without any refit
+        checkpoint = TuningCheckpoint(monthly_series, tmp_path / "checkpoint.jsonl")
+        hyperparameter_tuning.grid_search_sarima(monthly_series, **grid, checkpoint=checkpoint)
+        results = hyperparameter_tuning.grid_search_sarima(
+            monthly_series, **grid, checkpoint=checkpoint, warm_start=True, warm_start_baseline=0
+        )
+        assert results["cold_iterations"].notna().sum() == 7
+
+class TestStepwiseSearch:
+    """Tests for the stepwise search."""
+
+    def test_neighbours_respect_bounds(self):
+        """Test that neighbours stay within bounds and keep d, D, m."""
+        neighbours = hyperparameter_tuning._stepwise_neighbours(
+            (0, 1, 1), (0, 1, 1, 12), max_order=(1, 1, 1, 1)
+        )
+        assert ((1, 1, 1), (0, 1, 1, 12)) in neighbours
+        assert ((0, 1, 0), (0, 1, 1, 12)) in neighbours
+        for order, seasonal_order in neighbours:
+            assert order[1] == 1 and seasonal_order[1] == 1 and seasonal_order[3] == 12
+            assert 0 <= order[0] <= 1 and 0 <= order[2] <= 1
+            assert 0 <= seasonal_order[0] <= 1 and 0 <= seasonal_order[2] <= 1
+
+    def test_stepwise_fits_fewer_models(self, monthly_series):
+        """Test that stepwise search returns a sorted table from few fits."""
+        results = hyperparameter_tuning.stepwise_search_sarima(
+            monthly_series, start_order=(1, 1, 0), start_seasonal_order=(0, 1, 0, 12),
+            max_order=(2, 2, 1, 1), max_steps=3
+        )
+        assert 0 < len(results) < 3 * 3 * 2 * 2
+        assert results["AICc"].is_monotonic_increasing
+        assert (results["d"] == 1).all() and (results["D"] == 1).all()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
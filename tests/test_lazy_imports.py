@@ -0,0 +1,52 @@
+"""
+Tests that the entry points import heavy libraries lazily.
+"""
+import pytest
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+HEAVY_MODULES = ("statsmodels", "matplotlib", "scipy", "sklearn", "joblib")
+
+def loaded_heavy_modules(module: str):
+    """Import a module in a fresh interpreter and list the heavy libraries it loaded."""
+    probe = (
+        f"import json, sys; import {module}; "
+        f"print(json.dumps(sorted({{n.split('.')[0] for n in sys.modules}} & set({HEAVY_MODULES!r}))))"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], cwd=SRC_DIR,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+class TestLazyImports:
+    """Tests for import side effects of the entry points."""
+
+    @pytest.mark.parametrize("module", [
+        "forecast",
+        "forecast_service",
+        "train_sarima",
+        "train_hierarchy",
+        "hyperparameter_tuning",
+        "model_evaluation",
+        "model_utils",
+        "stationarity_check",
+        "differencing",
+        "eda",
+        "visualization",
+    ])
+    def test_no_heavy_imports(self, module):
+        """Test that importing an entry point loads none of the heavy libraries."""
+        assert loaded_heavy_modules(module) == []
+
+    def test_help(self):
+        """Test that --help still works with the deferred imports."""
+        result = subprocess.run([sys.executable, "forecast.py", "--help"], cwd=SRC_DIR,
+                                capture_output=True, text=True)
+        assert result.returncode == 0
+        assert "--horizon" in result.stdout
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
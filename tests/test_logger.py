@@ -0,0 +1,181 @@
+"""
+Unit tests for the profiling helpers in the logger module.
+"""
+import pytest
+import json
+import os
+import sys
+import tracemalloc
+from logging.handlers import QueueHandler
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import logger
+from logger import span, timed, profile_run, peak_rss_mb, setup_logger, flush_logs, stop_log_listener
+from parallel import process_pool
+
+def log_from_worker(i):
+    """Log a few lines from a pool worker and return its pid."""
+    worker_logger = setup_logger("test_logger.worker")
+    for line in range(20):
+        worker_logger.info(f"worker {i} line {line} " + "x" * 200)
+    return os.getpid()
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    """Queue mode writing to a private log file."""
+    stop_log_listener()
+    monkeypatch.setattr(logger, "LOG_QUEUE", True)
+    monkeypatch.setattr(logger, "LOG_FILE", tmp_path / "test.log")
+    yield tmp_path / "test.log"
+    stop_log_listener()
+
+class TestSpan:
+    """Tests for timing spans."""
+
+    def test_nested_paths(self):
+        """Test that inner spans are named after the spans around them."""
+        with span("outer") as outer:
+            with span("inner") as inner:
+                pass
+        assert inner["path"] == "outer/inner"
+        assert inner["depth"] == 1
+        assert outer["depth"] == 0
+        assert outer["seconds"] >= inner["seconds"]
+        assert outer["status"] == "ok"
+
+    def test_failed_span(self):
+        """Test that an exception marks the span as failed and propagates."""
+        with pytest.raises(ValueError):
+            with span("broken") as record:
+                raise ValueError("boom")
+        assert record["status"] == "failed"
+
+    def test_timed_decorator(self):
+        """Test that a decorated function runs in a span and keeps its result."""
+        @timed("double")
+        def double(x):
+            with span("body") as record:
+                pass
+            return 2 * x, record
+
+        result, record = double(3)
+        assert result == 6
+        assert record["path"] == "double/body"
+
+    def test_traced_peak_reaches_parent(self):
+        """Test that a child's traced peak is counted in its parent's peak."""
+        tracemalloc.start()
+        try:
+            with span("outer") as outer:
+                with span("allocate") as inner:
+                    block = bytearray(20 * 1024 * 1024)
+                    del block
+                with span("small"):
+                    pass
+        finally:
+            tracemalloc.stop()
+        assert inner["traced_peak_mb"] >= 20
+        assert outer["traced_peak_mb"] >= inner["traced_peak_mb"]
+        assert "_peak" not in outer
+
+    def test_peak_rss(self):
+        """Test that the peak resident memory is reported."""
+        assert peak_rss_mb() > 0
+
+class TestProfileRun:
+    """Tests for run reports."""
+
+    def test_report_written(self, tmp_path):
+        """Test that a run leaves a report listing its spans in start order."""
+        @profile_run("stage", report_dir=tmp_path)
+        def main():
+            with span("load"):
+                pass
+            with span("fit"):
+                pass
+
+        main()
+        report = json.loads((tmp_path / "stage.json").read_text())
+        assert report["status"] == "ok"
+        assert [record["path"] for record in report["spans"]] == ["stage", "stage/load", "stage/fit"]
+        assert report["wall_seconds"] >= 0
+
+    def test_failed_exit_recorded(self, tmp_path):
+        """Test that the report is written with status failed when main exits with an error."""
+        @profile_run("stage", report_dir=tmp_path)
+        def main():
+            with span("load"):
+                sys.exit(1)
+
+        with pytest.raises(SystemExit):
+            main()
+        report = json.loads((tmp_path / "stage.json").read_text())
+        assert report["status"] == "failed"
+        assert [record["status"] for record in report["spans"]] == ["failed", "failed"]
+
+    def test_tracemalloc_report(self, tmp_path):
+        """Test that tracing lists allocation sites and stops afterwards."""
+        @profile_run("stage", report_dir=tmp_path, trace_memory=True)
+        def main():
+            return [0] * 100_000
+
+        assert len(main()) == 100_000
+        assert not tracemalloc.is_tracing()
+        report = json.loads((tmp_path / "stage.json").read_text())
+        assert report["tracemalloc"]
+        assert report["spans"][0]["top_allocations"]
+
+class TestQueueLogging:
+    """Tests for background and worker-process logging."""
+
+    def test_background_write(self, log_file):
+        """Test that records are queued by the caller and written by the listener."""
+        queued = setup_logger("test_logger.queued")
+        assert all(isinstance(handler, QueueHandler) for handler in queued.handlers)
+        queued.info("hello from the queue")
+        flush_logs()
+        assert "test_logger.queued - INFO - hello from the queue" in log_file.read_text()
+
+    def test_console_only_logger(self, log_file):
+        """Test that log_to_file=False keeps a logger's records out of the file."""
+        setup_logger("test_logger.file").info("to file")
+        setup_logger("test_logger.console", log_to_file=False).info("console only")
+        flush_logs()
+        content = log_file.read_text()
+        assert "to file" in content
+        assert "console only" not in content
+
+    def test_message_rendered_when_logged(self, log_file):
+        """Test that arguments changed after the call do not reach the log."""
+        items = [1]
+        setup_logger("test_logger.rendered").info("items %s", items)
+        items.append(2)
+        flush_logs()
+        assert "items [1]\n" in log_file.read_text()
+
+    def test_listener_restarts_after_stop(self, log_file):
+        """Test that logging after stop_log_listener starts a new listener."""
+        restarted = setup_logger("test_logger.restarted")
+        restarted.info("before stop")
+        stop_log_listener()
+        restarted.info("after stop")
+        flush_logs()
+        content = log_file.read_text()
+        assert "before stop" in content and "after stop" in content
+
+    def test_worker_records_forwarded(self, log_file):
+        """Test that pool workers log through the parent without mixing lines."""
+        with process_pool(2) as executor:
+            pids = list(executor.map(log_from_worker, range(4)))
+        flush_logs()
+
+        assert os.getpid() not in pids
+        lines = [line for line in log_file.read_text().splitlines() if "test_logger.worker" in line]
+        assert len(lines) == 80
+        assert all(line.endswith("x" * 200) for line in lines)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
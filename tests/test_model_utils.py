@@ -3,12 +3,26 @@ Unit tests for model utilities module.
 """
 import pytest
 import sys
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from model_utils import get_model_info
+import model_utils
+from model_utils import (
+    get_model_info,
+    save_model,
+    load_model,
+    saved_model_path,
+    save_compact_model,
+    load_compact_model,
+    read_compact_spec,
+    update_model
+)
 
 class TestModelInfo:
     """Tests for model information retrieval."""
@@ -39,5 +53,129 @@ class TestModelInfo:
         info = get_model_info()
         assert info["metadata_path"].endswith("model_metadata.json")
 
+SPEC = dict(order=(1, 1, 1), seasonal_order=(0, 1, 1, 12))
+
+@pytest.fixture(scope="module")
+def monthly_series():
+    """Five years of synthetic seasonal monthly data."""
+    rng = np.random.default_rng(0)
+    months = np.arange(60)
+    values = 100 + 0.5 * months + 10 * np.sin(2 * np.pi * months / 12) + rng.normal(0, 2, 60)
+    return pd.Series(values, index=pd.date_range("2015-01-31", periods=60, freq="M"))
+
+@pytest.fixture(scope="module")
+def fitted_results(monthly_series):
+    """Small seasonal model fitted on the synthetic series."""
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return SARIMAX(monthly_series, **SPEC).fit(disp=False)
+
+class TestCompactModel:
+    """Tests for the compact parameter-only artifact."""
+    
+    def test_round_trip_forecast_matches(self, fitted_results, tmp_path):
+        """Test that the reloaded model forecasts exactly like the original."""
+        path = save_compact_model(fitted_results, tmp_path / "model.npz")
+        restored = load_compact_model(path)
+        
+        expected = fitted_results.get_forecast(12)
+        actual = restored.get_forecast(12)
+        pd.testing.assert_index_equal(actual.predicted_mean.index, expected.predicted_mean.index)
+        np.testing.assert_allclose(actual.predicted_mean, expected.predicted_mean, rtol=1e-8)
+        np.testing.assert_allclose(actual.conf_int(), expected.conf_int(), rtol=1e-8)
+    
+    def test_spec_and_size(self, fitted_results, tmp_path):
+        """Test that the artifact keeps the spec and is far smaller than a pickle."""
+        compact = save_compact_model(fitted_results, tmp_path / "model.npz")
+        pickled = tmp_path / "model.pkl"
+        joblib.dump(fitted_results, pickled)
+        
+        spec = read_compact_spec(compact)
+        assert spec["order"] == [1, 1, 1]
+        assert spec["seasonal_order"] == [0, 1, 1, 12]
+        assert spec["aic"] == pytest.approx(fitted_results.aic)
+        assert compact.stat().st_size * 20 < pickled.stat().st_size
+
+class TestUpdateModel:
+    """Tests for the incremental update path."""
+    
+    @pytest.fixture
+    def early_results(self, monthly_series, tmp_path):
+        """Compact model trained on all but the last three months."""
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = SARIMAX(monthly_series[:-3], **SPEC).fit(disp=False)
+        return load_compact_model(save_compact_model(results, tmp_path / "model.npz"))
+    
+    def test_append_matches_filtering_full_history(self, monthly_series, early_results):
+        """Test that appending new months equals filtering everything with the same parameters."""
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        
+        updated, n_new, refitted = update_model(early_results, monthly_series)
+        assert (n_new, refitted) == (3, False)
+        
+        expected = SARIMAX(monthly_series, **SPEC).filter(early_results.params).get_forecast(12)
+        actual = updated.get_forecast(12)
+        pd.testing.assert_index_equal(actual.predicted_mean.index, expected.predicted_mean.index)
+        np.testing.assert_allclose(actual.predicted_mean, expected.predicted_mean, rtol=1e-8)
+        np.testing.assert_allclose(actual.conf_int(), expected.conf_int(), rtol=1e-8)
+    
+    def test_no_new_data(self, monthly_series, early_results):
+        """Test that an up-to-date model is returned unchanged."""
+        updated, n_new, refitted = update_model(early_results, monthly_series[:-3])
+        assert updated is early_results
+        assert (n_new, refitted) == (0, False)
+    
+    def test_revised_history_refits(self, monthly_series, early_results):
+        """Test that revised past months trigger a refit on the full series."""
+        revised = monthly_series.copy()
+        revised.iloc[-5] += 50
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            updated, n_new, refitted = update_model(early_results, revised)
+        assert (n_new, refitted) == (3, True)
+        assert updated.nobs == 60
+        assert updated.model.endog[-5, 0] == pytest.approx(revised.iloc[-5])
+    
+    def test_stats_override(self, fitted_results, tmp_path):
+        """Test that stored fit statistics can be kept from an earlier fit."""
+        path = save_compact_model(fitted_results, tmp_path / "model.npz", stats={'aic': 1.0})
+        assert read_compact_spec(path)["aic"] == 1.0
+
+class TestSavedModelPath:
+    """Tests for choosing the artifact to load."""
+
+    @pytest.fixture
+    def model_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(model_utils, "SARIMA_MODEL_FILE", tmp_path / "sarima_model.pkl")
+        monkeypatch.setattr(model_utils, "SARIMA_COMPACT_MODEL_FILE", tmp_path / "sarima_model.npz")
+        monkeypatch.setattr(model_utils, "MODEL_METADATA_FILE", tmp_path / "model_metadata.json")
+        monkeypatch.setattr(model_utils, "MODEL_FORMAT", "compact")
+        return tmp_path
+
+    def test_last_saved_format_wins(self, fitted_results, model_dir):
+        """Test that a pickle saved after a compact model replaces it for loading."""
+        assert save_model(fitted_results, {"aic": 1.0}, model_format="compact")
+        assert saved_model_path() == model_dir / "sarima_model.npz"
+
+        assert save_model({"model": "pickled"}, model_format="pickle")
+        assert (model_dir / "sarima_model.npz").exists()
+        assert saved_model_path() == model_dir / "sarima_model.pkl"
+        assert load_model(check_metadata=False) == {"model": "pickled"}
+
+    def test_legacy_metadata(self, fitted_results, model_dir):
+        """Test that metadata without a format falls back to the file it names."""
+        save_compact_model(fitted_results, model_dir / "sarima_model.npz")
+        joblib.dump({"model": "pickled"}, model_dir / "sarima_model.pkl")
+        (model_dir / "model_metadata.json").write_text('{"model_file": "C:\\\\models\\\\sarima_model.pkl"}')
+        assert saved_model_path() == model_dir / "sarima_model.pkl"
+
+        (model_dir / "model_metadata.json").unlink()
+        assert saved_model_path() == model_dir / "sarima_model.npz"
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,174 @@
+"""
+Unit tests for the pipeline runner.
+"""
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import config
+import pipeline
+from pipeline import stage_dependencies, select_stages, plan, run_pipeline
+
+# Copies its input to its output (appending a tag), optionally sleeping
+# first, and records each run in a log file
+STAGE_SCRIPT = """
+import sys, time
+source, target, log, delay = sys.argv[1:5]
+time.sleep(float(delay))
+with open(log, "a") as f:
+    f.write(f"{target} {time.time()}\\n")
+with open(source) as f:
+    content = f.read()
+with open(target, "w") as f:
+    f.write(content + "+")
+"""
+
+FAILING_SCRIPT = "import sys; print('boom'); sys.exit(3)\n"
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """A raw file, stage scripts and a private digest index."""
+    monkeypatch.setattr(pipeline, "DIGEST_CACHE_FILE", tmp_path / "digests.json")
+    (tmp_path / "stage.py").write_text(STAGE_SCRIPT)
+    (tmp_path / "fail.py").write_text(FAILING_SCRIPT)
+    (tmp_path / "raw.txt").write_text("raw")
+    return tmp_path
+
+def make_stage(workspace, name, source, target, delay=0.0, script="stage.py", settings=()):
+    return {
+        "name": name,
+        "script": str(workspace / script),
+        "args": [str(workspace / source), str(workspace / target), str(workspace / "runs.log"), str(delay)],
+        "inputs": [workspace / source],
+        "outputs": [workspace / target],
+        "config": list(settings)
+    }
+
+def make_stages(workspace, delay=0.0):
+    """clean -> (a, b) -> report, with a and b independent."""
+    return [
+        make_stage(workspace, "clean", "raw.txt", "clean.txt"),
+        make_stage(workspace, "a", "clean.txt", "a.txt", delay, settings=["FORECAST_HORIZON"]),
+        make_stage(workspace, "b", "clean.txt", "b.txt", delay),
+        make_stage(workspace, "report", "a.txt", "report.txt"),
+    ]
+
+def runs(workspace):
+    log = workspace / "runs.log"
+    if not log.exists():
+        return []
+    return [Path(line.split()[0]).stem for line in log.read_text().splitlines()]
+
+def statuses(records):
+    return {record["stage"]: record["status"] for record in records}
+
+class TestStageGraph:
+    """Tests for dependencies and stage selection."""
+
+    def test_dependencies_from_inputs(self, workspace):
+        """Test that a stage depends on the stages writing its inputs."""
+        dependencies = stage_dependencies(make_stages(workspace))
+        assert dependencies == {"clean": [], "a": ["clean"], "b": ["clean"], "report": ["a"]}
+
+    def test_select_includes_upstream(self, workspace):
+        """Test that selecting a stage pulls in what it needs, in order."""
+        selected = select_stages(make_stages(workspace), ["report"])
+        assert [stage["name"] for stage in selected] == ["clean", "a", "report"]
+        with pytest.raises(ValueError):
+            select_stages(make_stages(workspace), ["nope"])
+
+    def test_repo_stages(self):
+        """Test the dependencies of the real workflow."""
+        dependencies = stage_dependencies(pipeline.STAGES)
+        assert dependencies["forecast"] == ["clean", "train"]
+        assert dependencies["evaluate"] == ["clean"]
+        assert dependencies["stationarity"] == ["clean"]
+
+    def test_resolved_input_is_hashed(self, workspace):
+        """Test that an input given as a function is resolved when keying."""
+        target = {"path": None}
+        stage = make_stage(workspace, "a", "raw.txt", "a.txt")
+        stage["inputs"].append(lambda: target["path"])
+        assert pipeline.stage_key(stage) is None
+
+        (workspace / "one.txt").write_text("one")
+        (workspace / "two.txt").write_text("two")
+        target["path"] = workspace / "one.txt"
+        first = pipeline.stage_key(stage)
+        target["path"] = workspace / "two.txt"
+        assert first is not None and pipeline.stage_key(stage) != first
+        assert stage_dependencies([stage]) == {"a": []}
+
+class TestRunPipeline:
+    """Tests for running, caching and scheduling."""
+
+    def test_second_run_is_cached(self, workspace):
+        """Test that nothing reruns when inputs and config are unchanged."""
+        state = workspace / "state.json"
+        first = run_pipeline(make_stages(workspace), state_path=state)
+        assert set(statuses(first).values()) == {"ok"}
+        assert (workspace / "report.txt").read_text() == "raw+++"
+
+        second = run_pipeline(make_stages(workspace), state_path=state)
+        assert set(statuses(second).values()) == {"cached"}
+        assert len(runs(workspace)) == 4
+
+    def test_changed_input_reruns_downstream(self, workspace):
+        """Test that an input change reruns the stages that depend on it."""
+        state = workspace / "state.json"
+        run_pipeline(make_stages(workspace), state_path=state)
+        (workspace / "raw.txt").write_text("new raw")
+
+        assert statuses(plan(make_stages(workspace), state_path=state)) == {
+            "clean": "will run", "a": "pending", "b": "pending", "report": "pending"
+        }
+        records = run_pipeline(make_stages(workspace), state_path=state)
+        assert set(statuses(records).values()) == {"ok"}
+        assert (workspace / "report.txt").read_text() == "new raw+++"
+
+    def test_config_change_reruns_stage(self, workspace, monkeypatch):
+        """Test that a changed config setting reruns only the stages reading it."""
+        state = workspace / "state.json"
+        run_pipeline(make_stages(workspace), state_path=state)
+        monkeypatch.setattr(config, "FORECAST_HORIZON", config.FORECAST_HORIZON + 1)
+
+        records = run_pipeline(make_stages(workspace), state_path=state)
+        # a's output is identical, so report stays cached
+        assert statuses(records) == {"clean": "cached", "a": "ok", "b": "cached", "report": "cached"}
+
+    def test_modified_output_reruns_stage(self, workspace):
+        """Test that an output edited or deleted since the last run is rebuilt."""
+        state = workspace / "state.json"
+        run_pipeline(make_stages(workspace), state_path=state)
+        (workspace / "b.txt").unlink()
+
+        records = run_pipeline(make_stages(workspace), state_path=state)
+        assert statuses(records)["b"] == "ok"
+        assert (workspace / "b.txt").exists()
+
+    def test_failure_blocks_dependents(self, workspace):
+        """Test that a failed stage stops its dependents but not the others."""
+        stages = make_stages(workspace)
+        stages[1]["script"] = str(workspace / "fail.py")
+        records = run_pipeline(stages, state_path=workspace / "state.json")
+
+        assert statuses(records) == {"clean": "ok", "a": "failed", "b": "ok", "report": "blocked"}
+        assert "boom" in records[1]["output"]
+        assert records[1]["returncode"] == 3
+
+    def test_independent_stages_run_concurrently(self, workspace):
+        """Test that stages with ready inputs overlap in time."""
+        stages = make_stages(workspace, delay=1.0)[:3]
+        start = time.time()
+        run_pipeline(stages, n_jobs=2, state_path=workspace / "state.json")
+        elapsed = time.time() - start
+
+        assert sorted(runs(workspace)[1:]) == ["a", "b"]
+        assert elapsed < 2.0
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
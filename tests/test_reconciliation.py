@@ -0,0 +1,135 @@
+"""
+Unit tests for forecast reconciliation.
+"""
+import pytest
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from reconciliation import (
+    summing_matrix,
+    reconcile,
+    historical_proportions,
+    coherence_error,
+    seasonal_naive_variance,
+    base_forecasts
+)
+from model_utils import save_compact_model
+
+LEVELS = [(), ("market",), ("market", "region"), ("segment",)]
+
+@pytest.fixture
+def hierarchy():
+    """Summing matrix of a small grouped hierarchy."""
+    bottom_columns = pd.MultiIndex.from_tuples([
+        ("EU", "North", "Consumer"), ("EU", "North", "Corporate"),
+        ("EU", "South", "Consumer"), ("US", "Central", "Consumer"),
+        ("US", "Central", "Corporate")
+    ], names=["market", "region", "segment"])
+    return summing_matrix(bottom_columns, LEVELS)
+
+class TestSummingMatrix:
+    """Tests for the summing matrix."""
+
+    def test_structure(self, hierarchy):
+        """Test node order and aggregation rows."""
+        S, node_ids = hierarchy
+        assert S.shape == (13, 5)
+        assert node_ids[:8] == [
+            "total", "market=EU", "market=US",
+            "market=EU|region=North", "market=EU|region=South", "market=US|region=Central",
+            "segment=Consumer", "segment=Corporate"
+        ]
+        assert node_ids[8] == "market=EU|region=North|segment=Consumer"
+        dense = S.toarray()
+        np.testing.assert_array_equal(dense[0], np.ones(5))
+        np.testing.assert_array_equal(dense[1], [1, 1, 1, 0, 0])
+        np.testing.assert_array_equal(dense[6], [1, 0, 1, 1, 0])
+        np.testing.assert_array_equal(dense[8:], np.eye(5))
+
+class TestReconcile:
+    """Tests for the reconciliation methods."""
+
+    @pytest.mark.parametrize("method", ["bottom_up", "top_down", "ols", "wls_struct", "wls_var"])
+    def test_methods_are_coherent(self, hierarchy, method):
+        """Test that every method returns forecasts that add up."""
+        S, node_ids = hierarchy
+        rng = np.random.default_rng(0)
+        base = rng.normal(100, 10, (len(node_ids), 6))
+        reconciled = reconcile(
+            S, base, method,
+            residual_var=rng.uniform(1, 5, len(node_ids)),
+            proportions=np.full(5, 0.2)
+        )
+        assert reconciled.shape == base.shape
+        assert coherence_error(S, base) > 1
+        assert coherence_error(S, reconciled) < 1e-8
+
+    @pytest.mark.parametrize("method", ["ols", "wls_var"])
+    def test_matches_dense_solution(self, hierarchy, method):
+        """Test the sparse solution against the textbook dense formula."""
+        S, node_ids = hierarchy
+        rng = np.random.default_rng(1)
+        base = rng.normal(size=(len(node_ids), 4))
+        variances = rng.uniform(0.5, 2, len(node_ids))
+        weights = np.ones(len(node_ids)) if method == "ols" else 1 / variances
+
+        dense = S.toarray()
+        expected = dense @ np.linalg.solve(dense.T @ np.diag(weights) @ dense,
+                                           dense.T @ (weights[:, None] * base))
+        actual = reconcile(S, base, method, residual_var=variances)
+        np.testing.assert_allclose(actual, expected, atol=1e-10)
+
+    def test_coherent_forecasts_unchanged(self, hierarchy):
+        """Test that already coherent forecasts pass through untouched."""
+        S, _ = hierarchy
+        coherent = np.asarray(S @ np.arange(1.0, 11.0).reshape(5, 2))
+        np.testing.assert_allclose(reconcile(S, coherent, "ols"), coherent)
+
+    def test_unknown_method(self, hierarchy):
+        """Test that an unknown method is rejected."""
+        S, node_ids = hierarchy
+        with pytest.raises(ValueError):
+            reconcile(S, np.zeros((len(node_ids), 1)), "mint_full")
+
+class TestBaseForecasts:
+    """Tests for the vectorized helpers."""
+
+    def test_historical_proportions(self):
+        """Test that proportions sum to one and follow the averages."""
+        history = np.array([[1.0, 3.0], [3.0, 1.0], [0.0, 4.0]])
+        proportions = historical_proportions(history)
+        np.testing.assert_allclose(proportions, [4 / 12, 4 / 12, 4 / 12])
+        assert historical_proportions(history, "average_proportions").sum() == pytest.approx(1.0)
+
+    def test_model_variance_from_manifest(self, tmp_path):
+        """Test that model nodes use the variance recorded at training time."""
+        import warnings
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        rng = np.random.default_rng(1)
+        history = 100 + rng.normal(0, 5, (2, 36)).cumsum(axis=1)
+        series = pd.Series(history[0], index=pd.date_range("2012-01-31", periods=36, freq="M"))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = SARIMAX(series, order=(1, 0, 0)).fit(disp=False)
+        save_compact_model(results, tmp_path / "total.npz")
+
+        manifest = {"nodes": {"total": {"model_file": "total.npz", "resid_var": 7.5}}}
+        forecasts, variances = base_forecasts(["total", "other"], history, manifest,
+                                              models_dir=tmp_path, steps=3)
+        assert variances[0] == 7.5
+        assert variances[1] == pytest.approx(seasonal_naive_variance(history)[1])
+        assert forecasts.shape == (2, 3)
+
+        # Manifests written before the variance was recorded keep the naive one
+        del manifest["nodes"]["total"]["resid_var"]
+        _, variances = base_forecasts(["total", "other"], history, manifest,
+                                      models_dir=tmp_path, steps=3)
+        assert variances[0] == pytest.approx(seasonal_naive_variance(history)[0])
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
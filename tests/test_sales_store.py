@@ -0,0 +1,61 @@
+"""
+Unit tests for the columnar sales store.
+"""
+import os
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import sales_store
+
+@pytest.fixture
+def cleaned_df():
+    """Small cleaned-sales frame with typed columns."""
+    return pd.DataFrame({
+        "order_id": ["A-1", "A-2", "A-3"],
+        "order_date": pd.to_datetime(["2011-01-01", "2011-02-01", "2011-02-03"]),
+        "ship_date": pd.to_datetime(["2011-01-04", "2011-02-05", "2011-02-06"]),
+        "market": ["Africa", "APAC", "Africa"],
+        "sales": [100.0, 250.0, 75.5]
+    })
+
+class TestLoadCleanedSales:
+    """Tests for reading the cleaned table."""
+
+    def test_round_trip_prefers_parquet(self, tmp_path, cleaned_df):
+        """Test that the Parquet copy is used with column projection."""
+        csv_path = tmp_path / "cleaned.csv"
+        sales_store.save_cleaned_data(cleaned_df, csv_path)
+
+        assert sales_store.parquet_path_for(csv_path).exists()
+        result = sales_store.load_cleaned_sales(["order_date", "sales"], csv_path)
+        assert list(result.columns) == ["order_date", "sales"]
+        assert pd.api.types.is_datetime64_any_dtype(result["order_date"])
+
+        full = sales_store.load_cleaned_sales(path=csv_path)
+        assert isinstance(full["market"].dtype, pd.CategoricalDtype)
+
+    def test_stale_parquet_falls_back_to_csv(self, tmp_path, cleaned_df):
+        """Test that a CSV newer than the Parquet copy wins."""
+        csv_path = tmp_path / "cleaned.csv"
+        sales_store.save_cleaned_data(cleaned_df, csv_path)
+
+        cleaned_df.head(1).to_csv(csv_path, index=False)
+        parquet_mtime = sales_store.parquet_path_for(csv_path).stat().st_mtime_ns
+        os.utime(csv_path, ns=(parquet_mtime + 10**9, parquet_mtime + 10**9))
+
+        result = sales_store.load_cleaned_sales(["order_date", "sales"], csv_path)
+        assert len(result) == 1
+        assert pd.api.types.is_datetime64_any_dtype(result["order_date"])
+
+    def test_missing_file_raises(self, tmp_path):
+        """Test that a missing table raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            sales_store.load_cleaned_sales(path=tmp_path / "missing.csv")
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+"""
+Unit tests for the synthetic benchmark data and the stage benchmark helpers.
+"""
+import pytest
+import sys
+import pandas as pd
+from pathlib import Path
+
+# Add src and benchmarks to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from synthetic_data import generate_transactions, write_superstore_csv, COLUMNS
+from stage_benchmarks import compare_with_baseline, run_stage
+from data_cleaning import standardize_columns, parse_dates, convert_numeric_columns, clean_invalid_records
+
+RAW_FILE = Path(__file__).parent.parent / "data" / "raw" / "superstore_sales.csv"
+
+class TestGenerateTransactions:
+    """Tests for the synthetic transaction generator."""
+
+    def test_same_columns_as_raw_extract(self):
+        """Test that the columns match the real raw file."""
+        raw_columns = list(pd.read_csv(RAW_FILE, nrows=0, encoding="utf-8-sig").columns)
+        assert raw_columns == COLUMNS
+        assert list(generate_transactions(100).columns) == COLUMNS
+
+    def test_scales_markets_and_categories(self):
+        """Test that any number of markets and categories can be generated."""
+        frame = generate_transactions(20_000, n_markets=12, n_categories=5, seed=1)
+        assert frame["market"].nunique() == 12
+        assert frame["category"].nunique() == 5
+        assert frame["sub_category"].nunique() == 5 * 4
+
+    def test_cleaning_pipeline_accepts_output(self):
+        """Test that dates parse and only the injected invalid rows are removed."""
+        frame = generate_transactions(50_000, seed=2)
+        df = convert_numeric_columns(parse_dates(standardize_columns(frame.copy())))
+        assert df["ship_date"].notna().all()
+        assert df["order_date"].isna().sum() > 0
+        assert df["order_date"].min() >= pd.Timestamp("2011-01-01")
+
+        cleaned = clean_invalid_records(df)
+        removed = len(df) - len(cleaned)
+        assert 0 < removed < 0.01 * len(df)
+
+    def test_chunked_write(self, tmp_path):
+        """Test that chunks are written under one header with unique orders per chunk."""
+        path = write_superstore_csv(tmp_path / "raw.csv", 2_500, chunk_rows=1_000)
+        frame = pd.read_csv(path)
+        assert len(frame) == 2_500
+        assert list(frame.columns) == COLUMNS
+        # Order ids continue across chunks instead of restarting
+        assert frame["order_id"].str.slice(4).astype(int).max() >= 1_000
+
+class TestStageBenchmarks:
+    """Tests for the stage benchmark helpers."""
+
+    def test_data_stages(self, tmp_path):
+        """Test that the clean and aggregate stages run on generated data."""
+        write_superstore_csv(tmp_path / "raw.csv", 5_000)
+        cleaned = run_stage("clean", tmp_path)
+        assert cleaned["units"] == 5_000
+        assert cleaned["seconds"] > 0
+
+        aggregated = run_stage("aggregate", tmp_path)
+        monthly = pd.read_csv(tmp_path / "monthly.csv", index_col=0)
+        assert len(monthly) == 48
+        assert aggregated["unit"] == "rows"
+
+    def test_regressions(self):
+        """Test that only stages slower than the tolerance are reported."""
+        entry = {"stage": "clean", "rows": 1000, "markets": 7, "categories": 3}
+        baseline = [dict(entry, seconds=1.0), dict(entry, stage="aggregate", seconds=1.0)]
+        results = [dict(entry, seconds=1.1), dict(entry, stage="aggregate", seconds=1.5)]
+        assert compare_with_baseline(results, baseline, tolerance=0.2) == [("aggregate", 1000, 1.0, 1.5)]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])